@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Benchmark: render time, peak memory and output size of the SVG generators.
+
+Drives every layout in generate-svgs.py (and write_svg in optimized mode)
+with synthetic inputs of 10 to 10,000 lines. Each run streams into a
+byte-counting sink, so disk speed does not count. Wall time is the best
+run over `--repeat` rounds that interleave all cases, with at least
+`--min-time` seconds of runs per case; peak memory is the tracemalloc peak
+of one more run. `esc` and the `_anim` keyTimes math, which run once per
+line, are timed in the same rounds, in nanoseconds per call.
+
+Results are written as JSON. With `--baseline`, runs are compared with an
+earlier report: anything slower by more than `--threshold`, or larger by
+more than `--size-threshold`, is listed as a regression and the exit
+status is 1. Runs that took under `--min-ms` in the baseline are compared
+on size only; their timings are mostly noise. Timings on a shared machine
+can swing by half between identical runs, so the default time threshold
+is wide; output size is deterministic and held tighter.
+
+Run:
+  python3 docs/gifs/bench-svgs.py [--sizes 10,100,1000,10000] [--spans 3] \\
+      [--read-pause 4.0] [--output bench.json] [--baseline old.json]
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MICRO_CALLS = 20000
+COLORS = ("#cdd6f4", "#a6e3a1", "#89b4fa", "#f38ba8", "#6c7086")
+
+
+def load_generator():
+    """Import generate-svgs.py (its name is not a valid module name)."""
+    path = os.path.join(HERE, "generate-svgs.py")
+    spec = importlib.util.spec_from_file_location("generate_svgs", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Sink:
+    """A file-like object that only counts what is written to it."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.elements = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode())
+        self.elements += text.count("<") - text.count("</")
+
+
+def terminal_lines(n, spans):
+    """n make_svg lines: every third split into `spans` spans, delays in steps."""
+    lines = []
+    for i in range(n):
+        color = COLORS[i % len(COLORS)]
+        if spans and i % 3 == 0:
+            text = [(f"seg {k} <{i}>", COLORS[k % len(COLORS)]) for k in range(spans)]
+        else:
+            text = f"line {i}: output & \"quoted\" text"
+        lines.append((text, color, (i // 10) * 50))
+    return lines
+
+
+def inputs(n, spans, read_pause):
+    """{generator name: (write_* name, args, kwargs)} for n lines of content."""
+    lines = terminal_lines(n, spans)
+    messages = []
+    for i in range(0, n, 5):
+        if i and i % 50 == 0:
+            messages.append({"divider": f"{i} lines later", "delay": i * 10})
+        messages.append(
+            {
+                "user": "Agent" if i % 2 else "You",
+                "time": f"#{i}",
+                "lines": [f"message line {i + k} & more" for k in range(min(5, n - i))],
+                "bar": COLORS[i % len(COLORS)],
+                "delay": i * 10,
+            }
+        )
+    items = [
+        {"text": f"item {i}", "sub": f"detail {i}", "delay": i * 20} for i in range(n)
+    ]
+    per_section = 10
+    sections = [
+        {
+            "title": f"Section {s}",
+            "items": [
+                (f"task {s}.{k}", f"${k}.00")
+                for k in range(min(per_section, n - s * per_section))
+            ],
+            "subtotal": (f"subtotal {s}", "$45.00"),
+            "delay_start": s * 400,
+        }
+        for s in range((n + per_section - 1) // per_section)
+    ]
+    mappings = [
+        {"left": f"left {i}", "left_sub": "sub", "right": f"right {i}", "delay": i * 20}
+        for i in range(n)
+    ]
+    kw = {"read_pause": read_pause}
+    return {
+        "make_svg": ("write_svg", (lines,), kw),
+        "make_svg[optimize]": ("write_svg", (lines,), dict(kw, optimize=True)),
+        "make_chat_svg": ("write_chat_svg", (messages,), kw),
+        "make_versus_svg": (
+            "write_versus_svg",
+            (items[: (n + 1) // 2], items[(n + 1) // 2 :]),
+            dict(kw, title="bench", verdict="done"),
+        ),
+        "make_receipt_svg": (
+            "write_receipt_svg",
+            (sections, [("TOTAL", "$99", "#a6e3a1")]),
+            kw,
+        ),
+        "make_figure_svg": (
+            "write_figure_svg",
+            (mappings,),
+            dict(kw, caption="bench", footnote="done"),
+        ),
+    }
+
+
+def run_case(write, args, kwargs):
+    """Tracemalloc peak and output size of one run."""
+    sink = Sink()
+    tracemalloc.start()
+    write(sink, *args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_alloc_kb": round(peak / 1024, 1),
+        "bytes": sink.bytes,
+        "elements": sink.elements,
+    }
+
+
+def time_cases(cases, repeat, min_time):
+    """Best wall time in seconds of each (write, args, kwargs) case.
+
+    The cases are timed in `repeat` interleaved rounds, each running every
+    case for at least `min_time / repeat` seconds, so a slow spell on the
+    machine hits one round of every case instead of every run of a few.
+    The garbage collector is off while timing, as in timeit.
+    """
+    best = [float("inf")] * len(cases)
+    budget = min_time / repeat
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for i, (write, args, kwargs) in enumerate(cases):
+                spent = 0.0
+                while not spent or spent < budget:
+                    start = time.perf_counter()
+                    write(Sink(), *args, **kwargs)
+                    elapsed = time.perf_counter() - start
+                    best[i] = min(best[i], elapsed)
+                    spent += elapsed
+    finally:
+        gc.enable()
+    return best
+
+
+def calls(fn, number):
+    """A case that calls `fn` `number` times, for time_cases()."""
+
+    def run(out):
+        for _ in range(number):
+            fn()
+
+    return run, (), {}
+
+
+def micro(gen, number=MICRO_CALLS):
+    """{name: case} timing `number` calls of esc() and _anim() on typical inputs."""
+    cases = {
+        "esc_plain": lambda: gen.esc("  git log    : 7 commits today"),
+        "esc_special": lambda: gen.esc('<tag attr="x"> & </tag>'),
+        "anim_immediate": lambda: gen._anim(0, 9.8),
+        "anim_delayed": lambda: gen._anim(2500, 9.8),
+    }
+    return {name: calls(fn, number) for name, fn in cases.items()}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_key(run):
+    return (run["generator"], run["lines"], run["spans"], run["read_pause"])
+
+
+def regressions(results, baseline, threshold, size_threshold, min_ms):
+    """Messages for runs slower than `baseline` by > `threshold` or larger
+    by > `size_threshold`.
+
+    Runs faster than `min_ms` in the baseline are too noisy to compare on
+    time; their output size is still compared.
+    """
+    before = {run_key(r): r for r in baseline.get("runs", [])}
+    problems = []
+    for run in results["runs"]:
+        old = before.get(run_key(run))
+        if old is None:
+            continue
+        label = f"{run['generator']} x{run['lines']}"
+        limit = old["wall_ms"] * (1 + threshold)
+        if old["wall_ms"] >= min_ms and run["wall_ms"] > limit:
+            problems.append(
+                f"{label}: {run['wall_ms']:.2f} ms, was {old['wall_ms']:.2f} ms"
+            )
+        if run["bytes"] > old["bytes"] * (1 + size_threshold):
+            problems.append(f"{label}: {run['bytes']} bytes, was {old['bytes']}")
+    for name, ns in results["micro"].items():
+        old = baseline.get("micro", {}).get(name)
+        if old and ns > old * (1 + threshold):
+            problems.append(f"{name}: {ns:.0f} ns/call, was {old:.0f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--sizes", default="10,100,1000,10000", help="comma-separated line counts"
+    )
+    parser.add_argument(
+        "--spans", type=int, default=3, help="spans per multi-colour make_svg line"
+    )
+    parser.add_argument("--read-pause", type=float, default=4.0)
+    parser.add_argument(
+        "--repeat", type=int, default=15, help="interleaved timing rounds"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="minimum seconds of timed runs per case",
+    )
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.0,
+        help="allowed slowdown vs the baseline (1.0 = 100%%)",
+    )
+    parser.add_argument(
+        "--size-threshold",
+        type=float,
+        default=0.05,
+        help="allowed output growth vs the baseline (0.05 = 5%%)",
+    )
+    parser.add_argument(
+        "--min-ms",
+        type=float,
+        default=5.0,
+        help="ignore timing changes of runs faster than this in the baseline",
+    )
+    args = parser.parse_args()
+
+    gen = load_generator()
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": [],
+    }
+    cases = []
+    for n in (int(s) for s in args.sizes.split(",")):
+        for name, (write, call_args, kwargs) in inputs(
+            n, args.spans, args.read_pause
+        ).items():
+            cases.append((name, n, (getattr(gen, write), call_args, kwargs)))
+    micro_cases = micro(gen)
+    timed = [case for _, _, case in cases] + list(micro_cases.values())
+    times = time_cases(timed, args.repeat, args.min_time)
+    for (name, n, case), best in zip(cases, times):
+        run = {"wall_ms": round(best * 1000, 3), **run_case(*case)}
+        results["runs"].append(
+            {
+                "generator": name,
+                "lines": n,
+                "spans": args.spans,
+                "read_pause": args.read_pause,
+                **run,
+            }
+        )
+        print(
+            f"{name:20} x{n:<6} {run['wall_ms']:9.2f} ms "
+            f"{run['peak_alloc_kb']:9.1f} KB peak {run['bytes']:>10} bytes",
+            file=sys.stderr,
+        )
+    results["micro"] = {
+        name: round(best / MICRO_CALLS * 1e9, 1)
+        for name, best in zip(micro_cases, times[len(cases) :])
+    }
+    for name, ns in results["micro"].items():
+        print(f"{name:20} {ns:9.1f} ns/call", file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = regressions(
+            results, baseline, args.threshold, args.size_threshold, args.min_ms
+        )
+        results["regressions"] = problems
+        for message in problems:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if problems:
+            status = 1
+        else:
+            print(
+                f"No regressions beyond {args.threshold:.0%} in time or "
+                f"{args.size_threshold:.0%} in size vs {args.baseline}",
+                file=sys.stderr,
+            )
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,100 @@
 #!/usr/bin/env python3
-"""Generate SVG terminal recordings for README documentation."""
-
+"""Generate SVG terminal recordings for README documentation.
+
+Each SVG is a Target: a generator (write_svg, write_chat_svg, ...) and its
+arguments, rendered only when built. A target's input hash covers its
+arguments and the source of the rendering code; it is compared with
+`.svg-build.json` from the last build, together with a hash of the file on
+disk, and only targets whose hashes differ are rendered, across a process
+pool. A run with nothing changed renders nothing. The manifest is a local
+build cache and is not committed, so a fresh checkout renders everything
+once.
+
+The write_* generators stream a document element by element to a file
+handle through SvgWriter, so a long transcript never sits in memory as one
+string; each make_* wrapper returns the same bytes as a string.
+
+`--optimize` writes terminal SVGs with fonts and colours in a <style> block
+and lines that share a delay under one animated <g>, and reports the byte
+and element savings over the plain output. It needs `--out DIR`: the SVGs
+committed next to this script stay plain. Every output directory keeps its
+own `.svg-build.json`, and the build options are part of each input hash.
+
+`--specs DIR` renders a directory of transcript specs instead: one JSON
+(or, with PyYAML, YAML) file per SVG, naming a layout and its arguments:
+
+  {"layout": "make_svg", "title": "demo", "output": "demo.svg",
+   "lines": [["$ ls", "#cdd6f4"], ["done", "#a6e3a1", 400]]}
+
+`layout` is make_svg, make_chat_svg, make_versus_svg, make_receipt_svg or
+make_figure_svg; `output` is a bare file name in the output directory and
+defaults to the spec's name with `.svg`. Files render across a process
+pool; a bad spec is reported without stopping the others, and the run ends
+with its throughput in files per second.
+
+Run:
+  python3 docs/gifs/generate-svgs.py [NAME.svg ...] [--force] [--jobs N]
+  python3 docs/gifs/generate-svgs.py [NAME.svg ...] --optimize --out DIR
+  python3 docs/gifs/generate-svgs.py --check [--optimize --out DIR]
+  python3 docs/gifs/generate-svgs.py --specs DIR [--out DIR] [--jobs N]
+      [--optimize]
+"""
+
+import argparse
+import hashlib
+import inspect
+import io
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-def make_svg(
+class SvgWriter:
+    """Write an SVG document to a file handle one element at a time.
+
+    Nothing is buffered: each element goes straight to `out`, so memory does
+    not grow with the document and output starts with the first element.
+    """
+
+    def __init__(self, out):
+        self.out = out
+
+    def start(self, width, height):
+        self.out.write(
+            f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">'
+        )
+
+    def element(self, markup, sep="\n"):
+        """Write `sep`, then one indented element."""
+        self.out.write(f"{sep}  {markup}")
+
+    def end(self):
+        self.out.write("\n</svg>")
+
+
+def rendered(write, *args, **kwargs):
+    """Run a write_* function into a string."""
+    out = io.StringIO()
+    write(out, *args, **kwargs)
+    return out.getvalue()
+
+
+def make_svg(*args, **kwargs):
+    """write_svg() as a string."""
+    return rendered(write_svg, *args, **kwargs)
+
+
+def write_svg(
+    out,
     lines,
     title="Terminal",
     width=720,
@@ -16,12 +104,17 @@ def make_svg(
     pad_x=16,
     read_pause=4.0,
     fade_dur=0.5,
+    optimize=False,
 ):
     """Create a looping SVG terminal animation.
 
     Each line is a tuple: (text, color, [delay_ms])
     The animation cycles: lines appear sequentially, pause for reading,
     all fade out, then restart.
+
+    With `optimize`, fonts and colours move into a <style> block, blank lines
+    are dropped, and lines sharing a delay share one animated <g>: the same
+    picture in fewer bytes and far fewer DOM nodes.
     """
     height = pad_top + len(lines) * line_height + pad_bottom
 
@@ -30,7 +123,32 @@ def make_svg(
     appear_end = max_delay + 0.3  # last line finishes appearing
     total = appear_end + read_pause + fade_dur  # full cycle duration
 
-    text_elements = []
+    w = SvgWriter(out)
+    w.start(width, height)
+    if optimize:
+        classes = _color_classes(lines)
+        w.element(_terminal_style(classes))
+    w.element(f'<rect width="{width}" height="{height}" rx="10" fill="#1e1e2e"/>')
+    w.element(f'<rect width="{width}" height="32" rx="10" fill="#313244"/>')
+    w.element(f'<rect y="22" width="{width}" height="10" fill="#313244"/>')
+    w.element('<circle cx="20" cy="16" r="6" fill="#f38ba8"/>')
+    w.element('<circle cx="40" cy="16" r="6" fill="#f9e2af"/>')
+    w.element('<circle cx="60" cy="16" r="6" fill="#a6e3a1"/>')
+    if optimize:
+        w.element(
+            f'<text class="h" x="{width // 2}" y="20" text-anchor="middle">'
+            f"{esc(title)}</text>"
+        )
+        _write_grouped_lines(
+            w, lines, classes, pad_top, line_height, pad_x, total, fade_dur
+        )
+        w.end()
+        return
+    w.element(
+        f"<text x=\"{width // 2}\" y=\"20\" font-family=\"'SF Mono',monospace\" "
+        f'font-size="12" fill="#6c7086" text-anchor="middle">{esc(title)}</text>'
+    )
+
     for i, line in enumerate(lines):
         text = line[0]
         color = line[1] if len(line) > 1 else "#a6adc8"
@@ -58,34 +176,91 @@ def make_svg(
         )
 
         if isinstance(text, list):
-            spans = []
-            for seg in text:
-                spans.append(f'<tspan fill="{seg[1]}">{esc(seg[0])}</tspan>')
-            init_opacity = "0" if delay > 0 else "1"
-            text_elements.append(
-                f"  <text x=\"{pad_x}\" y=\"{y}\" font-family=\"'SF Mono','Fira Code','Cascadia Code',monospace\" "
-                f'font-size="13" fill="{color}" opacity="{init_opacity}">'
-                + "".join(spans)
-                + anim
-                + "</text>"
+            content = "".join(
+                f'<tspan fill="{seg[1]}">{esc(seg[0])}</tspan>' for seg in text
             )
         else:
-            init_opacity = "0" if delay > 0 else "1"
-            text_elements.append(
-                f"  <text x=\"{pad_x}\" y=\"{y}\" font-family=\"'SF Mono','Fira Code','Cascadia Code',monospace\" "
-                f'font-size="13" fill="{color}" opacity="{init_opacity}">{esc(text)}{anim}</text>'
+            content = esc(text)
+        init_opacity = "0" if delay > 0 else "1"
+        # Lines have always been separated by the literal text "chr(10)" (a
+        # slip in the original f-string); kept so the output is unchanged.
+        w.element(
+            f"<text x=\"{pad_x}\" y=\"{y}\" font-family=\"'SF Mono','Fira Code','Cascadia Code',monospace\" "
+            f'font-size="13" fill="{color}" opacity="{init_opacity}">{content}{anim}</text>',
+            sep="\n" if i == 0 else "chr(10)",
+        )
+    w.end()
+
+
+def _line_color(line):
+    return line[1] if len(line) > 1 else "#a6adc8"
+
+
+def _color_classes(lines):
+    """{colour: class name} for every colour used by non-blank lines."""
+    classes = {}
+    for line in lines:
+        if not line[0]:
+            continue
+        colors = [_line_color(line)]
+        if isinstance(line[0], list):
+            colors += [seg[1] for seg in line[0]]
+        for color in colors:
+            classes.setdefault(color, f"c{len(classes)}")
+    return classes
+
+
+def _terminal_style(classes):
+    rules = [
+        "text{font-family:'SF Mono','Fira Code','Cascadia Code',monospace;"
+        "font-size:13px}",
+        ".h{font-family:'SF Mono',monospace;font-size:12px;fill:#6c7086}",
+    ]
+    rules += [f".{name}{{fill:{color}}}" for color, name in classes.items()]
+    return f"<style>{''.join(rules)}</style>"
+
+
+def _write_grouped_lines(
+    w, lines, classes, pad_top, line_height, pad_x, total, fade_dur
+):
+    """write_svg(optimize=True) lines: one animated <g> per shared delay.
+
+    A line with a delay of its own keeps its <animate> inline, which is one
+    element fewer than a group around it.
+    """
+    groups = {}
+    for i, line in enumerate(lines):
+        if line[0]:  # blank lines draw nothing
+            groups.setdefault(line[2] if len(line) > 2 else 0, []).append(i)
+    for delay_ms in sorted(groups):
+        init, anim = _anim(delay_ms, total, fade_dur)
+        members = groups[delay_ms]
+        if len(members) > 1:
+            w.element(f'<g opacity="{init}">{anim}')
+        for i in members:
+            text = lines[i][0]
+            if isinstance(text, list):
+                content = "".join(
+                    f'<tspan class="{classes[seg[1]]}">{esc(seg[0])}</tspan>'
+                    for seg in text
+                )
+            else:
+                content = esc(text)
+            attrs = (
+                f'x="{pad_x}" y="{pad_top + i * line_height}" '
+                f'class="{classes[_line_color(lines[i])]}"'
             )
+            if len(members) > 1:
+                w.element(f"<text {attrs}>{content}</text>")
+            else:
+                w.element(f'<text {attrs} opacity="{init}">{content}{anim}</text>')
+        if len(members) > 1:
+            w.element("</g>")
 
-    return f'''<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">
-  <rect width="{width}" height="{height}" rx="10" fill="#1e1e2e"/>
-  <rect width="{width}" height="32" rx="10" fill="#313244"/>
-  <rect y="22" width="{width}" height="10" fill="#313244"/>
-  <circle cx="20" cy="16" r="6" fill="#f38ba8"/>
-  <circle cx="40" cy="16" r="6" fill="#f9e2af"/>
-  <circle cx="60" cy="16" r="6" fill="#a6e3a1"/>
-  <text x="{width // 2}" y="20" font-family="\'SF Mono\',monospace" font-size="12" fill="#6c7086" text-anchor="middle">{esc(title)}</text>
-{"chr(10)".join(text_elements)}
-</svg>'''
+
+def svg_stats(svg):
+    """(bytes, elements) of an SVG document."""
+    return len(svg.encode()), svg.count("<") - svg.count("</")
 
 
 def esc(s):
@@ -117,8 +292,13 @@ def _anim(delay_ms, total, fade_dur=0.5):
     )
 
 
-def make_chat_svg(
-    messages, channel="decisions", width=540, read_pause=5.0, fade_dur=0.5
+def make_chat_svg(*args, **kwargs):
+    """write_chat_svg() as a string."""
+    return rendered(write_chat_svg, *args, **kwargs)
+
+
+def write_chat_svg(
+    out, messages, channel="decisions", width=540, read_pause=5.0, fade_dur=0.5
 ):
     """Chat bubble SVG (Slack/Discord style).
 
@@ -155,11 +335,12 @@ def make_chat_svg(
     height = y + PAD
     total = max_delay_ms / 1000 + 0.3 + read_pause + fade_dur
 
-    els = []
-    els.append(f'<rect width="{width}" height="{height}" rx="8" fill="#1e1e2e"/>')
-    els.append(f'<rect width="{width}" height="36" rx="8" fill="#313244"/>')
-    els.append(f'<rect y="28" width="{width}" height="8" fill="#313244"/>')
-    els.append(
+    w = SvgWriter(out)
+    w.start(width, height)
+    w.element(f'<rect width="{width}" height="{height}" rx="8" fill="#1e1e2e"/>')
+    w.element(f'<rect width="{width}" height="36" rx="8" fill="#313244"/>')
+    w.element(f'<rect y="28" width="{width}" height="8" fill="#313244"/>')
+    w.element(
         f'<text x="{PAD}" y="23" font-family="{FONT}" font-size="13" '
         f'fill="#89b4fa" font-weight="bold"># {esc(channel)}</text>'
     )
@@ -171,7 +352,7 @@ def make_chat_svg(
             text = item["text"]
             cx = width // 2
             tw = len(text) * 4 + 16
-            els.append(
+            w.element(
                 f'<g opacity="{init}">'
                 f'<line x1="{PAD}" y1="{dy + 18}" x2="{cx - tw}" y2="{dy + 18}" '
                 f'stroke="#45475a" stroke-width="1"/>'
@@ -211,16 +392,18 @@ def make_chat_svg(
                     f'font-family="{FONT}" font-size="12" fill="{text_color}">'
                     f"{esc(line)}</text>"
                 )
-            els.append(f'<g opacity="{init}">{inner}{anim}</g>')
+            w.element(f'<g opacity="{init}">{inner}{anim}</g>')
+
+    w.end()
 
-    return (
-        f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">\n'
-        + "\n".join(f"  {e}" for e in els)
-        + "\n</svg>"
-    )
 
+def make_versus_svg(*args, **kwargs):
+    """write_versus_svg() as a string."""
+    return rendered(write_versus_svg, *args, **kwargs)
 
-def make_versus_svg(
+
+def write_versus_svg(
+    out,
     left_items,
     right_items,
     title="",
@@ -250,23 +433,24 @@ def make_versus_svg(
     max_delay_ms = verdict_delay if verdict else max_item_delay
     total = max_delay_ms / 1000 + 0.3 + read_pause + fade_dur
 
-    els = []
-    els.append(f'<rect width="{width}" height="{height}" rx="10" fill="#1e1e2e"/>')
+    w = SvgWriter(out)
+    w.start(width, height)
+    w.element(f'<rect width="{width}" height="{height}" rx="10" fill="#1e1e2e"/>')
 
     init0, anim0 = _anim(0, total, fade_dur)
-    els.append(
+    w.element(
         f'<text x="{MID}" y="30" font-family="{FONT}" font-size="15" fill="#cdd6f4" '
         f'text-anchor="middle" font-weight="bold" opacity="{init0}">{esc(title)}{anim0}</text>'
     )
-    els.append(
+    w.element(
         f'<line x1="{MID}" y1="48" x2="{MID}" y2="{verdict_y - 8}" stroke="#313244" '
         f'stroke-width="1" opacity="{init0}">{anim0}</line>'
     )
-    els.append(
+    w.element(
         f'<text x="{MID // 2}" y="56" font-family="{FONT}" font-size="12" '
         f'fill="#f38ba8" text-anchor="middle" opacity="{init0}">{esc(left_label)}{anim0}</text>'
     )
-    els.append(
+    w.element(
         f'<text x="{MID + MID // 2}" y="56" font-family="{FONT}" font-size="12" '
         f'fill="#a6e3a1" text-anchor="middle" opacity="{init0}">{esc(right_label)}{anim0}</text>'
     )
@@ -274,7 +458,7 @@ def make_versus_svg(
     for i, item in enumerate(left_items):
         y = row_start + i * ROW_H
         init, anim = _anim(item.get("delay", 0), total, fade_dur)
-        els.append(
+        w.element(
             f'<g opacity="{init}">'
             f'<text x="{PAD}" y="{y + 14}" font-family="{FONT}" font-size="13" '
             f'fill="#f38ba8">{esc(item["text"])}</text>'
@@ -286,7 +470,7 @@ def make_versus_svg(
     for i, item in enumerate(right_items):
         y = row_start + i * ROW_H
         init, anim = _anim(item.get("delay", 0), total, fade_dur)
-        els.append(
+        w.element(
             f'<g opacity="{init}">'
             f'<text x="{MID + PAD}" y="{y + 14}" font-family="{FONT}" font-size="13" '
             f'fill="#a6e3a1">{esc(item["text"])}</text>'
@@ -295,27 +479,28 @@ def make_versus_svg(
             f"{anim}</g>"
         )
 
-    els.append(
+    w.element(
         f'<line x1="{PAD}" y1="{verdict_y - 4}" x2="{width - PAD}" y2="{verdict_y - 4}" '
         f'stroke="#313244" stroke-width="1" opacity="{init0}">{anim0}</line>'
     )
 
     if verdict:
         init_v, anim_v = _anim(verdict_delay, total, fade_dur)
-        els.append(
+        w.element(
             f'<text x="{MID}" y="{verdict_y + 18}" font-family="{FONT}" font-size="13" '
             f'fill="#cba6f7" text-anchor="middle" opacity="{init_v}">{esc(verdict)}{anim_v}</text>'
         )
 
-    return (
-        f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">\n'
-        + "\n".join(f"  {e}" for e in els)
-        + "\n</svg>"
-    )
+    w.end()
 
 
-def make_receipt_svg(
-    sections, footer_lines=None, width=400, read_pause=5.0, fade_dur=0.5
+def make_receipt_svg(*args, **kwargs):
+    """write_receipt_svg() as a string."""
+    return rendered(write_receipt_svg, *args, **kwargs)
+
+
+def write_receipt_svg(
+    out, sections, footer_lines=None, width=400, read_pause=5.0, fade_dur=0.5
 ):
     """Receipt/invoice style SVG."""
     FONT = "'SF Mono','Fira Code','Cascadia Code',monospace"
@@ -369,9 +554,10 @@ def make_receipt_svg(
     height = y + PAD
     total = max_delay_ms / 1000 + 0.3 + read_pause + fade_dur
 
-    els = []
-    els.append(f'<rect width="{width}" height="{height}" rx="4" fill="#1e1e2e"/>')
-    els.append(
+    w = SvgWriter(out)
+    w.start(width, height)
+    w.element(f'<rect width="{width}" height="{height}" rx="4" fill="#1e1e2e"/>')
+    w.element(
         f'<rect x="1" y="1" width="{width - 2}" height="{height - 2}" rx="3" '
         f'fill="none" stroke="#313244" stroke-width="1"/>'
     )
@@ -381,7 +567,7 @@ def make_receipt_svg(
         if kind == "title":
             _, text, delay, iy = it
             init, anim = _anim(delay, total, fade_dur)
-            els.append(
+            w.element(
                 f'<text x="{width // 2}" y="{iy + 14}" font-family="{FONT}" '
                 f'font-size="14" fill="#cdd6f4" text-anchor="middle" font-weight="bold" '
                 f'opacity="{init}">{esc(text)}{anim}</text>'
@@ -389,21 +575,21 @@ def make_receipt_svg(
         elif kind == "dashes":
             _, _, delay, iy = it
             init, anim = _anim(delay, total, fade_dur)
-            els.append(
+            w.element(
                 f'<line x1="{PAD}" y1="{iy}" x2="{RIGHT}" y2="{iy}" '
                 f'stroke="#45475a" stroke-dasharray="3" opacity="{init}">{anim}</line>'
             )
         elif kind == "section_title":
             _, text, delay, iy = it
             init, anim = _anim(delay, total, fade_dur)
-            els.append(
+            w.element(
                 f'<text x="{PAD}" y="{iy + 14}" font-family="{FONT}" font-size="12" '
                 f'fill="#a6adc8" opacity="{init}">{esc(text)}{anim}</text>'
             )
         elif kind == "item":
             _, (text, price), delay, iy = it
             init, anim = _anim(delay, total, fade_dur)
-            els.append(
+            w.element(
                 f'<g opacity="{init}">'
                 f'<text x="{PAD}" y="{iy + 14}" font-family="{FONT}" font-size="12" '
                 f'fill="#cdd6f4">{esc(text)}</text>'
@@ -414,14 +600,14 @@ def make_receipt_svg(
         elif kind == "line":
             _, _, delay, iy = it
             init, anim = _anim(delay, total, fade_dur)
-            els.append(
+            w.element(
                 f'<line x1="{PAD}" y1="{iy}" x2="{RIGHT}" y2="{iy}" '
                 f'stroke="#45475a" stroke-width="1" opacity="{init}">{anim}</line>'
             )
         elif kind == "subtotal":
             _, (text, price), delay, iy, color = it
             init, anim = _anim(delay, total, fade_dur)
-            els.append(
+            w.element(
                 f'<g opacity="{init}">'
                 f'<text x="{PAD}" y="{iy + 14}" font-family="{FONT}" font-size="12" '
                 f'fill="{color}" font-weight="bold">{esc(text)}</text>'
@@ -432,11 +618,11 @@ def make_receipt_svg(
         elif kind == "double_line":
             _, _, _, iy = it
             init, anim = _anim(0, total, fade_dur)
-            els.append(
+            w.element(
                 f'<line x1="{PAD}" y1="{iy}" x2="{RIGHT}" y2="{iy}" '
                 f'stroke="#45475a" stroke-width="1" opacity="{init}">{anim}</line>'
             )
-            els.append(
+            w.element(
                 f'<line x1="{PAD}" y1="{iy + 3}" x2="{RIGHT}" y2="{iy + 3}" '
                 f'stroke="#45475a" stroke-width="1" opacity="{init}">{anim}</line>'
             )
@@ -453,17 +639,18 @@ def make_receipt_svg(
                     f'font-size="13" fill="{color}" font-weight="bold" '
                     f'text-anchor="end">{esc(price)}</text>'
                 )
-            els.append(f'<g opacity="{init}">{inner}{anim}</g>')
+            w.element(f'<g opacity="{init}">{inner}{anim}</g>')
 
-    return (
-        f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">\n'
-        + "\n".join(f"  {e}" for e in els)
-        + "\n</svg>"
-    )
+    w.end()
+
+
+def make_figure_svg(*args, **kwargs):
+    """write_figure_svg() as a string."""
+    return rendered(write_figure_svg, *args, **kwargs)
 
 
-def make_figure_svg(
-    mappings, caption="", footnote="", width=640, read_pause=6.0, fade_dur=0.5
+def write_figure_svg(
+    out, mappings, caption="", footnote="", width=640, read_pause=6.0, fade_dur=0.5
 ):
     """Academic figure style with box-arrow-box mappings."""
     FONT = "'SF Mono','Fira Code','Cascadia Code',monospace"
@@ -483,11 +670,12 @@ def make_figure_svg(
     total_delay = fn_delay if footnote else max_delay_ms
     total = total_delay / 1000 + 0.3 + read_pause + fade_dur
 
-    els = []
-    els.append(f'<rect width="{width}" height="{height}" rx="10" fill="#1e1e2e"/>')
+    w = SvgWriter(out)
+    w.start(width, height)
+    w.element(f'<rect width="{width}" height="{height}" rx="10" fill="#1e1e2e"/>')
 
     init0, anim0 = _anim(0, total, fade_dur)
-    els.append(
+    w.element(
         f'<text x="{PAD}" y="22" font-family="{FONT}" font-size="12" '
         f'fill="#a6adc8" font-style="italic" opacity="{init0}">{esc(caption)}{anim0}</text>'
     )
@@ -521,26 +709,346 @@ def make_figure_svg(
             f'<text x="{right_cx}" y="{y + 34}" font-family="{FONT}" font-size="10" '
             f'fill="#6c7086" text-anchor="middle">{esc(m.get("right_sub", ""))}</text>'
         )
-        els.append(f'<g opacity="{init}">{inner}{anim}</g>')
+        w.element(f'<g opacity="{init}">{inner}{anim}</g>')
 
     if footnote:
         fn_y = row_start + len(mappings) * ROW_H + 16
         init_fn, anim_fn = _anim(fn_delay, total, fade_dur)
-        els.append(
+        w.element(
             f'<text x="{width // 2}" y="{fn_y}" font-family="{FONT}" font-size="12" '
             f'fill="#cba6f7" text-anchor="middle" font-style="italic" '
             f'opacity="{init_fn}">{esc(footnote)}{anim_fn}</text>'
         )
 
-    return (
-        f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">\n'
-        + "\n".join(f"  {e}" for e in els)
-        + "\n</svg>"
+    w.end()
+
+
+# -- Build --
+MANIFEST = ".svg-build.json"
+
+
+class Target:
+    """One SVG output: a write_* generator and its arguments, run on demand."""
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def options(self, optimize=False):
+        """Build options this target's generator accepts."""
+        params = inspect.signature(self.func).parameters
+        return {"optimize": True} if optimize and "optimize" in params else {}
+
+    def write(self, out, **options):
+        self.func(out, *self.args, **self.kwargs, **options)
+
+    def render(self, **options):
+        return rendered(self.func, *self.args, **self.kwargs, **options)
+
+    def digest(self, code, options):
+        """Hash of everything the output depends on: code, arguments, options."""
+        kwargs = sorted({**self.kwargs, **options}.items())
+        inputs = (code, self.func.__name__, self.args, kwargs)
+        return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+
+def code_digest():
+    """Hash of the rendering code: this script's source above this section.
+
+    Editing a generator, helper or style constant invalidates every target;
+    editing the literals of one target invalidates only that target. The
+    build, batch and CLI code below does not change what a target renders
+    and is left out.
+    """
+    with open(__file__) as f:
+        source = f.read()
+    render = source[: source.index("\n# -- Build --\n")]
+    return hashlib.sha256(render.encode()).hexdigest()
+
+
+def file_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_manifest(out_dir=SCRIPT_DIR):
+    """{file name: {"input": digest, "output": digest}} from the last build."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, out_dir=SCRIPT_DIR):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def render_target(name, target, options, out_dir=SCRIPT_DIR):
+    """Render one target into `out_dir`.
+
+    Returns (name, digest, seconds, stats, plain): `stats` is svg_stats() of
+    the file and `plain` that of the unoptimized render, or None when no
+    options apply.
+    """
+    start = time.perf_counter()
+    path = os.path.join(out_dir, name)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        target.write(f, **options)
+    os.replace(tmp, path)
+    elapsed = time.perf_counter() - start
+    with open(path) as f:
+        stats = svg_stats(f.read())
+    plain = svg_stats(target.render()) if options else None
+    return name, file_digest(path), elapsed, stats, plain
+
+
+def stale_targets(
+    targets, manifest, force=False, optimize=False, out_dir=SCRIPT_DIR
+):
+    """{name: input digest} of targets whose inputs or output file changed."""
+    code = code_digest()
+    stale = {}
+    for name, target in targets.items():
+        digest = target.digest(code, target.options(optimize))
+        entry = manifest.get(name, {})
+        if (
+            force
+            or entry.get("input") != digest
+            or entry.get("output") != file_digest(os.path.join(out_dir, name))
+        ):
+            stale[name] = digest
+    return stale
+
+
+def _change(before, after):
+    return f"{100 * (after - before) / before:+.0f}%" if before else "+0%"
+
+
+def build(targets, force=False, jobs=None, optimize=False, out_dir=SCRIPT_DIR):
+    """Render the stale targets across a process pool; report what happened.
+
+    With `optimize`, generators that support it write the optimized form and
+    each rebuilt file's size and element count are compared with the plain
+    render.
+    """
+    start = time.perf_counter()
+    manifest = load_manifest(out_dir)
+    stale = stale_targets(targets, manifest, force, optimize, out_dir)
+    for name in targets:
+        if name not in stale:
+            print(f"  [skip] {name}")
+
+    names = list(stale)
+    todo = [targets[n] for n in names]
+    options = [t.options(optimize) for t in todo]
+    dirs = [out_dir] * len(todo)
+    if len(names) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(render_target, names, todo, options, dirs))
+    else:
+        results = [render_target(*args) for args in zip(names, todo, options, dirs)]
+    totals = [0, 0]
+    for name, output, elapsed, (size, elements), plain in results:
+        manifest[name] = {"input": stale[name], "output": output}
+        note = ""
+        if plain:
+            note = (
+                f", {_change(plain[0], size)} bytes and "
+                f"{_change(plain[1], elements)} elements vs plain"
+            )
+            totals[0] += plain[0]
+            totals[1] += size
+        print(f"  [ok] {name} ({size} bytes{note}, {elapsed * 1000:.1f} ms)")
+
+    known = {n: e for n, e in manifest.items() if n in svgs}
+    if stale or len(known) != len(manifest):
+        save_manifest(known, out_dir)
+    print(
+        f"\nRebuilt {len(stale)}, skipped {len(targets) - len(stale)} of "
+        f"{len(targets)} SVGs in {out_dir} ({time.perf_counter() - start:.2f}s)"
+    )
+    if totals[0]:
+        print(
+            f"Optimized: {totals[1]} bytes instead of {totals[0]} "
+            f"({_change(*totals)})"
+        )
+
+
+# -- Batch --
+LAYOUTS = {
+    "make_svg": write_svg,
+    "make_chat_svg": write_chat_svg,
+    "make_versus_svg": write_versus_svg,
+    "make_receipt_svg": write_receipt_svg,
+    "make_figure_svg": write_figure_svg,
+}
+SPEC_SUFFIXES = (".json", ".yaml", ".yml")
+
+
+def load_spec(path):
+    """Read one JSON or YAML spec into a dict."""
+    with open(path) as f:
+        if path.endswith(".json"):
+            spec = json.load(f)
+        elif yaml is None:
+            raise RuntimeError("PyYAML is not installed; use JSON specs")
+        else:
+            spec = yaml.safe_load(f)
+    if not isinstance(spec, dict):
+        raise ValueError("spec must be a mapping")
+    return spec
+
+
+def spec_target(spec):
+    """(Target, output name or None) for a spec dict."""
+    spec = dict(spec)
+    layout = spec.pop("layout", None)
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {', '.join(LAYOUTS)}, not {layout!r}")
+    output = spec.pop("output", None)
+    if output is not None and (
+        not isinstance(output, str)
+        or os.path.basename(output) != output
+        or output in ("", ".", "..")
+    ):
+        raise ValueError(f"output must be a bare file name, not {output!r}")
+    return Target(LAYOUTS[layout], **spec), output
+
+
+def render_spec(path, out_dir, optimize=False):
+    """Render one spec file; never raises.
+
+    Returns (spec path, output path, error, seconds); `error` is None on
+    success and the output path is None on failure.
+    """
+    start = time.perf_counter()
+    tmp = None
+    try:
+        target, output = spec_target(load_spec(path))
+        name = output or os.path.splitext(os.path.basename(path))[0] + ".svg"
+        out_path = os.path.join(out_dir, name)
+        tmp = f"{out_path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            target.write(f, **target.options(optimize))
+        os.replace(tmp, out_path)
+    except Exception as e:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        return path, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+    return path, out_path, None, time.perf_counter() - start
+
+
+def batch(spec_dir, out_dir=None, jobs=None, optimize=False):
+    """Render every spec in `spec_dir` across a process pool.
+
+    Each file is rendered on its own: a bad spec is reported and the rest
+    still render. Returns the number of failures.
+    """
+    out_dir = out_dir or spec_dir
+    os.makedirs(out_dir, exist_ok=True)
+    paths = sorted(
+        os.path.join(spec_dir, n)
+        for n in os.listdir(spec_dir)
+        if n.endswith(SPEC_SUFFIXES)
     )
+    start = time.perf_counter()
+    args = (paths, [out_dir] * len(paths), [optimize] * len(paths))
+    if len(paths) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunk = max(1, len(paths) // (4 * (jobs or os.cpu_count() or 1)))
+            results = list(pool.map(render_spec, *args, chunksize=chunk))
+    else:
+        results = [render_spec(*a) for a in zip(*args)]
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for path, out_path, error, seconds in results:
+        if error:
+            failed += 1
+            print(f"  [error] {os.path.basename(path)}: {error}")
+        else:
+            print(
+                f"  [ok] {os.path.basename(path)} -> {os.path.basename(out_path)} "
+                f"({seconds * 1000:.1f} ms)"
+            )
+    done = len(paths) - failed
+    rate = done / elapsed if elapsed else 0.0
+    print(
+        f"\nRendered {done} of {len(paths)} specs into {out_dir} in "
+        f"{elapsed:.2f}s ({rate:.1f} files/s), {failed} failed"
+    )
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("names", nargs="*", help="only these SVGs (default: all)")
+    parser.add_argument(
+        "--force", action="store_true", help="rebuild even if nothing changed"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="write optimized SVGs (shared styles, grouped animations)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="list stale SVGs without writing; exit 1 if any",
+    )
+    parser.add_argument(
+        "--specs", metavar="DIR", help="render every JSON/YAML spec in DIR instead"
+    )
+    parser.add_argument(
+        "--out",
+        metavar="DIR",
+        help="output directory (default: --specs DIR, or this script's directory)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.specs:
+        if args.names or args.check:
+            parser.error("--specs renders spec files; drop SVG names and --check")
+        return 1 if batch(args.specs, args.out, args.jobs, args.optimize) else 0
+
+    unknown = sorted(set(args.names) - set(svgs))
+    if unknown:
+        parser.error(f"unknown SVG: {', '.join(unknown)}")
+    targets = {n: t for n, t in svgs.items() if not args.names or n in args.names}
+    out_dir = os.path.abspath(args.out) if args.out else SCRIPT_DIR
+    if args.optimize and out_dir == SCRIPT_DIR:
+        parser.error("--optimize needs --out DIR; the committed SVGs stay plain")
+
+    if args.check:
+        manifest = load_manifest(out_dir)
+        stale = stale_targets(targets, manifest, False, args.optimize, out_dir)
+        for name in stale:
+            print(f"  [stale] {name}")
+        print(f"{len(stale)} of {len(targets)} SVGs out of date")
+        return 1 if stale else 0
+
+    os.makedirs(out_dir, exist_ok=True)
+    build(targets, args.force, args.jobs, args.optimize, out_dir)
+    return 0
 
 
 # -- Session Save --
-session_save = make_svg(
+session_save = Target(
+    write_svg,
     [
         ([("$ ", "#89b4fa"), ("/session-save", "#cdd6f4")], "#cdd6f4"),
         ("", "#1e1e2e"),
@@ -565,7 +1073,8 @@ session_save = make_svg(
 )
 
 # -- Search Memory --
-search_memory = make_svg(
+search_memory = Target(
+    write_svg,
     [
         (
             [
@@ -615,7 +1124,8 @@ search_memory = make_svg(
 )
 
 # -- Directors --
-directors = make_svg(
+directors = Target(
+    write_svg,
     [
         (
             [
@@ -649,7 +1159,8 @@ directors = make_svg(
 )
 
 # -- Orchestrate --
-orchestrate = make_svg(
+orchestrate = Target(
+    write_svg,
     [
         (
             [
@@ -683,7 +1194,8 @@ orchestrate = make_svg(
 )
 
 # -- Research --
-research = make_svg(
+research = Target(
+    write_svg,
     [
         (
             [
@@ -712,7 +1224,8 @@ research = make_svg(
 )
 
 # -- Triangulate --
-triangulate = make_svg(
+triangulate = Target(
+    write_svg,
     [
         (
             [
@@ -747,7 +1260,8 @@ triangulate = make_svg(
 )
 
 # -- Action Items --
-action_items = make_svg(
+action_items = Target(
+    write_svg,
     [
         (
             [("$ ", "#89b4fa"), ("/action-items meeting-notes-feb20.txt", "#cdd6f4")],
@@ -776,7 +1290,8 @@ action_items = make_svg(
 )
 
 # -- Checkup --
-checkup = make_svg(
+checkup = Target(
+    write_svg,
     [
         ([("$ ", "#89b4fa"), ("/checkup --full", "#cdd6f4")], "#cdd6f4"),
         ("", "#1e1e2e"),
@@ -801,7 +1316,8 @@ checkup = make_svg(
 )
 
 # -- Proposal --
-proposal = make_svg(
+proposal = Target(
+    write_svg,
     [
         (
             [
@@ -834,7 +1350,8 @@ proposal = make_svg(
 )
 
 # -- AQAL Review --
-aqal_review = make_svg(
+aqal_review = Target(
+    write_svg,
     [
         ([("$ ", "#89b4fa"), ("/aqal-review", "#cdd6f4")], "#cdd6f4"),
         ("", "#1e1e2e"),
@@ -861,7 +1378,8 @@ aqal_review = make_svg(
 )
 
 # -- Memory Init --
-memory_init = make_svg(
+memory_init = Target(
+    write_svg,
     [
         ([("$ ", "#89b4fa"), ("/memory-init", "#cdd6f4")], "#cdd6f4"),
         ("", "#1e1e2e"),
@@ -891,7 +1409,8 @@ memory_init = make_svg(
 )
 
 # -- Install --
-install = make_svg(
+install = Target(
+    write_svg,
     [
         ([("$ ", "#89b4fa"), ("bash install.sh", "#cdd6f4")], "#cdd6f4"),
         ("", "#1e1e2e"),
@@ -921,7 +1440,8 @@ install = make_svg(
 )
 
 # -- Frameworks --
-frameworks = make_svg(
+frameworks = Target(
+    write_svg,
     [
         (
             [
@@ -958,7 +1478,8 @@ frameworks = make_svg(
 
 
 # -- Insight: Structure > Freedom (VS card) --
-insight_structure = make_versus_svg(
+insight_structure = Target(
+    write_versus_svg,
     left_items=[
         {"text": "free-form notes", "sub": "unnavigable in 2 weeks", "delay": 400},
         {"text": "optional context fields", "sub": "always left empty", "delay": 800},
@@ -978,7 +1499,8 @@ insight_structure = make_versus_svg(
 )
 
 # -- Insight: Operator = Bottleneck --
-insight_bottleneck = make_svg(
+insight_bottleneck = Target(
+    write_svg,
     [
         ([("$ ", "#89b4fa"), ("diagnose --system bottleneck", "#cdd6f4")], "#cdd6f4"),
         ("", "#1e1e2e"),
@@ -1005,7 +1527,8 @@ insight_bottleneck = make_svg(
 )
 
 # -- Insight: Precision, Not Power (receipt) --
-insight_precision = make_receipt_svg(
+insight_precision = Target(
+    write_receipt_svg,
     sections=[
         {
             "title": "APPROACH A: LAUNCH EVERYTHING",
@@ -1039,7 +1562,8 @@ insight_precision = make_receipt_svg(
 
 
 # -- Insight: Memory prevents re-derivation (chat bubbles) --
-insight_memory = make_chat_svg(
+insight_memory = Target(
+    write_chat_svg,
     [
         {
             "user": "You",
@@ -1096,7 +1620,8 @@ insight_memory = make_chat_svg(
 )
 
 # -- Insight: Research Concept Mapping (academic figure) --
-insight_research = make_figure_svg(
+insight_research = Target(
+    write_figure_svg,
     mappings=[
         {
             "left": "progressive disclosure",
@@ -1149,7 +1674,8 @@ insight_research = make_figure_svg(
 
 
 # -- Unstuck --
-unstuck = make_chat_svg(
+unstuck = Target(
+    write_chat_svg,
     [
         {
             "user": "You",
@@ -1206,7 +1732,7 @@ unstuck = make_chat_svg(
     read_pause=5.0,
 )
 
-# Generate all SVGs
+# All SVGs, by output file name
 svgs = {
     "session-save.svg": session_save,
     "search-memory.svg": search_memory,
@@ -1229,10 +1755,5 @@ svgs = {
     "unstuck.svg": unstuck,
 }
 
-for name, svg in svgs.items():
-    path = os.path.join(SCRIPT_DIR, name)
-    with open(path, "w") as f:
-        f.write(svg)
-    print(f"  [ok] {name}")
-
-print(f"\nGenerated {len(svgs)} SVGs in {SCRIPT_DIR}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch spec renderer in generate-svgs.py.
+
+Run: python3 docs/gifs/test_generate_svgs.py
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_generator():
+    """Import generate-svgs.py (its name is not a valid module name)."""
+    path = os.path.join(HERE, "generate-svgs.py")
+    spec = importlib.util.spec_from_file_location("generate_svgs", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+gen = load_generator()
+
+LINES = [["$ ls", "#cdd6f4"], ["done", "#a6e3a1", 400]]
+
+
+class TestRenderSpec(unittest.TestCase):
+    """render_spec() writes only inside the output directory."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.specs = os.path.join(self.root, "specs")
+        self.out = os.path.join(self.root, "out")
+        os.makedirs(self.specs)
+        os.makedirs(self.out)
+
+    def write_spec(self, name, **spec):
+        path = os.path.join(self.specs, name)
+        with open(path, "w") as f:
+            json.dump(dict({"layout": "make_svg", "lines": LINES}, **spec), f)
+        return path
+
+    def test_renders_into_out_dir(self):
+        path = self.write_spec("demo.json", title="demo")
+        _, out_path, error, _ = gen.render_spec(path, self.out)
+        self.assertIsNone(error)
+        self.assertEqual(out_path, os.path.join(self.out, "demo.svg"))
+        with open(out_path) as f:
+            self.assertTrue(f.read().startswith("<svg"))
+
+    def test_named_output(self):
+        path = self.write_spec("demo.json", output="other.svg")
+        _, out_path, error, _ = gen.render_spec(path, self.out)
+        self.assertIsNone(error)
+        self.assertEqual(out_path, os.path.join(self.out, "other.svg"))
+
+    def test_rejects_output_outside_out_dir(self):
+        outputs = [
+            "../escape.svg",
+            "sub/inner.svg",
+            os.path.join(self.root, "abs.svg"),
+            "..",
+            "",
+            7,
+        ]
+        for output in outputs:
+            with self.subTest(output=output):
+                path = self.write_spec("bad.json", output=output)
+                _, out_path, error, _ = gen.render_spec(path, self.out)
+                self.assertIsNone(out_path)
+                self.assertIn("output must be a bare file name", error)
+        self.assertEqual(sorted(os.listdir(self.root)), ["out", "specs"])
+        self.assertEqual(os.listdir(self.out), [])
+
+    def test_batch_counts_bad_output_as_failure(self):
+        self.write_spec("good.json")
+        self.write_spec("bad.json", output="../escape.svg")
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            failed = gen.batch(self.specs, self.out, jobs=1)
+        self.assertEqual(failed, 1)
+        self.assertIn("[error] bad.json", stdout.getvalue())
+        self.assertEqual(os.listdir(self.out), ["good.svg"])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "escape.svg")))
+
+
+class TestCodeDigest(unittest.TestCase):
+    """code_digest() covers the rendering code and nothing below it."""
+
+    def digest_of(self, source):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "generate-svgs.py")
+            with open(path, "w") as f:
+                f.write(source)
+            with mock.patch.object(gen, "__file__", path):
+                return gen.code_digest()
+
+    def test_only_render_code_counts(self):
+        with open(gen.__file__) as f:
+            source = f.read()
+        render, marker, rest = source.partition("\n# -- Build --\n")
+        base = self.digest_of(source)
+        self.assertEqual(base, gen.code_digest())
+        cli = render + marker + rest.replace("def main(", "def main(  ")
+        self.assertEqual(self.digest_of(cli), base)
+        edited = render.replace("def esc(", "def esc(  ") + marker + rest
+        self.assertNotEqual(self.digest_of(edited), base)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -222,8 +222,10 @@ OBS
         echo -e "  ${YELLOW}[exists]${NC} general.observations.md (kept existing)"
     fi
 
-    cp "$SCRIPT_DIR/packs/memory/tests/test_memory_integrity.py" "$MEMORY_DIR/tests/test_memory_integrity.py"
-    echo -e "  ${GREEN}[ok]${NC} test_memory_integrity.py"
+    for f in "$SCRIPT_DIR"/packs/memory/tests/*.py; do
+        cp "$f" "$MEMORY_DIR/tests/$(basename "$f")"
+        echo -e "  ${GREEN}[ok]${NC} $(basename "$f")"
+    done
     echo ""
 fi
 
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Details-context check scales linearly with entry count.
+
+Generates synthetic observations files of growing size, times the one-pass
+splitter against the old per-entry regex search, and fails if the splitter's
+time per entry grows by more than MAX_DRIFT between the smallest and the
+largest file.
+
+Run: python3 ~/.claude/memory/tests/bench_details_context.py [--max-entries N]
+"""
+
+import argparse
+import re
+import sys
+import time
+
+from memory_model import CONTEXT_KEYWORDS, ObservationsFile
+
+MAX_DRIFT = 2.5
+LEGACY_LIMIT = 2000
+
+
+def synthetic_observations(n):
+    """Build an observations file with n Index rows and n Details blocks."""
+    out = [
+        "# Observations - bench",
+        "",
+        "## Index",
+        "| # | Date | Type | Summary | Files |",
+        "|---|------|------|---------|-------|",
+    ]
+    for i in range(1, n + 1):
+        out.append(f"| {i} | 2026-02-20 | decision | Entry {i} | src/mod{i % 50}.py |")
+    out += ["", "## Details", ""]
+    for i in range(1, n + 1):
+        out += [
+            f"### [{i}] 2026-02-20 | decision | Entry {i}",
+            f"**Before:** state {i} before the change",
+            f"**After:** state {i} after the change",
+            f"**Files:** src/mod{i % 50}.py",
+            "**Why:** synthetic rationale line for benchmarking",
+            "",
+        ]
+    return "\n".join(out)
+
+
+def check_onepass(content):
+    obs = ObservationsFile.from_text("bench.observations.md", content, False)
+    return sum(1 for b in obs.details if not b.has_context)
+
+
+def check_legacy(content):
+    """The pre-splitter algorithm: one DOTALL regex search per entry."""
+    missing = 0
+    for num in re.findall(r"### \[(\d+)\][^\n]+", content):
+        block = re.search(rf"### \[{num}\].*?(?=### \[|$)", content, re.DOTALL)
+        if block and not any(kw in block.group() for kw in CONTEXT_KEYWORDS):
+            missing += 1
+    return missing
+
+
+def best_of(fn, arg, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--max-entries", type=int, default=8000)
+    args = parser.parse_args()
+
+    sizes = []
+    n = 500
+    while n <= args.max_entries:
+        sizes.append(n)
+        n *= 2
+
+    print(f"{'entries':>8} {'one-pass ms':>12} {'us/entry':>9} {'legacy ms':>10}")
+    per_entry = []
+    for n in sizes:
+        content = synthetic_observations(n)
+        t = best_of(check_onepass, content)
+        per_entry.append(t / n)
+        legacy = (
+            f"{best_of(check_legacy, content, 1) * 1000:10.1f}"
+            if n <= LEGACY_LIMIT
+            else f"{'-':>10}"
+        )
+        print(f"{n:>8} {t * 1000:12.1f} {t / n * 1e6:9.2f} {legacy}")
+
+    drift = per_entry[-1] / per_entry[0]
+    print(f"\nPer-entry drift {sizes[0]} -> {sizes[-1]}: {drift:.2f}x")
+    if drift > MAX_DRIFT:
+        print(f"FAIL: per-entry cost grew more than {MAX_DRIFT}x (not linear)")
+        return 1
+    print("OK: runtime grows linearly with entry count")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
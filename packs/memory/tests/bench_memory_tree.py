@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness: synthetic memory trees vs. test_memory_integrity.py.
+
+Generates memory trees shaped like packs/memory/templates/ (MEMORY.md, one
+dossier and one observations file per project, memory-config.json), then
+runs the integrity tests against each tree in a child process with HOME
+pointed at it. Every run records wall time and the child's peak RSS, and the
+results are written as JSON so regressions can be tracked across commits.
+
+Run:
+  python3 ~/.claude/memory/tests/bench_memory_tree.py \\
+      --sizes 10x100,100x1000,1000x10000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEST_SCRIPT = os.path.join(HERE, "test_memory_integrity.py")
+TYPES = ("decision", "bugfix", "feature", "discovery", "problem")
+FILES = ("lib/db.ts", "api/routes.ts", "app/page.tsx", "schema.prisma", "worker.py")
+
+DOSSIER = """# {title}
+
+## Status
+Active
+
+## Description
+Synthetic project {n} generated for benchmarking.
+
+## Current State
+- Last session: 2026-02-20
+- Done: benchmark fixture
+- Uncommitted: no
+
+## Unresolved Problems
+(none)
+
+## Decisions Made
+- [2026-02-15] Synthetic decision for project {n}
+
+## Next Steps
+1. Nothing
+
+## Session History
+- [2026-02-20] Generated
+"""
+
+
+def _date(i):
+    return f"2026-{(i // 28) % 12 + 1:02d}-{i % 28 + 1:02d}"
+
+
+def write_observations(path, project, n_obs, details_lines, resolved_ratio, rng):
+    """Stream one observations file to disk without building it in memory."""
+    with open(path, "w") as f:
+        f.write(f"# Observations - {project}\n\n## Index\n")
+        f.write("| # | Date | Type | Summary | Files |\n")
+        f.write("|---|------|------|---------|-------|\n")
+        kinds, resolved = [], []
+        for i in range(1, n_obs + 1):
+            obs_type = TYPES[rng.randrange(len(TYPES))]
+            is_resolved = obs_type == "problem" and rng.random() < resolved_ratio
+            kinds.append(obs_type)
+            resolved.append(is_resolved)
+            marker = "[R] " if is_resolved else ""
+            f.write(
+                f"| {i} | {_date(i)} | {obs_type} | {marker}Synthetic entry {i} "
+                f"| {FILES[i % len(FILES)]} |\n"
+            )
+        f.write("\n## Details\n")
+        filler = "".join(
+            f"Detail line {k} with pasted context for sizing.\n"
+            for k in range(details_lines)
+        )
+        for i, obs_type in enumerate(kinds, 1):
+            f.write(f"\n### [{i}] {_date(i)} | {obs_type} | Synthetic entry {i}\n")
+            if obs_type == "problem":
+                status = "Resolved" if resolved[i - 1] else "Open"
+                f.write(f"**Symptoms:** symptom {i}\n**Status:** {status}\n")
+                if resolved[i - 1]:
+                    f.write(f"**Resolved:** {_date(i)} - fixed\n")
+            else:
+                f.write(f"**Before:** state {i}\n**After:** state {i + 1}\n")
+            f.write(f"**Files:** {FILES[i % len(FILES)]}\n")
+            f.write(filler)
+
+
+def generate_tree(
+    home, projects, observations, details_lines=3, resolved_ratio=0.5, seed=1
+):
+    """Create `{home}/.claude/memory` with the given shape; return its path."""
+    rng = random.Random(seed)
+    memory = os.path.join(home, ".claude", "memory")
+    projects_dir = os.path.join(memory, "projects")
+    os.makedirs(projects_dir, exist_ok=True)
+
+    names = [f"project-{n:04d}" for n in range(projects)]
+    config = {
+        "memory_path": memory,
+        "projects": {
+            name: {"keywords": [name], "path": f"~/projects/{name}"} for name in names
+        },
+        "fallback_project": "general",
+        "max_dossier_lines": 200,
+        "observation_types": list(TYPES),
+    }
+    with open(os.path.join(memory, "memory-config.json"), "w") as f:
+        json.dump(config, f, indent=2)
+
+    table = [
+        "# Memory Index",
+        "",
+        "## Active Projects",
+        "| Project | Dossier | Observations | GitHub |",
+        "|---------|---------|-------------|--------|",
+    ]
+    for n, name in enumerate(names):
+        with open(os.path.join(projects_dir, f"{name}.md"), "w") as f:
+            f.write(DOSSIER.format(title=name, n=n))
+        write_observations(
+            os.path.join(projects_dir, f"{name}.observations.md"),
+            name,
+            observations,
+            details_lines,
+            resolved_ratio,
+            rng,
+        )
+        table.append(
+            f"| {name} | `projects/{name}.md` | "
+            f"`*.observations.md` ({observations} entries) | - |"
+        )
+    with open(os.path.join(memory, "MEMORY.md"), "w") as f:
+        f.write("\n".join(table) + "\n")
+    return memory
+
+
+def run_integrity(home, args=()):
+    """Run the integrity tests with HOME=home; return wall time, RSS, counts."""
+    env = dict(os.environ, HOME=home)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, TEST_SCRIPT, *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    ran = failures = 0
+    for line in stderr.splitlines():
+        if line.startswith("Ran "):
+            ran = int(line.split()[1])
+        elif line.startswith("FAILED"):
+            failures = sum(
+                int(part.split("=")[1])
+                for part in line[line.index("(") + 1 : -1].split(", ")
+            )
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "wall_s": round(wall, 4),
+        "peak_rss_kb": rss_kb,
+        "tests_run": ran,
+        "failures": failures,
+        "exit_code": proc.returncode,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_sizes(text):
+    sizes = []
+    for part in text.split(","):
+        projects, _, observations = part.partition("x")
+        sizes.append((int(projects), int(observations)))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default="10x100,50x1000,100x2000",
+        help="comma-separated PROJECTSxOBSERVATIONS (up to 1000x10000)",
+    )
+    parser.add_argument("--details-lines", type=int, default=3)
+    parser.add_argument("--resolved-ratio", type=float, default=0.5)
+    parser.add_argument("--jobs", type=int, default=1, help="also pass --jobs N")
+    parser.add_argument("--workdir", help="where to generate trees (default: tmp)")
+    parser.add_argument("--keep", action="store_true", help="keep generated trees")
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "runs": [],
+    }
+    for projects, observations in parse_sizes(args.sizes):
+        home = tempfile.mkdtemp(prefix="memory-bench-", dir=args.workdir)
+        try:
+            start = time.perf_counter()
+            memory = generate_tree(
+                home,
+                projects,
+                observations,
+                args.details_lines,
+                args.resolved_ratio,
+            )
+            generate_s = time.perf_counter() - start
+            size = sum(
+                os.path.getsize(os.path.join(root, f))
+                for root, _, files in os.walk(memory)
+                for f in files
+            )
+            params = {
+                "projects": projects,
+                "observations": observations,
+                "details_lines": args.details_lines,
+                "resolved_ratio": args.resolved_ratio,
+                "tree_bytes": size,
+                "generate_s": round(generate_s, 4),
+            }
+            for mode, extra in (
+                ("cold", ["--full"]),
+                ("warm", []),
+            ):
+                if args.jobs != 1:
+                    extra = extra + ["--jobs", str(args.jobs)]
+                run = run_integrity(home, extra)
+                results["runs"].append({**params, "mode": mode, **run})
+                print(
+                    f"{projects}x{observations} {mode:4}: {run['wall_s']:.2f}s, "
+                    f"peak RSS {run['peak_rss_kb'] // 1024} MB",
+                    file=sys.stderr,
+                )
+        finally:
+            if args.keep:
+                print(f"Kept tree at {home}", file=sys.stderr)
+            else:
+                shutil.rmtree(home, ignore_errors=True)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled project router vs. a scan over every keywords array.
+
+Builds a synthetic config (500 projects x 20 keywords = 10,000 keywords by
+default), then routes the same batch of messages and working directories
+through ProjectRouter and through the linear scan the rules describe.
+
+Run: python3 ~/.claude/memory/tests/bench_project_router.py [--projects N]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from memory_config import MemoryConfig
+from project_router import ProjectRouter
+
+WORDS = (
+    "fix update deploy review the dashboard api cache auth token schema "
+    "migration bug test release chart query worker queue invoice report"
+).split()
+
+
+def synthetic_config(n_projects, keywords_per_project, seed=7):
+    rng = random.Random(seed)
+    projects = {}
+    for p in range(n_projects):
+        name = f"proj-{p:04d}"
+        keywords = [f"kw{p}x{k}" for k in range(keywords_per_project - 1)]
+        keywords.append(f"{rng.choice(WORDS)} {name}-alias")
+        projects[name] = {
+            "keywords": keywords,
+            "github": f"user/{name}",
+            "path": f"/work/team{p % 20}/{name}",
+        }
+    return MemoryConfig.from_dict({"projects": projects, "fallback_project": "general"})
+
+
+def synthetic_inputs(config, n, seed=11):
+    rng = random.Random(seed)
+    names = list(config.projects)
+    texts, cwds = [], []
+    for _ in range(n):
+        project = config.projects[rng.choice(names)]
+        words = [rng.choice(WORDS) for _ in range(30)]
+        words.insert(rng.randrange(len(words)), rng.choice(project.keywords))
+        texts.append(" ".join(words))
+        cwds.append(f"{project.path}/src/module{rng.randrange(10)}")
+    return texts, cwds
+
+
+def linear_route(config, text, cwd):
+    """The uncompiled algorithm: scan every project's keywords, then paths."""
+    lowered = f" {text.lower()} "
+    for project in config.projects.values():
+        for keyword in project.keywords:
+            if f" {keyword.lower()} " in lowered:
+                return project.name
+    for project in config.projects.values():
+        if project.path and (cwd == project.path or cwd.startswith(project.path + "/")):
+            return project.name
+    return config.fallback_project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--keywords", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    config = synthetic_config(args.projects, args.keywords)
+    n_keywords = sum(len(p.keywords) for p in config.projects.values())
+    texts, cwds = synthetic_inputs(config, args.messages)
+
+    start = time.perf_counter()
+    router = ProjectRouter(config)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [router.route(t).project for t in texts]
+    compiled_text = time.perf_counter() - start
+    start = time.perf_counter()
+    compiled_cwd = [router.route("", c).project for c in cwds]
+    compiled_path = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear = [linear_route(config, t, "") for t in texts]
+    linear_text = time.perf_counter() - start
+    start = time.perf_counter()
+    linear_cwd = [linear_route(config, "", c) for c in cwds]
+    linear_path = time.perf_counter() - start
+
+    n = len(texts)
+    print(f"Config: {len(config.projects)} projects, {n_keywords} keywords")
+    print(f"Compile: {build * 1000:.1f}ms")
+    print(f"{'':18} {'compiled us':>12} {'linear us':>10} {'speedup':>8}")
+    for label, c, l in (
+        ("route(text)", compiled_text, linear_text),
+        ("route(cwd)", compiled_path, linear_path),
+    ):
+        print(f"{label:18} {c / n * 1e6:12.1f} {l / n * 1e6:10.1f} {l / c:7.1f}x")
+
+    mismatches = sum(a != b for a, b in zip(compiled, linear))
+    mismatches += sum(a != b for a, b in zip(compiled_cwd, linear_cwd))
+    if mismatches:
+        print(f"FAIL: {mismatches} routes differ from the linear scan")
+        return 1
+    print("OK: compiled routes match the linear scan")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
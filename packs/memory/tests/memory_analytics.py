@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Trend analytics over every observation's Index row.
+
+Loads Date, Type and Files of every row (live files, shards and archives)
+into columns: dates as days since 1970-01-01, types as small-int codes,
+files as codes into a path table. Three reports are computed from them:
+
+  weekly   observations per type per ISO week (Monday start)
+  resolve  open and resolved `problem` entries, and the time from a
+           resolved one to its `**Resolved:**` date
+  churn    observations touching each file, and in how many projects
+
+With NumPy installed the aggregates are vectorized group-bys (bincount,
+unique, percentile) over the columns; without it the same numbers come from
+plain-Python counters. Columns are cached per file in
+`{memory}/.index/analytics.idx`, invalidated by mtime and size, so only
+changed files are re-parsed and repeated reports over millions of rows stay
+interactive.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_analytics.py [weekly|resolve|churn|all] \\
+      [--project P] [--since YYYY-MM-DD] [--weeks 12] [--top 10] [--json] \\
+      [--no-numpy]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import statistics
+import sys
+from array import array
+from collections import Counter
+
+from memory_config import load_config
+from memory_index import split_files
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    list_observations,
+    load_index,
+    observation_status,
+    observations_project,
+    save_index,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INDEX_VERSION = 3
+CACHE_FILE = os.path.join(".index", "analytics.idx")
+EPOCH = datetime.date(1970, 1, 1).toordinal()
+# Day 0 (1970-01-01) was a Thursday; +3 puts week boundaries on Mondays.
+WEEK_SHIFT = 3
+NO_DATE = -(2**31)
+RESOLVED_DATE_RE = re.compile(r"\*\*Resolved:\*\*\s*(\d{4}-\d{2}-\d{2})")
+# Codes of the `status` column: observation_status() of each row.
+STATUS_CODES = {None: 0, "open": 1, "resolved": 2}
+OPEN, RESOLVED = STATUS_CODES["open"], STATUS_CODES["resolved"]
+
+
+def to_days(text):
+    """`2026-02-18` -> days since 1970-01-01, or NO_DATE."""
+    try:
+        return datetime.date.fromisoformat(text).toordinal() - EPOCH
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+def from_days(days):
+    return datetime.date.fromordinal(int(days) + EPOCH).isoformat()
+
+
+class Columns:
+    """Row columns of one or more files, as typed arrays.
+
+    `day`, `type`, `status` (a STATUS_CODES value), `resolved` (the day on
+    the `**Resolved:**` line, or NO_DATE) and `project` have one entry per
+    Index row. `touch_row` / `touch_path` have one entry per file listed
+    in a row's Files cell. Codes index `types`, `projects` and `paths`.
+    """
+
+    def __init__(self):
+        self.day = array("i")
+        self.type = array("H")
+        self.status = array("B")
+        self.resolved = array("i")
+        self.project = array("I")
+        self.touch_row = array("I")
+        self.touch_path = array("I")
+
+    @property
+    def rows(self):
+        return len(self.day)
+
+    def extend(self, other, project):
+        """Append one file's columns (a `vars()` dict) for `project`."""
+        offset = self.rows
+        self.day += other["day"]
+        self.type += other["type"]
+        self.status += other["status"]
+        self.resolved += other["resolved"]
+        self.project += array("I", [project]) * len(other["day"])
+        self.touch_row += array("I", (offset + r for r in other["touch_row"]))
+        self.touch_path += other["touch_path"]
+
+
+class Corpus:
+    """Columns of every observations file plus the code tables."""
+
+    def __init__(self, memory_path):
+        self.path = os.path.join(memory_path, CACHE_FILE)
+        self.projects_dir = os.path.join(memory_path, "projects")
+        self.types = []
+        self.paths = []
+        self.projects = []
+        # file name -> {"mtime_ns", "size", "columns": vars(Columns)}
+        self.files = {}
+        self.columns = Columns()
+
+    @classmethod
+    def load(cls, memory_path):
+        """Read the cache, re-parse changed files and merge the columns."""
+        corpus = cls(memory_path)
+        data = load_index(corpus.path, INDEX_VERSION)
+        if data is not None:
+            corpus.types = data["types"]
+            corpus.paths = data["paths"]
+            corpus.files = data["files"]
+
+        names = list_observations(corpus.projects_dir)
+        changed = set(corpus.files) - set(names)
+        for name in changed:  # removed files
+            del corpus.files[name]
+        path_codes = {p: i for i, p in enumerate(corpus.paths)}
+        for name in names:
+            st = os.stat(os.path.join(corpus.projects_dir, name))
+            entry = corpus.files.get(name)
+            fresh = entry and entry["mtime_ns"] == st.st_mtime_ns
+            if fresh and entry["size"] == st.st_size:
+                continue
+            corpus.files[name] = {
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "columns": corpus._parse(name, path_codes),
+            }
+            changed.add(name)
+        if changed:
+            corpus.save()
+
+        project_codes = {}
+        for name in names:
+            project = observations_project(name)
+            if project not in project_codes:
+                project_codes[project] = len(corpus.projects)
+                corpus.projects.append(project)
+            corpus.columns.extend(
+                corpus.files[name]["columns"], project_codes[project]
+            )
+        return corpus
+
+    def _parse(self, name, path_codes):
+        cols = Columns()
+        numbers = {}
+        with ObservationsReader.open(os.path.join(self.projects_dir, name)) as r:
+            for item in r:
+                if not isinstance(item, IndexRow):
+                    pos, row = numbers.get(item.number, (None, None))
+                    if pos is None:
+                        continue
+                    cols.status[pos] = STATUS_CODES[observation_status(row, item)]
+                    m = RESOLVED_DATE_RE.search(item.text or "")
+                    if m:
+                        cols.resolved[pos] = to_days(m.group(1))
+                    continue
+                pos = cols.rows
+                numbers[item.number] = pos, item
+                obs_type = item.type or ""
+                if obs_type not in self.types:
+                    self.types.append(obs_type)
+                cols.day.append(to_days(item.date))
+                cols.type.append(self.types.index(obs_type))
+                cols.status.append(STATUS_CODES[observation_status(item)])
+                cols.resolved.append(NO_DATE)
+                for path in set(split_files(item.files)):
+                    if path not in path_codes:
+                        path_codes[path] = len(self.paths)
+                        self.paths.append(path)
+                    cols.touch_row.append(pos)
+                    cols.touch_path.append(path_codes[path])
+        return vars(cols)
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "types": self.types,
+            "paths": self.paths,
+            "files": self.files,
+        }
+        save_index(self.path, data)
+
+    def code(self, table, value):
+        """Code of `value` in one of the tables, or -1."""
+        values = getattr(self, table)
+        return values.index(value) if value in values else -1
+
+
+def _rows(corpus, project=None, since=None, use_numpy=True):
+    """Selected rows: a boolean mask (NumPy) or a list of row indices."""
+    cols = corpus.columns
+    project_code = corpus.code("projects", project) if project else None
+    since_day = to_days(since) if since else None
+    if use_numpy:
+        keep = np.frombuffer(cols.day, dtype=np.int32) != NO_DATE
+        if project_code is not None:
+            keep &= np.frombuffer(cols.project, dtype=np.uint32) == project_code
+        if since_day is not None:
+            keep &= np.frombuffer(cols.day, dtype=np.int32) >= since_day
+        return keep
+    return [
+        i
+        for i, (day, p) in enumerate(zip(cols.day, cols.project))
+        if day != NO_DATE
+        and (project_code is None or p == project_code)
+        and (since_day is None or day >= since_day)
+    ]
+
+
+def weekly(corpus, rows, weeks=12, use_numpy=True):
+    """{"types", "weeks": [{"week", "counts", "total"}]} for the last weeks."""
+    cols = corpus.columns
+    n_types = len(corpus.types)
+    if use_numpy:
+        day = np.frombuffer(cols.day, dtype=np.int32)[rows].astype(np.int64)
+        obs_type = np.frombuffer(cols.type, dtype=np.uint16)[rows]
+        if not day.size:
+            return {"types": corpus.types, "weeks": []}
+        week = (day + WEEK_SHIFT) // 7
+        last = int(week.max())
+        first = max(int(week.min()), last - weeks + 1)
+        recent = week >= first
+        key = (week[recent] - first) * n_types + obs_type[recent]
+        table = np.bincount(key, minlength=(last - first + 1) * n_types)
+        table = table.reshape(last - first + 1, n_types)
+        counts = {first + i: table[i].tolist() for i in range(len(table))}
+    else:
+        pairs = Counter(
+            ((cols.day[i] + WEEK_SHIFT) // 7, cols.type[i]) for i in rows
+        )
+        if not pairs:
+            return {"types": corpus.types, "weeks": []}
+        last = max(w for w, _ in pairs)
+        first = max(min(w for w, _ in pairs), last - weeks + 1)
+        counts = {w: [0] * n_types for w in range(first, last + 1)}
+        for (w, t), n in pairs.items():
+            if w >= first:
+                counts[w][t] = n
+    return {
+        "types": corpus.types,
+        "weeks": [
+            {
+                "week": from_days(w * 7 - WEEK_SHIFT),
+                "counts": dict(zip(corpus.types, c)),
+                "total": sum(c),
+            }
+            for w, c in sorted(counts.items())
+        ],
+    }
+
+
+def _summary(durations, resolved_count, open_count):
+    summary = {
+        "resolved": resolved_count,
+        "open": open_count,
+        "median_days": None,
+        "mean_days": None,
+        "p90_days": None,
+        "max_days": None,
+    }
+    if durations:
+        ordered = sorted(durations)
+        summary.update(
+            median_days=round(float(statistics.median(ordered)), 1),
+            mean_days=round(statistics.fmean(ordered), 1),
+            p90_days=ordered[int(0.9 * len(ordered))],
+            max_days=ordered[-1],
+        )
+    return summary
+
+
+def resolve_times(corpus, rows, use_numpy=True):
+    """Open and resolved `problem` entries, and days to resolution.
+
+    Open vs resolved is observation_status(); a resolved problem counts
+    toward the durations only when its `**Resolved:**` line has a date.
+    """
+    cols = corpus.columns
+    problem = corpus.code("types", "problem")
+    if use_numpy:
+        day = np.frombuffer(cols.day, dtype=np.int32)[rows].astype(np.int64)
+        resolved = np.frombuffer(cols.resolved, dtype=np.int32)[rows]
+        status = np.frombuffer(cols.status, dtype=np.uint8)[rows]
+        is_problem = np.frombuffer(cols.type, dtype=np.uint16)[rows] == problem
+        done = is_problem & (status == RESOLVED)
+        dated = done & (resolved != NO_DATE)
+        durations = resolved[dated].astype(np.int64) - day[dated]
+        resolved_count = int(done.sum())
+        open_count = int((is_problem & (status == OPEN)).sum())
+        if not durations.size:
+            return _summary([], resolved_count, open_count)
+        return {
+            "resolved": resolved_count,
+            "open": open_count,
+            "median_days": round(float(np.median(durations)), 1),
+            "mean_days": round(float(durations.mean()), 1),
+            "p90_days": int(np.sort(durations)[int(0.9 * durations.size)]),
+            "max_days": int(durations.max()),
+        }
+    durations, resolved_count, open_count = [], 0, 0
+    for i in rows:
+        if cols.type[i] != problem:
+            continue
+        if cols.status[i] == OPEN:
+            open_count += 1
+        elif cols.status[i] == RESOLVED:
+            resolved_count += 1
+            if cols.resolved[i] != NO_DATE:
+                durations.append(cols.resolved[i] - cols.day[i])
+    return _summary(durations, resolved_count, open_count)
+
+
+def churn(corpus, rows, top=10, use_numpy=True):
+    """Most-touched files: observations and distinct projects per path."""
+    cols = corpus.columns
+    if use_numpy:
+        touch_row = np.frombuffer(cols.touch_row, dtype=np.uint32)
+        touch_path = np.frombuffer(cols.touch_path, dtype=np.uint32)
+        selected = rows[touch_row] if touch_row.size else touch_row.astype(bool)
+        paths = touch_path[selected].astype(np.int64)
+        projects = np.frombuffer(cols.project, dtype=np.uint32)[touch_row[selected]]
+        counts = np.bincount(paths, minlength=len(corpus.paths))
+        pairs = np.unique(paths * max(1, len(corpus.projects)) + projects)
+        spread = np.bincount(
+            pairs // max(1, len(corpus.projects)), minlength=len(corpus.paths)
+        )
+        k = min(top, int((counts > 0).sum()))
+        best = np.argpartition(-counts, k - 1)[:k] if k else []
+        ranked = sorted(((int(counts[p]), int(p)) for p in best), reverse=True)
+        ranked = [(n, p, int(spread[p])) for n, p in ranked]
+    else:
+        chosen = set(rows)
+        counts, spread = Counter(), {}
+        for r, p in zip(cols.touch_row, cols.touch_path):
+            if r in chosen:
+                counts[p] += 1
+                spread.setdefault(p, set()).add(cols.project[r])
+        ranked = sorted(((n, p) for p, n in counts.items()), reverse=True)[:top]
+        ranked = [(n, p, len(spread[p])) for n, p in ranked]
+    return [
+        {"file": corpus.paths[p], "observations": n, "projects": k}
+        for n, p, k in ranked
+    ]
+
+
+def build_report(
+    corpus, reports, project=None, since=None, weeks=12, top=10, use_numpy=True
+):
+    """The requested reports over the selected rows.
+
+    NumPy is used when it is installed and `use_numpy` is set.
+    """
+    use_numpy = use_numpy and np is not None
+    rows = _rows(corpus, project, since, use_numpy)
+    count = int(rows.sum()) if use_numpy else len(rows)
+    report = {"rows": count, "numpy": use_numpy}
+    if "weekly" in reports:
+        report["weekly"] = weekly(corpus, rows, weeks, use_numpy)
+    if "resolve" in reports:
+        report["resolve"] = resolve_times(corpus, rows, use_numpy)
+    if "churn" in reports:
+        report["churn"] = churn(corpus, rows, top, use_numpy)
+    return report
+
+
+def format_report(report):
+    engine = "NumPy" if report["numpy"] else "pure Python"
+    out = [f"## Observation analytics ({report['rows']:,} rows, {engine})"]
+    if "weekly" in report:
+        types = report["weekly"]["types"]
+        out += [
+            "",
+            "### Observations per week",
+            "| Week of | " + " | ".join(types) + " | Total |",
+            "|---------|" + "|".join("---" for _ in types) + "|-------|",
+        ]
+        for w in report["weekly"]["weeks"]:
+            cells = " | ".join(str(w["counts"][t]) for t in types)
+            out.append(f"| {w['week']} | {cells} | {w['total']} |")
+    if "resolve" in report:
+        r = report["resolve"]
+        out += [
+            "",
+            "### Time to resolve (problem)",
+            "| Resolved | Open | Median days | Mean days | P90 days | Max days |",
+            "|----------|------|-------------|-----------|----------|----------|",
+            f"| {r['resolved']} | {r['open']} | {r['median_days']} "
+            f"| {r['mean_days']} | {r['p90_days']} | {r['max_days']} |",
+        ]
+    if "churn" in report:
+        out += [
+            "",
+            "### File churn",
+            "| File | Observations | Projects |",
+            "|------|--------------|----------|",
+        ]
+        for c in report["churn"]:
+            out.append(f"| {c['file']} | {c['observations']} | {c['projects']} |")
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Observation trend analytics")
+    parser.add_argument("--memory-path", default=None)
+    parser.add_argument(
+        "report",
+        nargs="?",
+        default="all",
+        choices=("weekly", "resolve", "churn", "all"),
+    )
+    parser.add_argument("--project", help="only this project")
+    parser.add_argument("--since", help="only rows dated YYYY-MM-DD or later")
+    parser.add_argument("--weeks", type=int, default=12, help="weeks to show")
+    parser.add_argument("--top", type=int, default=10, help="files to show")
+    parser.add_argument("--json", action="store_true", help="print JSON instead")
+    parser.add_argument(
+        "--no-numpy", action="store_true", help="use the pure-Python path"
+    )
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+    corpus = Corpus.load(memory_path)
+    reports = ("weekly", "resolve", "churn")
+    if args.report != "all":
+        reports = (args.report,)
+    report = build_report(
+        corpus,
+        reports,
+        args.project,
+        args.since,
+        args.weeks,
+        args.top,
+        use_numpy=not args.no_numpy,
+    )
+    try:
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(format_report(report))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (`| head`) has gone; point stdout at devnull so the
+        # interpreter's final flush does not raise again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
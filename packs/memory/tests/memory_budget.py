@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Token-cost profiler for progressive-disclosure memory loads.
+
+Walks the real memory tree and estimates what each level costs to load:
+
+  Level 0  MEMORY.md + memory-config.json   every session
+  Level 1  projects/{project}.md            on project mention
+  Level 2  Index table rows                 on search
+  Level 3  Details blocks                   on match only
+
+Counts come from a local approximation of a BPE tokenizer (no network, no
+dependencies), good to roughly +-15% on English markdown. The report ranks
+the projects and Details blocks that dominate the budget, replays the
+scenarios from the token-economics table in ARCHITECTURE.md against the
+measured costs, and flags every place a level costs more than twice the
+documented estimate.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_budget.py [--matches 5] [--top 10] [--json]
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import statistics
+import sys
+
+from memory_config import CONFIG_PATH, load_config
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    list_dossiers,
+    list_observations,
+    observations_project,
+)
+from memory_shards import logical_files
+
+# Per-component estimates quoted in ARCHITECTURE.md and docs/token-budget.md.
+DOCUMENTED = {
+    "memory_md": 200,
+    "config": 100,
+    "dossier": 800,
+    "index_row": 40,
+    "details_row": 150,
+}
+# A level is flagged when it measures more than this multiple of its estimate.
+OVER_BUDGET = 2.0
+
+# One match per estimated token: ASCII words split every 4 letters, digits
+# every 3, non-Latin scripts every 2 chars, and each punctuation mark (the
+# pipes and asterisks of markdown) on its own.
+TOKEN_RE = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|[^\W\d_A-Za-z]{1,2}|_+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Approximate BPE token count of `text` in one regex pass."""
+    return len(TOKEN_RE.findall(text)) + text.count("\n\n")
+
+
+def _file_tokens(path):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return estimate_tokens(f.read())
+    except OSError:
+        return 0
+
+
+class ProjectCost:
+    """Measured Level 1-3 costs of one project."""
+
+    def __init__(self, name):
+        self.name = name
+        self.dossier = 0
+        self.index_rows = []
+        # (tokens, number, summary) per Details block
+        self.details = []
+
+    @property
+    def index(self):
+        return sum(self.index_rows)
+
+    @property
+    def details_total(self):
+        return sum(t for t, _, _ in self.details)
+
+    @property
+    def total(self):
+        return self.dossier + self.index + self.details_total
+
+    def as_dict(self):
+        rows = len(self.index_rows)
+        return {
+            "project": self.name,
+            "dossier": self.dossier,
+            "index": self.index,
+            "details": self.details_total,
+            "total": self.total,
+            "rows": rows,
+            "index_per_row": round(self.index / rows, 1) if rows else 0,
+            "details_per_row": (
+                round(self.details_total / len(self.details), 1) if self.details else 0
+            ),
+        }
+
+
+def profile_project(projects_dir, name):
+    cost = ProjectCost(name)
+    cost.dossier = _file_tokens(os.path.join(projects_dir, f"{name}.md"))
+    summaries = {}
+    for file_name in logical_files(projects_dir, name):
+        path = os.path.join(projects_dir, file_name)
+        with ObservationsReader.open(path) as reader:
+            for item in reader:
+                if isinstance(item, IndexRow):
+                    line = (
+                        f"| {item.number} | {item.date} | {item.type} "
+                        f"| {item.summary} | {item.files} |"
+                    )
+                    cost.index_rows.append(estimate_tokens(line))
+                    summaries[item.number] = item.summary
+                else:
+                    summary = summaries.get(item.number, "")
+                    tokens = estimate_tokens(item.text)
+                    cost.details.append((tokens, item.number, summary))
+    return cost
+
+
+def profile_tree(memory_path, config_path=CONFIG_PATH):
+    """Return (level0 dict, {project: ProjectCost})."""
+    projects_dir = os.path.join(memory_path, "projects")
+    level0 = {
+        "memory_md": _file_tokens(os.path.join(memory_path, "MEMORY.md")),
+        "config": _file_tokens(config_path),
+    }
+    names = {f[: -len(".md")] for f in list_dossiers(projects_dir)}
+    names |= {observations_project(f) for f in list_observations(projects_dir)}
+    projects = {name: profile_project(projects_dir, name) for name in sorted(names)}
+    return level0, projects
+
+
+def simulate(level0, projects, matches=5):
+    """Replay the token-economics scenarios on measured costs.
+
+    Each scenario reports the measured cost, what the documented per-unit
+    estimates predict for the same tree, and the no-disclosure baseline.
+    """
+    base = level0["memory_md"] + level0["config"]
+    doc_base = DOCUMENTED["memory_md"] + DOCUMENTED["config"]
+    costs = list(projects.values())
+    rows = sum(len(p.index_rows) for p in costs)
+    everything = base + sum(p.total for p in costs)
+
+    dossiers = [p.dossier for p in costs if p.dossier] or [0]
+    session = base + statistics.median(dossiers)
+    session_worst = base + max(dossiers)
+
+    blocks = [t for p in costs for t, _, _ in p.details]
+    k = min(matches, len(blocks))
+    typical = statistics.mean(blocks) * k if blocks else 0
+    worst = sum(heapq.nlargest(k, blocks))
+    index_all = sum(p.index for p in costs)
+    search = base + index_all + typical
+
+    return [
+        {
+            "scenario": "Session start (1 project, median dossier)",
+            "measured": round(session),
+            "worst_case": session_worst,
+            "documented": doc_base + DOCUMENTED["dossier"],
+            "without_disclosure": round(session),
+        },
+        {
+            "scenario": f"Search all projects, {rows} rows, {k} matches",
+            "measured": round(search),
+            "worst_case": base + index_all + worst,
+            "documented": doc_base
+            + DOCUMENTED["index_row"] * rows
+            + DOCUMENTED["details_row"] * k,
+            "without_disclosure": everything,
+        },
+        {
+            "scenario": "Full scan of all observations",
+            "measured": base + index_all + sum(blocks),
+            "worst_case": base + index_all + sum(blocks),
+            "documented": doc_base
+            + (DOCUMENTED["index_row"] + DOCUMENTED["details_row"]) * rows,
+            "without_disclosure": everything,
+        },
+    ]
+
+
+def warnings(level0, projects):
+    """Places where a level costs more than OVER_BUDGET x its estimate."""
+    out = []
+    for key in ("memory_md", "config"):
+        if level0[key] > DOCUMENTED[key] * OVER_BUDGET:
+            out.append(
+                f"Level 0 {key}: {level0[key]} tokens, "
+                f"documented ~{DOCUMENTED[key]} (loaded every session)"
+            )
+    for p in projects.values():
+        d = p.as_dict()
+        if p.dossier > DOCUMENTED["dossier"] * OVER_BUDGET:
+            out.append(
+                f"Level 1 {p.name}: dossier is {p.dossier} tokens, "
+                f"documented ~{DOCUMENTED['dossier']}"
+            )
+        if d["index_per_row"] > DOCUMENTED["index_row"] * OVER_BUDGET:
+            out.append(
+                f"Level 2 {p.name}: {d['index_per_row']} tokens per Index row, "
+                f"documented ~{DOCUMENTED['index_row']} (long summaries or files)"
+            )
+        if d["details_per_row"] > DOCUMENTED["details_row"] * OVER_BUDGET:
+            out.append(
+                f"Level 3 {p.name}: {d['details_per_row']} tokens per Details "
+                f"block, documented ~{DOCUMENTED['details_row']}"
+            )
+    return out
+
+
+def build_report(memory_path, matches=5, top=10, config_path=CONFIG_PATH):
+    level0, projects = profile_tree(memory_path, config_path)
+    heaviest = heapq.nlargest(
+        top,
+        ((t, p.name, n, s) for p in projects.values() for t, n, s in p.details),
+    )
+    return {
+        "level0": level0,
+        "projects": sorted(
+            (p.as_dict() for p in projects.values()),
+            key=lambda d: d["total"],
+            reverse=True,
+        ),
+        "heaviest_details": [
+            {"project": name, "number": n, "tokens": t, "summary": s}
+            for t, name, n, s in heaviest
+        ],
+        "scenarios": simulate(level0, projects, matches),
+        "warnings": warnings(level0, projects),
+    }
+
+
+def format_report(report, top):
+    l0 = report["level0"]
+    out = [
+        "## Memory token budget",
+        f"Level 0: MEMORY.md {l0['memory_md']} + config {l0['config']} tokens",
+        "",
+        "### Projects by total cost",
+        "| Project | L1 dossier | L2 index | L3 details | Rows | L2/row | L3/row |",
+        "|---------|-----------|----------|------------|------|--------|--------|",
+    ]
+    for d in report["projects"][:top]:
+        out.append(
+            f"| {d['project']} | {d['dossier']} | {d['index']} | {d['details']} "
+            f"| {d['rows']} | {d['index_per_row']} | {d['details_per_row']} |"
+        )
+    if len(report["projects"]) > top:
+        out.append(f"({len(report['projects']) - top} more projects not shown)")
+
+    out += [
+        "",
+        "### Heaviest Details blocks",
+        "| Project | # | Tokens | Summary |",
+        "|---------|---|--------|---------|",
+    ]
+    for d in report["heaviest_details"]:
+        out.append(
+            f"| {d['project']} | {d['number']} | {d['tokens']} | {d['summary']} |"
+        )
+
+    out += [
+        "",
+        "### Scenarios",
+        "| Scenario | Measured | Worst case | Documented | Without disclosure |",
+        "|----------|----------|------------|------------|--------------------|",
+    ]
+    for s in report["scenarios"]:
+        out.append(
+            f"| {s['scenario']} | {s['measured']:,} | {s['worst_case']:,} "
+            f"| {s['documented']:,} | {s['without_disclosure']:,} |"
+        )
+
+    out += ["", "### Over budget"]
+    out += [f"- {w}" for w in report["warnings"]] or ["(none)"]
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory token-cost profiler")
+    parser.add_argument("--memory-path", default=None)
+    parser.add_argument(
+        "--matches", type=int, default=5, help="matches per simulated search"
+    )
+    parser.add_argument("--top", type=int, default=10, help="rows per ranking")
+    parser.add_argument("--json", action="store_true", help="print JSON instead")
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+    config_path = CONFIG_PATH
+    if args.memory_path:
+        # Another tree is priced with its own config, not ~/.claude's.
+        config_path = os.path.join(memory_path, "memory-config.json")
+    report = build_report(memory_path, args.matches, args.top, config_path)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Per-file integrity checks with a content-hash result cache.
+
+Each dossier and observations file is checked on its own and yields a dict of
+{check name: [failure messages]}. Results are cached under
+`{memory}/.index/integrity-cache.json`, keyed on the SHA-256 of the file's
+content and on the config fields the checks depend on, so a re-run only
+parses and re-checks files that actually changed.
+
+Sharded and compacted projects are checked per file as usual, then once per
+project from the cached per-file facts: the live file, shards and archive
+must together hold every number from 1 up exactly once, the manifest must
+match the shard and archive files, the open-problems index (when there is
+one) must list exactly the problems still open, and every up-to-date Details
+offsets sidecar must match its file. The offsets result is cached with the
+file's entry, keyed on the stat of the file and its sidecar, so an
+unchanged pair is not rescanned.
+"""
+
+import hashlib
+import json
+import os
+
+from memory_model import (
+    Dossier,
+    ObservationsFile,
+    is_archive,
+    is_shard,
+    iter_lines,
+    list_dossiers,
+    list_observations,
+    mapped,
+    observation_status,
+    observations_project,
+)
+from memory_offsets import Offsets
+from memory_offsets import verify as verify_offsets
+from memory_problems import PROBLEMS_FILE, OpenProblems
+from memory_shards import MANIFEST_SUFFIX, Manifest, archive_name, row_facts
+
+# Bump when a check changes so stale cached results are discarded.
+CHECKS_VERSION = 5
+CACHE_FILE = os.path.join(".index", "integrity-cache.json")
+
+DOSSIER_SECTIONS = [
+    "## Status",
+    "## Description",
+    "## Current State",
+    "## Session History",
+]
+MAX_LINES = 200
+
+
+def check_dossier(dossier, max_lines=MAX_LINES):
+    """Run every per-file check on a dossier."""
+    return {
+        "sections": [
+            f"{dossier.name} missing section: {section}"
+            for section in DOSSIER_SECTIONS
+            if section not in dossier.content
+        ],
+        "line_count": (
+            [f"{dossier.name} is {dossier.line_count} lines, should be <={max_lines}"]
+            if dossier.line_count > max_lines
+            else []
+        ),
+    }
+
+
+def check_observations(obs, valid_types):
+    """Run every per-file check on an observations file."""
+    name = obs.name
+    index_table = []
+    if not obs.has_index_section:
+        index_table.append(f"{name} missing Index section")
+    if not obs.has_index_header:
+        index_table.append(f"{name} missing Index header")
+
+    # Each file must list its numbers in increasing order without repeats;
+    # an archive is appended to in archiving order, so only repeats count.
+    # Whether they join up into #1..N with the project's shards and archive
+    # is checked by check_project().
+    numbers = obs.numbers
+    expected = sorted(set(numbers))
+    if is_archive(name):
+        numbers = sorted(numbers)
+    details = obs.details_numbers
+    return {
+        "index_table": index_table,
+        "details_section": (
+            [] if obs.has_details_section else [f"{name} missing Details section"]
+        ),
+        "valid_types": [
+            f"{name} has invalid type: {row.type}"
+            for row in obs.rows
+            if row.type is not None and row.type not in valid_types
+        ],
+        "sequential": (
+            [f"{name} numbers not sequential: {numbers}"]
+            if numbers != expected
+            else []
+        ),
+        "index_details": [
+            f"{name}: Index entry #{num} has no matching Details"
+            for num in numbers
+            if num not in details
+        ],
+        "details_context": [
+            f"{name} #{block.number}: Details entry lacks context "
+            f"(Before/After/Context)"
+            for block in obs.details
+            if not block.has_context
+        ],
+    }
+
+
+def check_project(project, files, manifest, indexed=None):
+    """Cross-file checks for one project's logical observations file.
+
+    `files` maps file name -> FileReport for the live file, every shard and
+    the archive. `indexed` is the set of numbers the open-problems index
+    lists for the project, or None when there is no index. Returns
+    {"sequence": [...], "manifest": [...], "open_problems": [...]}.
+    """
+    runs = sorted(
+        (first, last, name)
+        for name, r in files.items()
+        for first, last in r.facts["runs"]
+    )
+    sequence = []
+    expected, previous = 1, None
+    for first, last, name in runs:
+        if first > expected:
+            gap = f"#{expected}"
+            if first - 1 > expected:
+                gap += f"-#{first - 1}"
+            sequence.append(f"{project}: {gap} missing from every file")
+        elif first < expected:
+            sequence.append(
+                f"{project}: #{first}-#{min(last, expected - 1)} in {name} "
+                f"also appear in {previous}"
+            )
+        if last + 1 > expected:
+            expected, previous = last + 1, name
+
+    listed = {s["file"]: s for s in manifest.shards}
+    problems = []
+    for name in sorted(n for n in files if is_shard(n)):
+        facts = files[name].facts
+        entry = listed.pop(name, None)
+        if entry is None:
+            problems.append(f"{name} is missing from {project}'s shard manifest")
+            continue
+        for key in ("first", "last", "rows", "date_from", "date_to"):
+            if entry.get(key) != facts.get(key):
+                problems.append(
+                    f"{project} manifest says {name} {key}={entry.get(key)}, "
+                    f"file has {facts.get(key)}"
+                )
+    problems += [
+        f"{project} manifest lists {name}, which does not exist" for name in listed
+    ]
+
+    archive = files.get(archive_name(project))
+    if archive is not None:
+        recorded = manifest.archive or {}
+        for key in ("rows", "last"):
+            if recorded.get(key) != archive.facts[key]:
+                problems.append(
+                    f"{project} manifest says archive {key}={recorded.get(key)}, "
+                    f"file has {archive.facts[key]}"
+                )
+    elif manifest.archive:
+        problems.append(
+            f"{project} manifest lists {manifest.archive['file']}, "
+            f"which does not exist"
+        )
+
+    open_problems = []
+    if indexed is not None:
+        actual = {n for r in files.values() for n in r.facts["open"]}
+        open_problems += [
+            f"{project} #{n}: open but missing from the open-problems index"
+            for n in sorted(actual - indexed)
+        ]
+        open_problems += [
+            f"{project} #{n}: in the open-problems index but not open"
+            for n in sorted(indexed - actual)
+        ]
+    return {
+        "sequence": sequence,
+        "manifest": problems,
+        "open_problems": open_problems,
+    }
+
+
+def config_fingerprint(valid_types, max_lines=MAX_LINES):
+    """Hash of the config fields the per-file checks depend on."""
+    key = json.dumps(
+        {
+            "checks": CHECKS_VERSION,
+            "observation_types": sorted(valid_types),
+            "max_dossier_lines": max_lines,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class CheckCache:
+    """Cached per-file results, invalidated by content hash and config."""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, memory_path, fingerprint):
+        cache = cls(os.path.join(memory_path, CACHE_FILE), fingerprint)
+        try:
+            with open(cache.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if data.get("fingerprint") == fingerprint:
+            cache.entries = data.get("files", {})
+        return cache
+
+    def get(self, name, digest):
+        entry = self.entries.get(name)
+        if entry is not None and entry["hash"] == digest:
+            return entry
+        return None
+
+    def put(self, name, digest, results, facts):
+        self.entries[name] = {"hash": digest, "results": results, "facts": facts}
+        self.dirty = True
+
+    def offsets(self, name, stamp):
+        """Cached offsets problems of `name` at `stamp`, or None."""
+        entry = self.entries.get(name)
+        if entry is not None and entry.get("offsets_stamp") == stamp:
+            return entry["offsets"]
+        return None
+
+    def put_offsets(self, name, stamp, problems):
+        entry = self.entries.get(name)
+        if entry is not None:
+            entry["offsets_stamp"], entry["offsets"] = stamp, problems
+            self.dirty = True
+
+    def prune(self, names):
+        stale = set(self.entries) - set(names)
+        for name in stale:
+            del self.entries[name]
+        self.dirty = self.dirty or bool(stale)
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "files": self.entries}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class FileReport:
+    """Check results and cross-file facts for one file."""
+
+    def __init__(self, name, results, facts, cached):
+        self.name = name
+        self.results = results
+        self.facts = facts
+        self.cached = cached
+
+
+class IntegrityReport:
+    """MEMORY.md content plus per-file results for the whole memory tree."""
+
+    def __init__(self, base):
+        self.base = base
+        self.memory_md_path = os.path.join(base, "MEMORY.md")
+        self.projects_dir = os.path.join(base, "projects")
+        self.memory_md = None
+        self.dossiers = {}
+        self.observations = {}
+        # project -> FileReport holding check_project() results
+        self.projects = {}
+        # CheckCache the report was built with; refresh_report() updates it.
+        self.cache = None
+
+    def project_files(self, project):
+        """FileReports of one project's live file and shards."""
+        return {
+            name: r
+            for name, r in self.observations.items()
+            if observations_project(name) == project
+        }
+
+    def observation_rows(self, project):
+        """Rows in a project's live file and shards; None when it has no file.
+
+        Compacted entries in the archive are not counted.
+        """
+        files = self.project_files(project)
+        if not files:
+            return None
+        return sum(
+            r.facts["rows"] for name, r in files.items() if not is_archive(name)
+        )
+
+    @property
+    def checked(self):
+        return [
+            r.name
+            for r in list(self.dossiers.values()) + list(self.observations.values())
+            if not r.cached
+        ]
+
+    @property
+    def cached(self):
+        return [
+            r.name
+            for r in list(self.dossiers.values()) + list(self.observations.values())
+            if r.cached
+        ]
+
+
+def _run_dossier(name, buf, valid_types, max_lines):
+    text = bytes(buf).decode("utf-8", errors="replace")
+    return check_dossier(Dossier(name, text), max_lines), {}
+
+
+def _run_observations(name, buf, valid_types, max_lines):
+    obs = ObservationsFile(name, iter_lines(buf), keep_text=False)
+    facts = row_facts(obs.rows)
+    blocks = obs.details_by_number()
+    facts["open"] = [
+        row.number
+        for row in obs.rows
+        if observation_status(row, blocks.get(row.number)) == "open"
+    ]
+    return check_observations(obs, valid_types), facts
+
+
+_CHECKS = {"dossier": _run_dossier, "observations": _run_observations}
+
+
+def check_file(task):
+    """Hash and, if it changed, check one file.
+
+    `task` is (kind, path, name, cached_digest, valid_types, max_lines).
+    Returns (name, digest, results, facts); results and facts are None when
+    the digest matches the cached one. The file is memory-mapped once for
+    both the hash and the streaming parse. Top-level so a process pool can
+    run it.
+    """
+    kind, path, name, cached_digest, valid_types, max_lines = task
+    with mapped(path) as buf:
+        digest = hashlib.sha256(buf).hexdigest()
+        if digest == cached_digest:
+            return name, digest, None, None
+        results, facts = _CHECKS[kind](name, buf, valid_types, max_lines)
+    return name, digest, results, facts
+
+
+def _map_tasks(tasks, jobs):
+    if jobs <= 1 or len(tasks) <= 1:
+        return [check_file(t) for t in tasks]
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(jobs, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(check_file, tasks, chunksize=chunksize))
+
+
+def _task(kind, report, name, valid_types, max_lines):
+    entry = report.cache.entries.get(name)
+    return (
+        kind,
+        os.path.join(report.projects_dir, name),
+        name,
+        entry["hash"] if entry else None,
+        valid_types,
+        max_lines,
+    )
+
+
+def _check_files(report, tasks, jobs=1):
+    """Run `tasks` and store each FileReport in the report."""
+    cache = report.cache
+    for task, (name, digest, results, facts) in zip(tasks, _map_tasks(tasks, jobs)):
+        if results is None:
+            entry = cache.get(name, digest)
+            file_report = FileReport(
+                name, entry["results"], entry["facts"], cached=True
+            )
+        else:
+            cache.put(name, digest, results, facts)
+            file_report = FileReport(name, results, facts, cached=False)
+        if task[0] == "dossier":
+            report.dossiers[name] = file_report
+        else:
+            report.observations[name] = file_report
+
+
+def _check_projects(report, projects):
+    """(Re)run check_project() for `projects`; drop those with no files."""
+    open_problems = OpenProblems.load(report.base)
+    for project in sorted(projects):
+        files = report.project_files(project)
+        if not files:
+            report.projects.pop(project, None)
+            continue
+        manifest = Manifest.load(report.projects_dir, project)
+        indexed = None
+        if open_problems.exists:
+            indexed = set(open_problems.projects.get(project, {}))
+        results = check_project(project, files, manifest, indexed)
+        results["offsets"] = [
+            m for name in sorted(files) for m in _verify_offsets(report, name)
+        ]
+        report.projects[project] = FileReport(project, results, {}, cached=False)
+
+
+def _stat_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return [None, None]
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _verify_offsets(report, name):
+    """verify_offsets() for one file, cached on its and its sidecar's stat."""
+    offsets = Offsets(report.base, name)
+    stamp = _stat_stamp(offsets.path) + _stat_stamp(offsets.sidecar)
+    problems = report.cache.offsets(name, stamp)
+    if problems is None:
+        problems = verify_offsets(report.base, name)
+        report.cache.put_offsets(name, stamp, problems)
+    return problems
+
+
+def _save_cache(report):
+    report.cache.prune(list(report.dossiers) + list(report.observations))
+    try:
+        report.cache.save()
+    except OSError:
+        pass
+
+
+def _read_memory_md(report):
+    report.memory_md = None
+    if os.path.exists(report.memory_md_path):
+        with open(report.memory_md_path) as f:
+            report.memory_md = f.read()
+
+
+def build_report(base, valid_types, max_lines=MAX_LINES, full=False, jobs=1):
+    """Check every file under `base`.
+
+    Cached results are reused for unchanged files unless `full` is set, in
+    which case every file is re-checked and the cache is rewritten. With
+    `jobs` > 1 files are hashed and checked across a process pool; results
+    are merged by file name, so the report is the same for any `jobs`.
+    """
+    report = IntegrityReport(base)
+    _read_memory_md(report)
+
+    fingerprint = config_fingerprint(valid_types, max_lines)
+    if full:
+        report.cache = CheckCache(os.path.join(base, CACHE_FILE), fingerprint)
+    else:
+        report.cache = CheckCache.load(base, fingerprint)
+
+    projects_dir = report.projects_dir
+    tasks = [
+        _task(kind, report, name, valid_types, max_lines)
+        for kind, names in (
+            ("dossier", list_dossiers(projects_dir)),
+            ("observations", list_observations(projects_dir)),
+        )
+        for name in names
+    ]
+    _check_files(report, tasks, jobs)
+    _check_projects(report, {observations_project(n) for n in report.observations})
+    _save_cache(report)
+    return report
+
+
+def refresh_report(report, changed, valid_types, max_lines=MAX_LINES):
+    """Re-check only what `changed` affects; return the kinds of data touched.
+
+    `changed` holds paths relative to the memory base (`MEMORY.md`,
+    `projects/x.observations.md`, ...). Changed files are re-hashed and
+    re-parsed, deleted ones dropped, and the project-level checks re-run for
+    the projects they belong to. The returned set names what changed:
+    "memory_md", "dossier", "observations" and/or "project".
+    """
+    kinds, projects, tasks = set(), set(), []
+    for path in sorted(changed):
+        head, name = os.path.split(path)
+        if path == "MEMORY.md":
+            _read_memory_md(report)
+            kinds.add("memory_md")
+        elif path == PROBLEMS_FILE:
+            projects.update(report.projects)
+        elif head != "projects":
+            continue
+        elif name.endswith(MANIFEST_SUFFIX):
+            projects.add(name[: -len(MANIFEST_SUFFIX)])
+        elif name.endswith(".md"):
+            project = observations_project(name)
+            kind = "observations" if project else "dossier"
+            reports = report.observations if project else report.dossiers
+            kinds.add(kind)
+            if project:
+                projects.add(project)
+            if os.path.exists(os.path.join(report.projects_dir, name)):
+                tasks.append(_task(kind, report, name, valid_types, max_lines))
+            else:
+                reports.pop(name, None)
+    if tasks:
+        _check_files(report, tasks)
+    if projects:
+        _check_projects(report, projects)
+        kinds.add("project")
+    _save_cache(report)
+    return kinds
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Compaction of resolved and aged observations into a per-project archive.
+
+An observation is archived when its type is in `archive_types` (config,
+default problem and bugfix), it is not an open problem, and it is either
+resolved or older than `archive_after_days` (default 90). Its Index row and
+Details block move, unchanged, to `{project}.observations.archive.md`. The
+live Index keeps a single stub line pointing at the archive, so the hot
+Index only holds what is still worth scanning.
+
+Each source file is streamed once into a temp file that replaces it; only
+the selected rows and blocks are held in memory. They are appended to the
+archive as one more `## Index` / `## Details` pair, so the archive is never
+re-read or rewritten, and stay retrievable by number with
+`memory_offsets.py show`.
+
+Shards are compacted too. Numbers are never reused: the manifest records
+the archive's highest number for the writer. MEMORY.md's `(N entries)` count
+for the project is rewritten to the rows left in the live file and shards.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_compact.py compact [PROJECT ...] \\
+      [--types problem,bugfix] [--older-than DAYS] [--no-stub] [--dry-run]
+"""
+
+import argparse
+import datetime
+import os
+import re
+import shutil
+import sys
+
+from memory_config import load_config
+from memory_model import (
+    DETAILS_RE,
+    INDEX_HEADER,
+    ROW_RE,
+    IndexRow,
+    ObservationsReader,
+    list_observations,
+    observation_status,
+    observations_project,
+)
+from memory_export import discard_export
+from memory_offsets import Offsets
+from memory_problems import locked
+from memory_shards import (
+    Manifest,
+    archive_name,
+    list_shards,
+    live_name,
+    shard_entry,
+    summarize,
+)
+from memory_writer import TailCache, project_lock
+
+STUB_PREFIX = "> Archived:"
+ARCHIVE_HEADER = "# Observations archive - {project}\n"
+
+
+def select(path, types, cutoff):
+    """Numbers in one file that should be archived."""
+    rows, statuses = {}, {}
+    with ObservationsReader.open(path) as reader:
+        for item in reader:
+            if isinstance(item, IndexRow):
+                rows[item.number] = item
+                statuses[item.number] = observation_status(item)
+            elif item.number in rows:
+                statuses[item.number] = observation_status(rows[item.number], item)
+    chosen = set()
+    for number, row in rows.items():
+        status = statuses[number]
+        if row.type not in types or status == "open":
+            continue
+        if status == "resolved" or (row.date and row.date < cutoff):
+            chosen.add(number)
+    return chosen
+
+
+def _replace(path, text):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.exists(path):
+        shutil.copymode(path, tmp)
+    os.replace(tmp, path)
+
+
+def strip_file(path, chosen, stub=None):
+    """Copy a file to a temp file without `chosen` rows and blocks.
+
+    An existing stub line is dropped, and `stub` (if given) is written just
+    before `## Details`. Return (temp path, removed rows, removed blocks);
+    the rows and blocks map numbers to raw text, and the caller renames the
+    temp file over `path` once they are safe in the archive.
+    """
+    tmp = f"{path}.tmp.{os.getpid()}"
+    rows, blocks = {}, {}
+    section, current, after_stub = None, None, False
+    with open(path, encoding="utf-8") as src, open(
+        tmp, "w", encoding="utf-8"
+    ) as dst:
+        for line in src:
+            stripped = line.rstrip("\n")
+            # The blank line after an old stub goes with it.
+            if after_stub and not stripped.strip():
+                after_stub = False
+                continue
+            after_stub = False
+            if stripped.startswith("## "):
+                section, current = stripped[3:].strip().lower(), None
+                if section == "details" and stub:
+                    dst.write(stub + "\n\n")
+            elif section == "index":
+                if stripped.startswith(STUB_PREFIX):
+                    after_stub = True
+                    continue
+                m = ROW_RE.match(stripped)
+                if m and int(m.group(1)) in chosen:
+                    rows.setdefault(int(m.group(1)), stripped)
+                    continue
+            elif section == "details":
+                m = DETAILS_RE.match(stripped)
+                if m:
+                    number = int(m.group(1))
+                    current = number if number in chosen else None
+                    if current is not None:
+                        blocks.setdefault(current, [])
+                if current is not None:
+                    blocks[current].append(stripped)
+                    continue
+            dst.write(line)
+        dst.flush()
+        os.fsync(dst.fileno())
+    shutil.copymode(path, tmp)
+    return tmp, rows, {n: "\n".join(lines).rstrip() for n, lines in blocks.items()}
+
+
+def _has_stub(path):
+    """Whether the Index of `path` already holds a stub line."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(STUB_PREFIX):
+                return True
+            if line.startswith("## Details"):
+                return False
+    return False
+
+
+def append_archive(memory_path, project, rows, blocks):
+    """Append `rows` and `blocks` to the archive as one Index/Details segment.
+
+    Numbers the archive already holds (left by an interrupted run) are
+    skipped; the archive's offsets sidecar tells which, and is extended
+    with the new blocks. Return the numbers appended.
+    """
+    name = archive_name(project)
+    path = os.path.join(memory_path, "projects", name)
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(ARCHIVE_HEADER.format(project=project))
+    offsets = Offsets.load(memory_path, name)
+    numbers = sorted((set(rows) | set(blocks)) - set(offsets.blocks))
+    if not numbers:
+        return []
+    parts = [
+        "\n## Index\n",
+        INDEX_HEADER + "\n",
+        "|---|------|------|---------|-------|\n",
+    ]
+    parts += [rows[n] + "\n" for n in numbers if n in rows]
+    parts.append("\n## Details\n")
+    parts += ["\n" + blocks[n] + "\n" for n in numbers if n in blocks]
+    data = "".join(parts).encode()
+    with open(path, "ab") as f:
+        base = f.tell()
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    offsets.extend(data, base)
+    return numbers
+
+
+def update_memory_md(memory_path, project, count):
+    """Rewrite the `(N entries)` count of `project` in MEMORY.md."""
+    path = os.path.join(memory_path, "MEMORY.md")
+    # Same shape TestObservationCounts reads.
+    pattern = re.compile(
+        r"(`projects/" + re.escape(project) + r"\.md`[^|]*\|\s*[^|]*\()(\d+)(\s*entr)"
+    )
+    with locked(memory_path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return False
+        updated = pattern.sub(lambda m: f"{m.group(1)}{count}{m.group(3)}", content)
+        if updated != content:
+            _replace(path, updated)
+    return updated != content
+
+
+def compact_project(
+    memory_path, project, types, older_than_days, stub=True, dry_run=False
+):
+    """Archive one project's eligible observations; return how many moved."""
+    projects_dir = os.path.join(memory_path, "projects")
+    cutoff = (
+        datetime.date.today() - datetime.timedelta(days=older_than_days)
+    ).isoformat()
+    live = os.path.join(projects_dir, live_name(project))
+
+    with project_lock(memory_path, project):
+        names = list_shards(projects_dir, project)
+        if os.path.exists(live):
+            names.append(live_name(project))
+        plan = {}
+        for name in names:
+            chosen = select(os.path.join(projects_dir, name), types, cutoff)
+            if chosen:
+                plan[name] = chosen
+        moved = sum(len(c) for c in plan.values())
+        if dry_run or not moved:
+            return moved
+
+        live_stub = None
+        if stub:
+            live_stub = (
+                f"{STUB_PREFIX} older observations are in `{archive_name(project)}`. "
+                f"Look one up with `memory_offsets.py show {project} N`."
+            )
+        # Strip every source into a temp file and append what was removed
+        # to the archive before renaming any of them: an interrupted run
+        # leaves entries in both places, never in neither, and the next run
+        # strips them without archiving them twice.
+        stripped, removed_rows, removed_blocks = [], {}, {}
+        for name, chosen in plan.items():
+            path = os.path.join(projects_dir, name)
+            tmp, rows, blocks = strip_file(
+                path, chosen, live_stub if name == live_name(project) else None
+            )
+            stripped.append((tmp, path))
+            removed_rows.update(rows)
+            removed_blocks.update(blocks)
+        appended = append_archive(memory_path, project, removed_rows, removed_blocks)
+        for tmp, path in stripped:
+            os.replace(tmp, path)
+        in_plan = live_name(project) in plan
+        if live_stub and not in_plan and os.path.exists(live) and not _has_stub(live):
+            tmp, _, _ = strip_file(live, set(), live_stub)
+            os.replace(tmp, live)
+
+        manifest = Manifest.load(projects_dir, project)
+        shards = []
+        for entry in manifest.shards:
+            path = os.path.join(projects_dir, entry["file"])
+            if entry["file"] in plan:
+                info = summarize(path)
+                if not info["rows"]:
+                    os.remove(path)
+                    continue
+                entry = shard_entry(entry["file"], info)
+            shards.append(entry)
+        manifest.shards = shards
+        archive = manifest.archive
+        if archive is None:
+            info = summarize(os.path.join(projects_dir, archive_name(project)))
+            archive = {"rows": info["rows"], "last": info["last"]}
+        else:
+            archive = {
+                "rows": archive["rows"] + len(appended),
+                "last": max([archive["last"] or 0] + appended) or None,
+            }
+        manifest.archive = dict(file=archive_name(project), **archive)
+        manifest.save()
+        TailCache(memory_path).drop(project)
+        discard_export(memory_path)
+
+        hot = sum(s["rows"] for s in manifest.shards)
+        if os.path.exists(live):
+            hot += summarize(live)["rows"]
+        update_memory_md(memory_path, project, hot)
+    return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive old observations")
+    parser.add_argument("--memory-path", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    comp = sub.add_parser("compact", help="move eligible observations to archive")
+    comp.add_argument("projects", nargs="*", help="default: every project")
+    comp.add_argument("--types", help="comma-separated (config: archive_types)")
+    comp.add_argument(
+        "--older-than", type=int, help="age in days (config: archive_after_days)"
+    )
+    comp.add_argument("--no-stub", action="store_true", help="no stub in the Index")
+    comp.add_argument("--dry-run", action="store_true", help="only count")
+    args = parser.parse_args(argv)
+
+    if args.memory_path:
+        # Another tree is compacted by its own config, not ~/.claude's.
+        memory_path = args.memory_path
+        config = load_config(os.path.join(memory_path, "memory-config.json"))
+    else:
+        config = load_config()
+        memory_path = config.memory_path
+    projects_dir = os.path.join(memory_path, "projects")
+
+    types = args.types.split(",") if args.types else config.archive_types
+    days = args.older_than
+    if days is None:
+        days = config.archive_after_days
+    projects = args.projects or sorted(
+        {observations_project(n) for n in list_observations(projects_dir)}
+    )
+    verb = "Would archive" if args.dry_run else "Archived"
+    for project in projects:
+        moved = compact_project(
+            memory_path, project, types, days, not args.no_stub, args.dry_run
+        )
+        print(f"{verb} {moved} observations from {project}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
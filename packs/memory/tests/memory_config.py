@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Typed, cached loader for `memory-config.json`.
+
+`load_config()` parses and validates the config once and caches it on the
+file's (mtime, size); later calls in the same process cost one stat. The
+integrity tests and every memory tool share it instead of opening the JSON
+themselves. A keyword -> project map (keywords, project names and GitHub
+repo names) is precomputed at load time; project_router.py compiles it and
+answers input that is exactly one keyword with a dict lookup.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+CONFIG_PATH = os.path.expanduser("~/.claude/memory/memory-config.json")
+
+DEFAULT_MEMORY_PATH = "~/.claude/memory"
+DEFAULT_FALLBACK_PROJECT = "general"
+DEFAULT_MAX_DOSSIER_LINES = 200
+DEFAULT_OBSERVATION_TYPES = ("decision", "bugfix", "feature", "discovery", "problem")
+# Rows after which the live observations file rolls over into a shard; 0 = off.
+DEFAULT_SHARD_ROWS = 0
+# Compaction: types that may be archived, and the age at which they are.
+DEFAULT_ARCHIVE_TYPES = ("problem", "bugfix")
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+
+# One entry of the `projects` map. `path` is expanded; `github` and `path`
+# are None when absent.
+Project = namedtuple("Project", "name keywords github path")
+
+
+class ConfigError(ValueError):
+    """memory-config.json is present but malformed."""
+
+
+class MemoryConfig:
+    """Validated view of memory-config.json."""
+
+    def __init__(
+        self,
+        memory_path=DEFAULT_MEMORY_PATH,
+        projects=None,
+        fallback_project=DEFAULT_FALLBACK_PROJECT,
+        max_dossier_lines=DEFAULT_MAX_DOSSIER_LINES,
+        observation_types=DEFAULT_OBSERVATION_TYPES,
+        shard_rows=DEFAULT_SHARD_ROWS,
+        archive_types=DEFAULT_ARCHIVE_TYPES,
+        archive_after_days=DEFAULT_ARCHIVE_AFTER_DAYS,
+    ):
+        self.memory_path = os.path.expanduser(memory_path)
+        self.projects = projects or {}
+        self.fallback_project = fallback_project
+        self.max_dossier_lines = max_dossier_lines
+        self.observation_types = tuple(observation_types)
+        self.shard_rows = shard_rows
+        self.archive_types = tuple(archive_types)
+        self.archive_after_days = archive_after_days
+        self.keyword_map = {}
+        for project in self.projects.values():
+            keywords = (project.name,) + project.keywords
+            if project.github:
+                keywords += (project.github.rsplit("/", 1)[-1],)
+            for keyword in keywords:
+                # First project to claim a keyword wins, matching config order.
+                if keyword:
+                    self.keyword_map.setdefault(keyword.lower(), project.name)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Validate a parsed config dict; raise ConfigError on bad fields."""
+        if not isinstance(data, dict):
+            raise ConfigError("config must be a JSON object")
+        memory_path = _field(data, "memory_path", str, DEFAULT_MEMORY_PATH)
+        fallback = _field(data, "fallback_project", str, DEFAULT_FALLBACK_PROJECT)
+        max_lines = _field(data, "max_dossier_lines", int, DEFAULT_MAX_DOSSIER_LINES)
+        if isinstance(max_lines, bool) or max_lines <= 0:
+            raise ConfigError("max_dossier_lines must be a positive integer")
+        types = _field(data, "observation_types", list, DEFAULT_OBSERVATION_TYPES)
+        if not types or not all(isinstance(t, str) and t for t in types):
+            raise ConfigError("observation_types must be a non-empty list of strings")
+        shard_rows = _field(data, "observations_shard_rows", int, DEFAULT_SHARD_ROWS)
+        if isinstance(shard_rows, bool) or shard_rows < 0:
+            raise ConfigError("observations_shard_rows must be a non-negative integer")
+        archive_types = _field(data, "archive_types", list, DEFAULT_ARCHIVE_TYPES)
+        if not all(isinstance(t, str) and t for t in archive_types):
+            raise ConfigError("archive_types must be a list of strings")
+        archive_days = _field(
+            data, "archive_after_days", int, DEFAULT_ARCHIVE_AFTER_DAYS
+        )
+        if isinstance(archive_days, bool) or archive_days < 0:
+            raise ConfigError("archive_after_days must be a non-negative integer")
+
+        raw_projects = _field(data, "projects", dict, {})
+        projects = {}
+        for name, spec in raw_projects.items():
+            if not isinstance(spec, dict):
+                raise ConfigError(f"projects.{name} must be an object")
+            keywords = spec.get("keywords", [])
+            if not isinstance(keywords, list) or not all(
+                isinstance(k, str) for k in keywords
+            ):
+                raise ConfigError(f"projects.{name}.keywords must be a list of strings")
+            for key in ("github", "path"):
+                if spec.get(key) is not None and not isinstance(spec[key], str):
+                    raise ConfigError(f"projects.{name}.{key} must be a string")
+            path = spec.get("path")
+            projects[name] = Project(
+                name,
+                tuple(keywords),
+                spec.get("github"),
+                os.path.expanduser(path) if path else None,
+            )
+        return cls(
+            memory_path,
+            projects,
+            fallback,
+            max_lines,
+            types,
+            shard_rows,
+            archive_types,
+            archive_days,
+        )
+
+    def project_for_keyword(self, keyword):
+        """Return the project that owns `keyword` (case-insensitive), or None."""
+        return self.keyword_map.get(keyword.lower())
+
+
+def _field(data, key, kind, default):
+    value = data.get(key, default)
+    if not isinstance(value, kind) and value is not default:
+        raise ConfigError(f"{key} must be of type {kind.__name__}")
+    return value
+
+
+_cache = {}
+
+
+def load_config(path=CONFIG_PATH):
+    """Return the MemoryConfig for `path`, re-parsing only when it changed.
+
+    A missing config yields the defaults; a malformed one raises ConfigError.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _cache.pop(path, None)
+        return MemoryConfig()
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except ValueError as e:
+        raise ConfigError(f"{path} is not valid JSON: {e}") from e
+    config = MemoryConfig.from_dict(data)
+    _cache[path] = (key, config)
+    return config
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate observations across projects, by MinHash and LSH.
+
+Each observation's Summary and Details (field labels dropped, words stemmed
+as in memory_search.py) are cut into word-bigram shingles. A MinHash
+signature of NUM_PERM 16-bit values estimates the Jaccard similarity of two
+shingle sets as the share of equal values. Locality-sensitive hashing splits
+every signature into BANDS bands of ROWS values; only observations sharing
+at least one whole band are compared, so the cost grows with the number of
+observations rather than with its square. With BANDS=32 and ROWS=4, pairs
+at similarity 0.6 become candidates about 99% of the time, pairs at 0.2
+about 5% of the time. Candidates at or above `--threshold` are joined into
+clusters. A band value shared by more than MAX_BUCKET observations (usually
+boilerplate text) says little about similarity, so that bucket is skipped
+and the number skipped is reported.
+
+Signatures are cached in `{memory}/.index/minhash.idx`, keyed on a digest
+of each observation's text: unchanged files are not re-read, and in changed
+files only new or edited observations are hashed. With NumPy installed the
+hashing is vectorized. Archives are skipped; they hold history that is no
+longer edited.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_dupes.py [--threshold 0.6] \\
+      [--cross-project] [--top 20] [--json] [--rebuild] [--no-numpy]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import zlib
+from array import array
+
+from memory_config import load_config
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    is_archive,
+    list_observations,
+    load_index,
+    observations_project,
+    save_index,
+)
+from memory_search import FIELD_RE, analyze
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INDEX_VERSION = 1
+CACHE_FILE = os.path.join(".index", "minhash.idx")
+SHINGLE = 2
+BANDS = 32
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+# Universal hashing (a*x + b) mod PRIME with x, a, b < PRIME = 2**31 - 1:
+# the intermediate stays below 2**63, so the NumPy path is exact in uint64.
+PRIME = (1 << 31) - 1
+_rng = random.Random(20260218)
+PERM_A = [_rng.randrange(1, PRIME) for _ in range(NUM_PERM)]
+PERM_B = [_rng.randrange(0, PRIME) for _ in range(NUM_PERM)]
+# Buckets larger than this are skipped rather than compared pairwise.
+MAX_BUCKET = 50
+NUMPY_BATCH = 32768
+
+
+def shingles(text):
+    """Hashes (crc32 mod PRIME) of every run of SHINGLE consecutive terms."""
+    terms = analyze(FIELD_RE.sub(" ", text))
+    if len(terms) < SHINGLE:
+        runs = [" ".join(terms)] if terms else []
+    else:
+        runs = [" ".join(terms[i : i + SHINGLE]) for i in range(len(terms) - 1)]
+    return sorted({zlib.crc32(run.encode()) % PRIME for run in runs})
+
+
+def signature(hashes):
+    """MinHash signature of one shingle set, as bytes."""
+    sig = array("H")
+    for a, b in zip(PERM_A, PERM_B):
+        sig.append(min([(a * x + b) % PRIME for x in hashes]) & 0xFFFF)
+    return sig.tobytes()
+
+
+def signatures_numpy(shingle_sets):
+    """signature() of many non-empty shingle sets at once.
+
+    Sets are hashed in batches of about NUMPY_BATCH shingles, which bounds
+    the NUM_PERM x batch matrix of hash values to a few tens of MB.
+    """
+    a = np.array(PERM_A, dtype=np.uint64)[:, None]
+    b = np.array(PERM_B, dtype=np.uint64)[:, None]
+    out, batch, size = [], [], 0
+    for i, hashes in enumerate(shingle_sets):
+        batch.append(hashes)
+        size += len(hashes)
+        if size < NUMPY_BATCH and i + 1 < len(shingle_sets):
+            continue
+        x = np.fromiter((h for s in batch for h in s), dtype=np.uint64, count=size)
+        starts = np.cumsum([0] + [len(s) for s in batch[:-1]])
+        values = (a * x[None, :] + b) % np.uint64(PRIME)
+        mins = np.minimum.reduceat(values, starts, axis=1) & np.uint64(0xFFFF)
+        out.extend(row.tobytes() for row in mins.T.astype(np.uint16))
+        batch, size = [], 0
+    return out
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: the share of equal signature values."""
+    a, b = array("H", sig_a), array("H", sig_b)
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def observation_texts(path):
+    """(number, date, type, summary, text) per observation in a file."""
+    rows, out = {}, []
+    with ObservationsReader.open(path) as reader:
+        for item in reader:
+            if isinstance(item, IndexRow):
+                rows[item.number] = item
+                continue
+            row = rows.pop(item.number, None)
+            if row is not None:
+                body = (item.text or "").partition("\n")[2].strip()
+                out.append((row.number, row.date, row.type, row.summary, body))
+    for row in rows.values():
+        out.append((row.number, row.date, row.type, row.summary, ""))
+    return out
+
+
+class Signatures:
+    """Cached MinHash signatures of every observation outside the archives."""
+
+    def __init__(self, memory_path):
+        self.path = os.path.join(memory_path, CACHE_FILE)
+        self.projects_dir = os.path.join(memory_path, "projects")
+        # file name -> {"mtime_ns", "size",
+        #               "rows": [(number, date, type, summary, digest)]}
+        self.files = {}
+        # text digest -> signature bytes (b"" when the text has no terms)
+        self.sigs = {}
+        self.hashed = 0
+
+    @classmethod
+    def load(cls, memory_path, rebuild=False, use_numpy=True):
+        """Read the cache, re-read changed files and hash new texts."""
+        index = cls(memory_path)
+        data = None if rebuild else load_index(index.path, INDEX_VERSION)
+        if data is not None:
+            index.files, index.sigs = data["files"], data["sigs"]
+
+        names = [
+            n for n in list_observations(index.projects_dir) if not is_archive(n)
+        ]
+        changed = bool(set(index.files) - set(names))
+        index.files = {n: e for n, e in index.files.items() if n in names}
+        pending = {}
+        for name in names:
+            st = os.stat(os.path.join(index.projects_dir, name))
+            entry = index.files.get(name)
+            fresh = entry and entry["mtime_ns"] == st.st_mtime_ns
+            if fresh and entry["size"] == st.st_size:
+                continue
+            rows = []
+            path = os.path.join(index.projects_dir, name)
+            for number, date, obs_type, summary, body in observation_texts(path):
+                text = f"{summary}\n{body}"
+                digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+                rows.append((number, date, obs_type, summary, digest))
+                if digest not in index.sigs:
+                    pending[digest] = text
+            index.files[name] = {
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "rows": rows,
+            }
+            changed = True
+        if pending:
+            index._hash(pending, use_numpy)
+        if changed:
+            used = {r[4] for e in index.files.values() for r in e["rows"]}
+            index.sigs = {d: s for d, s in index.sigs.items() if d in used}
+            index.save()
+        return index
+
+    def _hash(self, pending, use_numpy):
+        digests = list(pending)
+        sets = [shingles(pending[d]) for d in digests]
+        self.hashed = len(digests)
+        for digest, hashes in zip(digests, sets):
+            if not hashes:
+                self.sigs[digest] = b""
+        full = [(d, s) for d, s in zip(digests, sets) if s]
+        if use_numpy and np is not None:
+            sigs = signatures_numpy([s for _, s in full])
+        else:
+            sigs = [signature(s) for _, s in full]
+        for (digest, _), sig in zip(full, sigs):
+            self.sigs[digest] = sig
+
+    def save(self):
+        data = {"version": INDEX_VERSION, "files": self.files, "sigs": self.sigs}
+        save_index(self.path, data)
+
+    def entries(self):
+        """(project, number, date, type, summary, signature) with terms."""
+        for name in sorted(self.files):
+            project = observations_project(name)
+            for number, date, obs_type, summary, digest in self.files[name]["rows"]:
+                sig = self.sigs.get(digest)
+                if sig:
+                    yield project, number, date, obs_type, summary, sig
+
+
+def candidate_pairs(sigs):
+    """Index pairs (i < j) sharing a band, and how many buckets were skipped.
+
+    Buckets with more than MAX_BUCKET members are skipped; their members
+    still pair up through any other band they share.
+    """
+    pairs, skipped = set(), 0
+    width = ROWS * 2  # bytes per band
+    for band in range(BANDS):
+        lo = band * width
+        buckets = {}
+        for i, sig in enumerate(sigs):
+            buckets.setdefault(sig[lo : lo + width], []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET:
+                skipped += 1
+                continue
+            pairs.update(
+                (members[x], members[y])
+                for x in range(len(members))
+                for y in range(x + 1, len(members))
+            )
+    return pairs, skipped
+
+
+def find_clusters(entries, threshold=0.6, cross_project=False):
+    """(clusters of near-duplicates, most similar first; buckets skipped).
+
+    Each cluster is {"similarity": best pair, "members": [...]}, where every
+    member carries its best similarity to another member. With
+    `cross_project`, clusters within a single project are dropped.
+    """
+    entries = list(entries)
+    sigs = [e[5] for e in entries]
+    parent = list(range(len(entries)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best = {}
+    pairs, skipped = candidate_pairs(sigs)
+    for i, j in pairs:
+        score = similarity(sigs[i], sigs[j])
+        if score < threshold:
+            continue
+        best[i] = max(best.get(i, 0.0), score)
+        best[j] = max(best.get(j, 0.0), score)
+        parent[find(i)] = find(j)
+
+    groups = {}
+    for i in best:
+        groups.setdefault(find(i), []).append(i)
+    clusters = []
+    for members in groups.values():
+        if cross_project and len({entries[i][0] for i in members}) < 2:
+            continue
+        members.sort(key=lambda i: (-best[i], entries[i][0], entries[i][1]))
+        clusters.append(
+            {
+                "similarity": round(best[members[0]], 3),
+                "members": [
+                    {
+                        "project": entries[i][0],
+                        "number": entries[i][1],
+                        "date": entries[i][2],
+                        "type": entries[i][3],
+                        "summary": entries[i][4],
+                        "similarity": round(best[i], 3),
+                    }
+                    for i in members
+                ],
+            }
+        )
+    clusters.sort(key=lambda c: (-c["similarity"], -len(c["members"])))
+    return clusters, skipped
+
+
+def format_clusters(clusters, threshold, top, skipped=0):
+    """Render clusters as markdown tables."""
+    total = sum(len(c["members"]) for c in clusters)
+    out = [
+        "## Near-duplicate observations",
+        f"Found {len(clusters)} clusters ({total} observations) "
+        f"at similarity >= {threshold:.2f}",
+    ]
+    if skipped:
+        out.append(
+            f"Skipped {skipped} LSH buckets with more than {MAX_BUCKET} members"
+        )
+    for n, cluster in enumerate(clusters[:top], 1):
+        out += [
+            "",
+            f"### Cluster {n} ({len(cluster['members'])} observations, "
+            f"best {cluster['similarity']:.2f})",
+            "| Similarity | Project | # | Date | Type | Summary |",
+            "|------------|---------|---|------|------|---------|",
+        ]
+        out += [
+            f"| {m['similarity']:.2f} | {m['project']} | {m['number']} "
+            f"| {m['date']} | {m['type']} | {m['summary']} |"
+            for m in cluster["members"]
+        ]
+    if len(clusters) > top:
+        out += ["", f"({len(clusters) - top} more clusters; raise --top to see them)"]
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Near-duplicate observations")
+    parser.add_argument("--memory-path", default=None)
+    parser.add_argument(
+        "--threshold", type=float, default=0.6, help="minimum similarity (0-1)"
+    )
+    parser.add_argument(
+        "--cross-project",
+        action="store_true",
+        help="only clusters spanning several projects",
+    )
+    parser.add_argument("--top", type=int, default=20, help="clusters to show")
+    parser.add_argument("--json", action="store_true", help="print JSON instead")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the cache")
+    parser.add_argument(
+        "--no-numpy", action="store_true", help="use the pure-Python path"
+    )
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+    index = Signatures.load(memory_path, args.rebuild, use_numpy=not args.no_numpy)
+    clusters, skipped = find_clusters(
+        index.entries(), args.threshold, args.cross_project
+    )
+    try:
+        if args.json:
+            data = {"clusters": clusters[: args.top], "skipped_buckets": skipped}
+            print(json.dumps(data, indent=2))
+        else:
+            print(format_clusters(clusters, args.threshold, args.top, skipped))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (`| head`) has gone; point stdout at devnull so the
+        # interpreter's final flush does not raise again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Columnar export of every observations Index table (stdlib only).
+
+The file is a magic header followed by self-contained segments. Each segment
+stores its rows column by column:
+
+  project    u16 codes into the segment's project dictionary
+  number     u32
+  date       i32 days since 1970-01-01 (NO_DATE when unparseable)
+  type       u16 codes into the segment's type dictionary
+  summary    u32 offsets into one UTF-8 blob
+  files      u32 offsets into a flat u32 list of file-dictionary codes
+
+`--append` adds a segment holding only rows newer than the highest number
+already exported for each project, so the existing bytes are never rewritten.
+It cannot see edits to rows already exported, so `memory_writer.py resolve`
+and `memory_compact.py`, which rewrite rows in place, remove the default
+export with discard_export(); the next `--append` then writes it in full.
+`ColumnarReader.select()` filters by project, type and date range straight
+from the columns, without parsing markdown.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_export.py export [--append] [--output PATH]
+  python3 ~/.claude/memory/tests/memory_export.py query --type decision \
+      --since 2026-02-01 --until 2026-02-28
+"""
+
+import argparse
+import datetime
+import json
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from memory_config import load_config
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    is_shard,
+    list_observations,
+    observations_project,
+)
+from memory_shards import Manifest
+
+MAGIC = b"MIOBSCOL"
+VERSION = 1
+EXPORT_FILE = os.path.join(".index", "observations.col")
+EPOCH = datetime.date(1970, 1, 1).toordinal()
+NO_DATE = -(2**31)
+
+ExportRow = namedtuple("ExportRow", "project number date type summary files")
+
+
+def date_to_days(text):
+    try:
+        return datetime.date.fromisoformat(text).toordinal() - EPOCH
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+def days_to_date(days):
+    if days == NO_DATE:
+        return ""
+    return datetime.date.fromordinal(days + EPOCH).isoformat()
+
+
+def _split_files(cell):
+    return [f.strip() for f in cell.split(",") if f.strip() and f.strip() != "-"]
+
+
+def _le(arr):
+    """Return `arr` in little-endian byte order for a portable file."""
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+def _pack_strings(strings):
+    blob = b"".join(s.encode() + b"\0" for s in strings)
+    return struct.pack("<II", len(strings), len(blob)) + blob
+
+
+def _unpack_strings(buf, pos):
+    count, size = struct.unpack_from("<II", buf, pos)
+    pos += 8
+    items = bytes(buf[pos : pos + size]).split(b"\0")[:count]
+    return [s.decode() for s in items], pos + size
+
+
+def _pack_array(arr):
+    return struct.pack("<cI", arr.typecode.encode(), len(arr)) + _le(arr).tobytes()
+
+
+def _unpack_array(buf, pos):
+    typecode, count = struct.unpack_from("<cI", buf, pos)
+    pos += 5
+    arr = array(typecode.decode())
+    size = count * arr.itemsize
+    arr.frombytes(buf[pos : pos + size])
+    return _le(arr), pos + size
+
+
+def encode_segment(rows):
+    """Encode ExportRow objects (date as ISO text) into one segment."""
+    projects, types, files = {}, {}, {}
+    project_col, number_col = array("H"), array("I")
+    date_col, type_col = array("i"), array("H")
+    summary_offsets, summary_blob = array("I", [0]), bytearray()
+    file_offsets, file_codes = array("I", [0]), array("I")
+    for row in rows:
+        project_col.append(projects.setdefault(row.project, len(projects)))
+        number_col.append(row.number)
+        date_col.append(date_to_days(row.date))
+        type_col.append(types.setdefault(row.type or "", len(types)))
+        summary_blob += row.summary.encode()
+        summary_offsets.append(len(summary_blob))
+        for f in row.files:
+            file_codes.append(files.setdefault(f, len(files)))
+        file_offsets.append(len(file_codes))
+    body = b"".join(
+        [
+            struct.pack("<I", len(number_col)),
+            _pack_strings(list(projects)),
+            _pack_strings(list(types)),
+            _pack_strings(list(files)),
+            _pack_array(project_col),
+            _pack_array(number_col),
+            _pack_array(date_col),
+            _pack_array(type_col),
+            _pack_array(summary_offsets),
+            struct.pack("<I", len(summary_blob)),
+            bytes(summary_blob),
+            _pack_array(file_offsets),
+            _pack_array(file_codes),
+        ]
+    )
+    return struct.pack("<I", len(body)) + body
+
+
+class Segment:
+    """Decoded columns of one segment."""
+
+    def __init__(self, buf):
+        (self.n_rows,) = struct.unpack_from("<I", buf, 0)
+        pos = 4
+        self.projects, pos = _unpack_strings(buf, pos)
+        self.types, pos = _unpack_strings(buf, pos)
+        self.file_names, pos = _unpack_strings(buf, pos)
+        self.project, pos = _unpack_array(buf, pos)
+        self.number, pos = _unpack_array(buf, pos)
+        self.date, pos = _unpack_array(buf, pos)
+        self.type, pos = _unpack_array(buf, pos)
+        self.summary_offsets, pos = _unpack_array(buf, pos)
+        (size,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+        self.summary_blob = bytes(buf[pos : pos + size])
+        pos += size
+        self.file_offsets, pos = _unpack_array(buf, pos)
+        self.file_codes, pos = _unpack_array(buf, pos)
+
+    def row(self, i):
+        so, fo = self.summary_offsets, self.file_offsets
+        return ExportRow(
+            self.projects[self.project[i]],
+            self.number[i],
+            days_to_date(self.date[i]),
+            self.types[self.type[i]] or None,
+            self.summary_blob[so[i] : so[i + 1]].decode(),
+            [self.file_names[c] for c in self.file_codes[fo[i] : fo[i + 1]]],
+        )
+
+    def select(self, project=None, types=None, date_from=None, date_to=None):
+        """Yield row indices that pass every filter, checked on the codes."""
+        indices = range(self.n_rows)
+        if project is not None:
+            if project not in self.projects:
+                return
+            code = self.projects.index(project)
+            indices = [i for i in indices if self.project[i] == code]
+        if types:
+            codes = {self.types.index(t) for t in types if t in self.types}
+            if not codes:
+                return
+            indices = [i for i in indices if self.type[i] in codes]
+        if date_from is not None or date_to is not None:
+            lo = date_to_days(date_from) if date_from else NO_DATE + 1
+            hi = date_to_days(date_to) if date_to else 2**31 - 1
+            dates = self.date
+            indices = [i for i in indices if lo <= dates[i] <= hi]
+        yield from indices
+
+
+class ColumnarReader:
+    """Read an export file and return filtered row sets."""
+
+    def __init__(self, path):
+        self.path = path
+        self.segments = []
+        with open(path, "rb") as f:
+            buf = f.read()
+        if buf[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an observations export")
+        (version,) = struct.unpack_from("<H", buf, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported version {version}")
+        pos = len(MAGIC) + 2
+        view = memoryview(buf)
+        while pos < len(buf):
+            (size,) = struct.unpack_from("<I", buf, pos)
+            pos += 4
+            self.segments.append(Segment(view[pos : pos + size]))
+            pos += size
+
+    def __len__(self):
+        return sum(s.n_rows for s in self.segments)
+
+    def select(self, project=None, types=None, date_from=None, date_to=None):
+        """Return ExportRow objects matching every given filter.
+
+        `date_from` and `date_to` are inclusive ISO dates.
+        """
+        return [
+            seg.row(i)
+            for seg in self.segments
+            for i in seg.select(project, types, date_from, date_to)
+        ]
+
+    def max_numbers(self):
+        """Highest exported observation number per project."""
+        out = {}
+        for seg in self.segments:
+            for code, number in zip(seg.project, seg.number):
+                name = seg.projects[code]
+                if number > out.get(name, 0):
+                    out[name] = number
+        return out
+
+
+def collect_rows(memory_path, after=None):
+    """Index rows of every observations file, skipping numbers in `after`.
+
+    Shards whose manifest range is already at or below a project's floor are
+    skipped unopened, so an `--append` run reads only the newest shard.
+    """
+    after = after or {}
+    projects_dir = os.path.join(memory_path, "projects")
+    rows, done = [], {}
+    for name in list_observations(projects_dir):
+        project = observations_project(name)
+        floor = after.get(project, 0)
+        if floor and is_shard(name):
+            if project not in done:
+                manifest = Manifest.load(projects_dir, project)
+                done[project] = {
+                    s["file"] for s in manifest.shards if s["last"] <= floor
+                }
+            if name in done[project]:
+                continue
+        path = os.path.join(projects_dir, name)
+        with ObservationsReader.open(path, keep_text=False) as reader:
+            for item in reader:
+                if not isinstance(item, IndexRow):
+                    break
+                if item.number > floor:
+                    rows.append(
+                        ExportRow(
+                            project,
+                            item.number,
+                            item.date,
+                            item.type,
+                            item.summary,
+                            _split_files(item.files),
+                        )
+                    )
+    return rows
+
+
+def discard_export(memory_path):
+    """Remove the default export after rows were rewritten in place."""
+    try:
+        os.remove(os.path.join(memory_path, EXPORT_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def export(memory_path, output, append=False):
+    """Write (or append to) the export; return the number of rows written."""
+    if append and os.path.exists(output):
+        rows = collect_rows(memory_path, ColumnarReader(output).max_numbers())
+        if rows:
+            with open(output, "ab") as f:
+                f.write(encode_segment(rows))
+        return len(rows)
+
+    rows = collect_rows(memory_path)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tmp = f"{output}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<H", VERSION))
+        f.write(encode_segment(rows))
+    os.replace(tmp, output)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar observations export")
+    parser.add_argument("--memory-path", default=None)
+    parser.add_argument("--output", default=None, help="export file path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="export every Index table")
+    exp.add_argument("--append", action="store_true", help="add only new rows")
+    query = sub.add_parser("query", help="print rows matching the filters")
+    query.add_argument("--project")
+    query.add_argument("--type", action="append", dest="types")
+    query.add_argument("--since", help="first date, inclusive (YYYY-MM-DD)")
+    query.add_argument("--until", help="last date, inclusive (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+    output = args.output or os.path.join(memory_path, EXPORT_FILE)
+
+    if args.command == "export":
+        written = export(memory_path, output, append=args.append)
+        mode = "Appended" if args.append else "Exported"
+        print(f"{mode} {written} rows to {output}")
+        return 0
+
+    reader = ColumnarReader(output)
+    for row in reader.select(args.project, args.types, args.since, args.until):
+        print(json.dumps(row._asdict()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
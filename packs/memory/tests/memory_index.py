@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk index of observations for /search-memory.
+
+Holds, per observations file, the parsed Index rows plus postings for free
+text (Summary + Details), type, date, file path and open/resolved status.
+Each file is invalidated by its mtime and size, so a refresh only re-parses
+files that changed; unchanged files cost one stat. Free text drops stop
+words and matches any row with a word starting with one of the remaining
+terms, ranking rows that hit more terms first. Shards of a sharded
+project are indexed separately, so only the live file and the shards that
+`resolve` or compaction rewrote are re-read, and `date:` queries skip shards
+outside the range.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_index.py build [--rebuild]
+  python3 ~/.claude/memory/tests/memory_index.py query "type:decision file:auth.ts"
+"""
+
+import argparse
+import os
+import re
+import shlex
+import sys
+import time
+from bisect import bisect_left
+
+from memory_config import load_config
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    list_observations,
+    load_index,
+    observation_status,
+    observations_project,
+    save_index,
+)
+
+INDEX_VERSION = 3
+INDEX_DIR = ".index"
+INDEX_FILE = "observations.idx"
+DEFAULT_LIMIT = 20
+FILTER_KEYS = ("type", "project", "file", "date", "status")
+
+TOKEN_RE = re.compile(r"\w+")
+# Dropped from free text, so a question reads like its keywords.
+STOP_WORDS = frozenset(
+    "a about an and any are as at be but by can did do does for from has have "
+    "how i in is it its know me of on or our should that the there this to us "
+    "was we were what when where which who why will with".split()
+)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def split_files(cell):
+    """Split a Files cell (`a.ts, lib/*`) into individual paths."""
+    return [f.strip() for f in cell.split(",") if f.strip() and f.strip() != "-"]
+
+
+class ProjectIndex:
+    """Rows and postings for one observations file.
+
+    Postings map a key to a sorted list of row positions in `rows`; `vocab`
+    is the sorted list of terms, for prefix lookups.
+    """
+
+    def __init__(self, project, mtime_ns, size):
+        self.project = project
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.rows = []
+        self.terms = {}
+        self.vocab = []
+        self.types = {}
+        self.dates = {}
+        self.files = {}
+        self.status = {}
+        self.date_from = self.date_to = ""
+
+    @classmethod
+    def build(cls, project, path):
+        """Index one file from the streaming reader.
+
+        Rows come first (Index), then Details blocks; each block's terms are
+        posted to its row as it streams past, so only one block is held in
+        memory at a time.
+        """
+        st = os.stat(path)
+        idx = cls(project, st.st_mtime_ns, st.st_size)
+        rows, statuses, positions, terms = [], [], {}, {}
+        with ObservationsReader.open(path) as reader:
+            for item in reader:
+                if isinstance(item, IndexRow):
+                    positions[item.number] = len(rows)
+                    rows.append(item)
+                    statuses.append(observation_status(item))
+                    text = item.summary
+                else:
+                    pos = positions.get(item.number)
+                    if pos is None:
+                        continue
+                    statuses[pos] = observation_status(rows[pos], item)
+                    text = item.text
+                pos = positions[item.number]
+                for term in tokenize(text):
+                    terms.setdefault(term, set()).add(pos)
+
+        idx.terms = {term: sorted(ps) for term, ps in terms.items()}
+        idx.vocab = sorted(idx.terms)
+        for pos, (row, status) in enumerate(zip(rows, statuses)):
+            files = split_files(row.files)
+            idx.rows.append(
+                (row.number, row.date, row.type, row.summary, files, status)
+            )
+            idx.types.setdefault(row.type, []).append(pos)
+            idx.dates.setdefault(row.date, []).append(pos)
+            for f in set(files):
+                idx.files.setdefault(f, []).append(pos)
+            if status:
+                idx.status.setdefault(status, []).append(pos)
+        if idx.dates:
+            idx.date_from, idx.date_to = min(idx.dates), max(idx.dates)
+        return idx
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        idx = cls.__new__(cls)
+        idx.__dict__.update(data)
+        return idx
+
+    def is_fresh(self, st):
+        return self.mtime_ns == st.st_mtime_ns and self.size == st.st_size
+
+    def covers(self, date_prefix):
+        """Whether any row could be dated with `date_prefix`."""
+        n = len(date_prefix)
+        return self.date_from[:n] <= date_prefix <= self.date_to[:n]
+
+    def expand(self, term):
+        """Return the positions of rows with a word starting with `term`."""
+        positions = set()
+        i = bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            positions.update(self.terms[self.vocab[i]])
+            i += 1
+        return positions
+
+    def match(self, query):
+        """Return {row position: terms hit} for rows matching `query`.
+
+        Filters are ANDed; free-text terms are ORed, each matching any word
+        it prefixes, and a row must hit at least one of them.
+        """
+        if query.date and not self.covers(query.date):
+            return {}
+        candidates = None
+
+        def narrow(positions):
+            nonlocal candidates
+            s = set(positions)
+            candidates = s if candidates is None else candidates & s
+
+        if query.type:
+            narrow(self.types.get(query.type, ()))
+        if query.status:
+            narrow(self.status.get(query.status, ()))
+        if query.date:
+            narrow(
+                p
+                for d, ps in self.dates.items()
+                if d.startswith(query.date)
+                for p in ps
+            )
+        if query.file:
+            needle = query.file.lower()
+            narrow(
+                p for f, ps in self.files.items() if needle in f.lower() for p in ps
+            )
+        if not query.terms:
+            if candidates is None:
+                candidates = range(len(self.rows))
+            return dict.fromkeys(candidates, 0)
+        hits = {}
+        for term in query.terms:
+            positions = self.expand(term)
+            if candidates is not None:
+                positions &= candidates
+            for pos in positions:
+                hits[pos] = hits.get(pos, 0) + 1
+        return hits
+
+
+class Query:
+    """A parsed `/search-memory` query: `key:value` filters plus free text.
+
+    Stop words are dropped from the free text. `project:` keeps its case,
+    since it names a file; the other filters are lower-cased.
+    """
+
+    def __init__(self, text):
+        self.type = self.project = self.file = self.date = self.status = None
+        self.terms = []
+        try:
+            parts = shlex.split(text)
+        except ValueError:
+            parts = text.split()
+        for part in parts:
+            key, sep, value = part.partition(":")
+            if sep and key in FILTER_KEYS and value:
+                keep_case = key in ("file", "project")
+                setattr(self, key, value if keep_case else value.lower())
+            else:
+                for term in tokenize(part):
+                    if term not in STOP_WORDS and term not in self.terms:
+                        self.terms.append(term)
+
+
+class MemoryIndex:
+    """Per-file indexes, persisted as one pickle under `{memory}/.index/`.
+
+    `files` maps an observations file name (live file or shard) to its
+    ProjectIndex.
+    """
+
+    def __init__(self, memory_path):
+        self.memory_path = memory_path
+        self.projects_dir = os.path.join(memory_path, "projects")
+        self.path = os.path.join(memory_path, INDEX_DIR, INDEX_FILE)
+        self.files = {}
+
+    @property
+    def projects(self):
+        return sorted({idx.project for idx in self.files.values()})
+
+    @classmethod
+    def open(cls, memory_path, rebuild=False):
+        index = cls(memory_path)
+        data = None if rebuild else load_index(index.path, INDEX_VERSION)
+        if data is not None:
+            index.files = {
+                name: ProjectIndex.from_dict(p) for name, p in data["files"].items()
+            }
+        return index
+
+    def refresh(self):
+        """Re-index changed observation files; return (reindexed, removed)."""
+        reindexed, seen = [], set()
+        for name in list_observations(self.projects_dir):
+            seen.add(name)
+            path = os.path.join(self.projects_dir, name)
+            current = self.files.get(name)
+            if current is not None and current.is_fresh(os.stat(path)):
+                continue
+            self.files[name] = ProjectIndex.build(observations_project(name), path)
+            reindexed.append(name)
+        removed = sorted(set(self.files) - seen)
+        for name in removed:
+            del self.files[name]
+        if reindexed or removed:
+            self.save()
+        return reindexed, removed
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "files": {name: p.to_dict() for name, p in self.files.items()},
+        }
+        save_index(self.path, data)
+
+    def search(self, query):
+        """Return matching rows as dicts, most terms hit first, then newest."""
+        if isinstance(query, str):
+            query = Query(query)
+        results = []
+        for idx in self.files.values():
+            project = idx.project
+            if query.project and project != query.project:
+                continue
+            for pos, hits in idx.match(query).items():
+                number, date, obs_type, summary, files, status = idx.rows[pos]
+                results.append(
+                    {
+                        "project": project,
+                        "number": number,
+                        "date": date,
+                        "type": obs_type,
+                        "summary": summary,
+                        "files": files,
+                        "status": status,
+                        "hits": hits,
+                    }
+                )
+        results.sort(
+            key=lambda r: (r["hits"], r["date"], r["number"]), reverse=True
+        )
+        return results
+
+
+def format_results(query_text, results, limit):
+    """Render results in the /search-memory output format."""
+    shown = results[:limit]
+    by_project = {}
+    for r in shown:
+        by_project.setdefault(r["project"], []).append(r)
+    out = [
+        f'## Search results: "{query_text}"',
+        f"Found: {len(results)} observations in "
+        f"{len({r['project'] for r in results})} projects",
+    ]
+    for project, rows in by_project.items():
+        out += [
+            "",
+            f"### {project} ({len(rows)} matches)",
+            "| # | Date | Type | Summary |",
+            "|---|------|------|---------|",
+        ]
+        for r in rows:
+            out.append(
+                f"| {r['number']} | {r['date']} | {r['type']} | {r['summary']} |"
+            )
+    if len(results) > limit:
+        out += ["", f"({len(results) - limit} more not shown)"]
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Observation index for /search-memory"
+    )
+    parser.add_argument("--memory-path", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build or refresh the index")
+    build.add_argument("--rebuild", action="store_true", help="ignore the cache")
+    query = sub.add_parser("query", help="answer a query from the index")
+    query.add_argument("query", nargs="+")
+    query.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+    start = time.perf_counter()
+    index = MemoryIndex.open(memory_path, rebuild=getattr(args, "rebuild", False))
+    reindexed, removed = index.refresh()
+
+    if args.command == "build":
+        elapsed = (time.perf_counter() - start) * 1000
+        rows = sum(len(p.rows) for p in index.files.values())
+        print(
+            f"Indexed {len(index.projects)} projects, {rows} observations "
+            f"({len(reindexed)} files re-indexed, {len(removed)} removed) "
+            f"in {elapsed:.1f}ms"
+        )
+        return 0
+
+    query_text = " ".join(args.query)
+    results = index.search(query_text)
+    print(format_results(query_text, results, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
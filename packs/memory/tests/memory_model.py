@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Parsed-once model of the memory tree (MEMORY.md, dossiers, observations).
+
+Every file is read and tokenized exactly once; the integrity tests and the
+other memory tools work from the resulting objects instead of re-reading and
+re-scanning the markdown.
+"""
+
+import mmap
+import os
+import pickle
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+
+INDEX_HEADER = "| # | Date | Type | Summary | Files |"
+OBSERVATIONS_TEMPLATE = """# Observations - {project}
+
+## Index
+| # | Date | Type | Summary | Files |
+|---|------|------|---------|-------|
+
+## Details
+"""
+CONTEXT_KEYWORDS = (
+    "**Before:**",
+    "**After:**",
+    "**Context:**",
+    "**Symptoms:**",
+    "**What:**",
+    "**Signal:**",
+)
+
+ROW_RE = re.compile(r"^\| (\d+) \|")
+ROW_TYPE_RE = re.compile(r"^\| \d+ \| [\d-]+ \| (\w+) \|")
+DETAILS_RE = re.compile(r"^### \[(\d+)\]")
+RESOLVED_RE = re.compile(r"\*\*Resolved:\*\*|Status:(?:\*\*)?\s*Resolved")
+RESOLVED_MARKER = "[R]"
+
+# `{project}.observations.md` is the live file; rolled-over shards are
+# `{project}.observations.2026Q3.md` (a `-N` suffix breaks same-quarter ties)
+# and compacted entries live in `{project}.observations.archive.md`.
+ARCHIVE_LABEL = "archive"
+OBSERVATIONS_RE = re.compile(
+    r"^(.+)\.observations(?:\.(\d{4}Q[1-4](?:-\d+)?|archive))?\.md$"
+)
+
+# One Index table row. `type` is None when the row does not parse as
+# `| N | date | type |`; `files` is the raw Files cell.
+IndexRow = namedtuple("IndexRow", "number date type summary files")
+
+# One `### [N] ...` block from the Details section, header line included.
+# `has_context` is True when the block carries any of CONTEXT_KEYWORDS and
+# `resolved` when it carries a `**Resolved:**` / `Status: Resolved` field.
+DetailsBlock = namedtuple(
+    "DetailsBlock", "number header text has_context resolved", defaults=(False,)
+)
+
+
+def read_file(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def parse_index_row(line):
+    """Parse a `| N | date | type | summary | files |` line, or return None."""
+    m = ROW_RE.match(line)
+    if not m:
+        return None
+    cells = [c.strip() for c in line.strip().strip("|").split("|")]
+    cells += [""] * (5 - len(cells))
+    t = ROW_TYPE_RE.match(line)
+    return IndexRow(
+        int(m.group(1)),
+        cells[1],
+        t.group(1) if t else None,
+        cells[3],
+        "|".join(cells[4:]).strip(),
+    )
+
+
+def observation_status(row, block=None):
+    """Return "resolved", "open", or None for types that are not closable.
+
+    An entry is resolved when its Summary carries the `[R]` marker or its
+    Details block has a `**Resolved:**` / `Status: Resolved` field. Only
+    `problem` entries count as open; a `bugfix` is open-ended by nature.
+    """
+    if row.summary.startswith(RESOLVED_MARKER):
+        return "resolved"
+    if block is not None and block.resolved:
+        return "resolved"
+    if row.type == "problem":
+        return "open"
+    return None
+
+
+class Dossier:
+    """A project dossier (`{project}.md`)."""
+
+    def __init__(self, name, content):
+        self.name = name
+        self.project = name[: -len(".md")]
+        self.content = content
+        self.line_count = len(content.strip().split("\n"))
+
+
+class ObservationsReader:
+    """Stream Index rows and Details blocks from an observations file.
+
+    Iterating yields IndexRow and DetailsBlock objects in file order, one line
+    at a time, so memory is bounded by the largest single block rather than
+    by the file. With `keep_text=False` block text is not retained at all
+    (DetailsBlock.text is None) and memory stays flat regardless of how much
+    was pasted into Details. The section flags are set as the scan passes
+    them and are final once iteration ends.
+    """
+
+    def __init__(self, lines, keep_text=True):
+        self.lines = lines
+        self.keep_text = keep_text
+        self.has_index_section = False
+        self.has_index_header = False
+        self.has_details_section = False
+
+    @classmethod
+    @contextmanager
+    def open(cls, path, keep_text=True):
+        """Memory-map `path` and stream it; the mapping closes on exit."""
+        with mapped(path) as buf:
+            yield cls(iter_lines(buf), keep_text)
+
+    def __iter__(self):
+        splitter = DetailsSplitter(self.keep_text)
+        in_details = False
+        for line in self.lines:
+            if line.startswith("## Index"):
+                self.has_index_section = True
+            if line.startswith("## Details"):
+                self.has_details_section = True
+                in_details = True
+                continue
+            if in_details and line.startswith("## "):
+                # Any other section ends Details (an archive appends a new
+                # Index and Details pair per compaction).
+                in_details = False
+                block = splitter.close()
+                if block is not None:
+                    yield block
+            if INDEX_HEADER in line:
+                self.has_index_header = True
+
+            if in_details:
+                block = splitter.feed(line)
+                if block is not None:
+                    yield block
+                if splitter.in_block:
+                    continue
+
+            row = parse_index_row(line)
+            if row is not None:
+                yield row
+        block = splitter.close()
+        if block is not None:
+            yield block
+
+
+class ObservationsFile:
+    """A `{project}.observations.md` file, parsed in a single pass."""
+
+    def __init__(self, name, lines, keep_text=True):
+        self.name = name
+        self.project = observations_project(name)
+        self.rows = []
+        self.details = []
+        reader = ObservationsReader(lines, keep_text)
+        for item in reader:
+            if isinstance(item, IndexRow):
+                self.rows.append(item)
+            else:
+                self.details.append(item)
+        self.has_index_section = reader.has_index_section
+        self.has_index_header = reader.has_index_header
+        self.has_details_section = reader.has_details_section
+
+    @classmethod
+    def from_text(cls, name, text, keep_text=True):
+        return cls(name, text.split("\n"), keep_text)
+
+    @classmethod
+    def from_path(cls, path, keep_text=True):
+        with mapped(path) as buf:
+            return cls(os.path.basename(path), iter_lines(buf), keep_text)
+
+    @property
+    def numbers(self):
+        return [r.number for r in self.rows]
+
+    @property
+    def details_numbers(self):
+        return {b.number for b in self.details}
+
+    def details_by_number(self):
+        return {b.number: b for b in self.details}
+
+
+class DetailsSplitter:
+    """Cut the Details section into `### [N]` blocks in one pass.
+
+    Lines are fed one at a time; `feed` returns the previous block when the
+    next header arrives. Context keywords and resolution are checked line
+    by line, so a block never has to be joined unless its text is kept.
+    Total work is linear in the size of the section.
+    """
+
+    def __init__(self, keep_text=True):
+        self.keep_text = keep_text
+        self._number = None
+        self._header = None
+        self._lines = []
+        self._has_context = False
+        self._resolved = False
+
+    @property
+    def in_block(self):
+        return self._number is not None
+
+    def feed(self, line):
+        m = DETAILS_RE.match(line)
+        if m:
+            block = self._flush()
+            self._number = int(m.group(1))
+            self._header = line
+            self._lines = [line]
+            self._has_context = _has_context(line)
+            self._resolved = False
+            return block
+        if self._number is not None:
+            if self.keep_text:
+                self._lines.append(line)
+            if not self._has_context:
+                self._has_context = _has_context(line)
+            if not self._resolved:
+                self._resolved = RESOLVED_RE.search(line) is not None
+        return None
+
+    def close(self):
+        return self._flush()
+
+    def _flush(self):
+        if self._number is None:
+            return None
+        text = "\n".join(self._lines) if self.keep_text else None
+        block = DetailsBlock(
+            self._number, self._header, text, self._has_context, self._resolved
+        )
+        self._number = None
+        self._lines = []
+        return block
+
+
+def _has_context(line):
+    return any(kw in line for kw in CONTEXT_KEYWORDS)
+
+
+@contextmanager
+def mapped(path):
+    """Map a file read-only; yields b"" for empty files, which mmap rejects."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+
+def load_index(path, version):
+    """The dict pickled at `path` by save_index(), or None.
+
+    Derived indexes can always be rebuilt, so any failure to read one
+    (missing, truncated, or written by another version of these tools)
+    returns None instead of raising.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") == version:
+            return data
+    except Exception:
+        pass
+    return None
+
+
+def save_index(path, data):
+    """Pickle `data` to `path` atomically, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def iter_lines(buf):
+    """Yield decoded lines of a bytes-like buffer without copying it whole."""
+    pos, size = 0, len(buf)
+    while pos < size:
+        end = buf.find(b"\n", pos)
+        if end < 0:
+            end = size
+        yield buf[pos:end].decode("utf-8", errors="replace")
+        pos = end + 1
+
+
+def observations_project(name):
+    """Project name of a live observations file or one of its shards."""
+    m = OBSERVATIONS_RE.match(name)
+    return m.group(1) if m else None
+
+
+def is_shard(name):
+    m = OBSERVATIONS_RE.match(name)
+    return bool(m and m.group(2) and m.group(2) != ARCHIVE_LABEL)
+
+
+def is_archive(name):
+    m = OBSERVATIONS_RE.match(name)
+    return bool(m and m.group(2) == ARCHIVE_LABEL)
+
+
+def list_dossiers(projects_dir):
+    """List all project dossier files (*.md, not observations or shards)."""
+    if not os.path.exists(projects_dir):
+        return []
+    return sorted(
+        f
+        for f in os.listdir(projects_dir)
+        if f.endswith(".md") and not OBSERVATIONS_RE.match(f)
+    )
+
+
+def list_observations(projects_dir):
+    """List all observation files, shards and archives included."""
+    if not os.path.exists(projects_dir):
+        return []
+    return sorted(f for f in os.listdir(projects_dir) if OBSERVATIONS_RE.match(f))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Byte-offset index of Details blocks, for on-demand loading.
+
+For each observations file (live file, shard or archive) a sidecar
+`{memory}/.index/offsets/{file}.json` maps every observation number to the
+byte offset and length of its `### [N]` Details block. The sidecar records
+the file's mtime and size and is rebuilt whenever they change, with one
+regex pass over the memory-mapped bytes. Fetching the Details of a few
+matches is then one seek and read per block instead of a full-file parse.
+
+For sharded projects the manifest picks the shard holding each number;
+numbers found in no shard or live file are looked up in the archive.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_offsets.py show PROJECT N [N ...]
+  python3 ~/.claude/memory/tests/memory_offsets.py build
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+from memory_config import load_config
+from memory_model import list_observations, mapped
+from memory_shards import Manifest, archive_name, live_name
+
+INDEX_VERSION = 1
+OFFSETS_DIR = os.path.join(".index", "offsets")
+DETAILS_SECTION_RE = re.compile(rb"^## Details", re.MULTILINE)
+# A block header, or a section heading that ends the block before it.
+HEADING_RE = re.compile(rb"^(?:### \[(\d+)\]|## )", re.MULTILINE)
+
+
+def scan_offsets(buf, base=0):
+    """{number: (offset, length)} of every Details block in `buf`.
+
+    A block runs from its `### [N]` header to the next header, section
+    heading or the end of the file; trailing blank lines are not included.
+    The first block with a given number wins, as in
+    ObservationsFile.details_by_number(). Offsets are shifted by `base`, for
+    a buffer that starts partway into a file.
+    """
+    section = DETAILS_SECTION_RE.search(buf)
+    if section is None:
+        return {}
+    headings = [
+        (m.group(1), m.start()) for m in HEADING_RE.finditer(buf, section.end())
+    ]
+    blocks = {}
+    for i, (number, start) in enumerate(headings):
+        if number is None:
+            continue
+        end = headings[i + 1][1] if i + 1 < len(headings) else len(buf)
+        length = len(buf[start:end].rstrip())
+        blocks.setdefault(int(number), (base + start, length))
+    return blocks
+
+
+class Offsets:
+    """The sidecar of one observations file."""
+
+    def __init__(self, memory_path, name):
+        self.name = name
+        self.path = os.path.join(memory_path, "projects", name)
+        self.sidecar = os.path.join(memory_path, OFFSETS_DIR, f"{name}.json")
+        self.mtime_ns = self.size = None
+        self.blocks = {}
+
+    @classmethod
+    def read(cls, memory_path, name):
+        """The sidecar as stored, fresh or not; empty when there is none."""
+        offsets = cls(memory_path, name)
+        try:
+            with open(offsets.sidecar) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return offsets
+        if data.get("version") == INDEX_VERSION:
+            offsets.mtime_ns, offsets.size = data["mtime_ns"], data["size"]
+            offsets.blocks = {int(n): tuple(v) for n, v in data["blocks"].items()}
+        return offsets
+
+    @classmethod
+    def load(cls, memory_path, name):
+        """The sidecar, rebuilt first if the file changed since it was written."""
+        offsets = cls.read(memory_path, name)
+        if not offsets.is_fresh():
+            offsets.rebuild()
+        return offsets
+
+    @property
+    def exists(self):
+        return self.mtime_ns is not None
+
+    def is_fresh(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (self.mtime_ns, self.size) == (st.st_mtime_ns, st.st_size)
+
+    def rebuild(self):
+        st = os.stat(self.path)
+        with mapped(self.path) as buf:
+            self.blocks = scan_offsets(buf)
+        self.save(st)
+
+    def extend(self, data, base):
+        """Record the blocks of `data`, just appended to the file at `base`.
+
+        Only a fresh sidecar is extended; a stale one is rebuilt on its next
+        use anyway.
+        """
+        if not self.exists or self.size != base:
+            return
+        for number, entry in scan_offsets(data, base).items():
+            self.blocks.setdefault(number, entry)
+        self.save(os.stat(self.path))
+
+    def save(self, st):
+        """Write the sidecar, stamped with the file's stat `st`."""
+        self.mtime_ns, self.size = st.st_mtime_ns, st.st_size
+        os.makedirs(os.path.dirname(self.sidecar), exist_ok=True)
+        data = {
+            "version": INDEX_VERSION,
+            "mtime_ns": self.mtime_ns,
+            "size": self.size,
+            "blocks": {str(n): list(v) for n, v in sorted(self.blocks.items())},
+        }
+        tmp = f"{self.sidecar}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.sidecar)
+
+    def fetch(self, numbers):
+        """{number: Details text} for those of `numbers` in this file."""
+        found = {}
+        wanted = sorted(n for n in set(numbers) if n in self.blocks)
+        if not wanted:
+            return found
+        with open(self.path, "rb") as f:
+            for number in wanted:
+                offset, length = self.blocks[number]
+                f.seek(offset)
+                found[number] = f.read(length).decode("utf-8", errors="replace")
+        return found
+
+
+def verify(memory_path, name):
+    """Problems with a file's sidecar; a missing or stale one is fine.
+
+    A stale sidecar is rebuilt on its next use. A fresh one must match a
+    rescan of the file exactly.
+    """
+    offsets = Offsets.read(memory_path, name)
+    if not offsets.exists or not offsets.is_fresh():
+        return []
+    with mapped(offsets.path) as buf:
+        actual = scan_offsets(buf)
+    problems = []
+    for number in sorted(set(actual) | set(offsets.blocks)):
+        have, want = offsets.blocks.get(number), actual.get(number)
+        if have != want:
+            problems.append(
+                f"{name} offsets for #{number}: sidecar has {have}, file has {want}"
+            )
+    return problems
+
+
+def fetch_details(memory_path, project, numbers):
+    """{number: Details text} for one project's observations.
+
+    Each number is read from the shard the manifest names, or the live
+    file; whatever is not found there is read from the archive.
+    """
+    projects_dir = os.path.join(memory_path, "projects")
+    manifest = Manifest.load(projects_dir, project)
+    by_file = {}
+    for number in numbers:
+        name = manifest.shard_for(number) or live_name(project)
+        by_file.setdefault(name, []).append(number)
+    found = {}
+    for name, wanted in by_file.items():
+        if os.path.exists(os.path.join(projects_dir, name)):
+            found.update(Offsets.load(memory_path, name).fetch(wanted))
+    missing = [n for n in numbers if n not in found]
+    if missing and os.path.exists(os.path.join(projects_dir, archive_name(project))):
+        archive = Offsets.load(memory_path, archive_name(project))
+        found.update(archive.fetch(missing))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="On-demand Details loader")
+    parser.add_argument("--memory-path", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="print Details blocks by number")
+    show.add_argument("project")
+    show.add_argument("numbers", type=int, nargs="+")
+    sub.add_parser("build", help="refresh every stale sidecar")
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+
+    if args.command == "build":
+        projects_dir = os.path.join(memory_path, "projects")
+        rebuilt = 0
+        for name in list_observations(projects_dir):
+            offsets = Offsets.read(memory_path, name)
+            if not offsets.is_fresh():
+                offsets.rebuild()
+                rebuilt += 1
+        print(f"Rebuilt {rebuilt} offset sidecars")
+        return 0
+
+    found = fetch_details(memory_path, args.project, args.numbers)
+    for number in args.numbers:
+        if number in found:
+            print(found[number] + "\n")
+        else:
+            print(f"error: #{number} not found in {args.project}", file=sys.stderr)
+    return 0 if len(found) == len(set(args.numbers)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained index of open problems.
+
+`{memory}/.index/open-problems.json` lists every open `problem` observation
+(number, date, summary) per project. The observation writer adds new
+problems as it records them and the resolve flow removes them, so answering
+"what is still open?" across any number of projects is one small file read
+instead of loading every problem's Details.
+
+`rebuild` regenerates the index from the observations files (live files and
+shards; archives never hold open problems) and `verify` reports where the
+index and the files disagree.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_problems.py list [--project P] [--json]
+  python3 ~/.claude/memory/tests/memory_problems.py verify
+  python3 ~/.claude/memory/tests/memory_problems.py rebuild
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from memory_config import load_config
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    is_archive,
+    list_observations,
+    observation_status,
+    observations_project,
+)
+
+INDEX_VERSION = 1
+PROBLEMS_FILE = os.path.join(".index", "open-problems.json")
+LOCK_FILE = os.path.join(".index", "locks", "open-problems.lock")
+
+
+@contextmanager
+def locked(memory_path):
+    """Serialize read-modify-write cycles on the open-problems index."""
+    path = os.path.join(memory_path, LOCK_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class OpenProblems:
+    """project -> {number: {"number", "date", "summary"}}."""
+
+    def __init__(self, memory_path, projects=None):
+        self.path = os.path.join(memory_path, PROBLEMS_FILE)
+        self.projects = projects or {}
+
+    @classmethod
+    def load(cls, memory_path):
+        index = cls(memory_path)
+        try:
+            with open(index.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if data.get("version") == INDEX_VERSION:
+            index.projects = {
+                project: {entry["number"]: entry for entry in entries}
+                for project, entries in data["projects"].items()
+            }
+        return index
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "projects": {
+                project: [entries[n] for n in sorted(entries)]
+                for project, entries in sorted(self.projects.items())
+                if entries
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+    def add(self, project, number, date, summary):
+        self.projects.setdefault(project, {})[number] = {
+            "number": number,
+            "date": date,
+            "summary": summary,
+        }
+
+    def remove(self, project, number):
+        entries = self.projects.get(project, {})
+        return entries.pop(number, None) is not None
+
+    def entries(self, project=None):
+        """Open problems as (project, entry) pairs, by project then number."""
+        for name in sorted(self.projects):
+            if project and name != project:
+                continue
+            entries = self.projects[name]
+            for number in sorted(entries):
+                yield name, entries[number]
+
+
+def record(memory_path, project, number, date, summary):
+    """Add one open problem to the index (called by the writer).
+
+    A missing index is left missing: `list` builds it from the files on
+    first use, and a partial one would hide every older problem.
+    """
+    with locked(memory_path):
+        index = OpenProblems.load(memory_path)
+        if index.exists:
+            index.add(project, number, date, summary)
+            index.save()
+
+
+def discard(memory_path, project, number):
+    """Drop one problem from the index (called by the resolve flow)."""
+    with locked(memory_path):
+        index = OpenProblems.load(memory_path)
+        if index.remove(project, number):
+            index.save()
+
+
+def scan(memory_path):
+    """Open problems straight from the observations files."""
+    projects_dir = os.path.join(memory_path, "projects")
+    index = OpenProblems(memory_path)
+    for name in list_observations(projects_dir):
+        if is_archive(name):
+            continue
+        project = observations_project(name)
+        rows, statuses = {}, {}
+        path = os.path.join(projects_dir, name)
+        with ObservationsReader.open(path, keep_text=False) as reader:
+            for item in reader:
+                if isinstance(item, IndexRow):
+                    if item.type == "problem":
+                        rows[item.number] = item
+                        statuses[item.number] = observation_status(item)
+                elif item.number in rows:
+                    row = rows[item.number]
+                    statuses[item.number] = observation_status(row, item)
+        for number, row in rows.items():
+            if statuses[number] == "open":
+                index.add(project, number, row.date, row.summary)
+    return index
+
+
+def diff(index, actual):
+    """Messages for every entry that differs between two indexes."""
+    problems = []
+    for project in sorted(set(index.projects) | set(actual.projects)):
+        have = index.projects.get(project, {})
+        want = actual.projects.get(project, {})
+        for number in sorted(set(have) | set(want)):
+            if number not in have:
+                problems.append(f"{project} #{number}: open but not indexed")
+            elif number not in want:
+                problems.append(f"{project} #{number}: indexed but not open")
+            elif have[number] != want[number]:
+                problems.append(f"{project} #{number}: indexed summary is stale")
+    return problems
+
+
+def rebuild(memory_path):
+    """Regenerate the index from the files; return the new index."""
+    with locked(memory_path):
+        index = scan(memory_path)
+        index.save()
+    return index
+
+
+def format_memory_md(index, project=None):
+    """The MEMORY.md `## Open Problems` list for `index`."""
+    lines = [
+        f"- {name} #{entry['number']}: {entry['summary']}"
+        for name, entry in index.entries(project)
+    ]
+    return "\n".join(lines) or "(none)"
+
+
+def _closed_stdout():
+    # The reader (`| head`) has gone; point stdout at devnull so the
+    # interpreter's final flush does not raise again.
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-problems index")
+    parser.add_argument("--memory-path", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("list", help="print open problems from the index")
+    show.add_argument("--project")
+    show.add_argument("--json", action="store_true")
+    sub.add_parser("verify", help="compare the index with the files")
+    sub.add_parser("rebuild", help="regenerate the index from the files")
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+
+    if args.command == "rebuild":
+        index = rebuild(memory_path)
+        count = sum(len(e) for e in index.projects.values())
+        print(f"Indexed {count} open problems")
+        return 0
+
+    if args.command == "verify":
+        index = OpenProblems.load(memory_path)
+        if not index.exists:
+            print("No open-problems index; run `rebuild`", file=sys.stderr)
+            return 1
+        problems = diff(index, scan(memory_path))
+        try:
+            for message in problems:
+                print(message)
+            print(f"{len(problems)} mismatches" if problems else "Index matches files")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            return _closed_stdout()
+        return 1 if problems else 0
+
+    index = OpenProblems.load(memory_path)
+    if not index.exists:
+        index = rebuild(memory_path)
+    try:
+        if args.json:
+            entries = index.entries(args.project)
+            print(json.dumps([dict(e, project=p) for p, e in entries], indent=2))
+        else:
+            print(format_memory_md(index, args.project))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        return _closed_stdout()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Ranked full-text search (BM25) over observations and dossier sections.
+
+Every Details block (with its Summary) and every "Unresolved Problems",
+"Decisions Made" and "Next Steps" section of a dossier is one document.
+Text is lower-cased, split on non-alphanumerics, stripped of stop words and
+stemmed with a light suffix stripper, so "caching", "cached" and "caches"
+all match "cache". Documents are scored with Okapi BM25 and the top k are
+picked with a heap.
+
+The index lives in `{memory}/.index/search.idx`. Like memory_index.py it is
+refreshed per file by mtime and size: a changed file's postings are cut out
+and its documents re-added, without touching any other file. Postings are
+kept in document-id order, so a file's postings are one contiguous slice of
+each list. Queries score the rarest terms first and, once the top k cannot
+change, only rescore the documents already found.
+
+Queries take the same `project:`, `type:`, `date:` and `status:` filters as
+/search-memory; dossier sections have type `dossier`.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_search.py build [--rebuild]
+  python3 ~/.claude/memory/tests/memory_search.py query "cache invalidation" \\
+      [--top 10] [--json]
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import chain
+
+from memory_config import load_config
+from memory_index import Query
+from memory_model import (
+    IndexRow,
+    ObservationsReader,
+    list_dossiers,
+    list_observations,
+    load_index,
+    observation_status,
+    observations_project,
+    read_file,
+    save_index,
+)
+
+INDEX_VERSION = 1
+INDEX_FILE = os.path.join(".index", "search.idx")
+DEFAULT_TOP = 10
+DOSSIER_SECTIONS = ("Unresolved Problems", "Decisions Made", "Next Steps")
+
+# Okapi BM25 parameters.
+K1 = 1.2
+B = 0.75
+# Terms in more than this fraction of documents count as common.
+COMMON_DF = 0.1
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+# `**Before:**` and the like label every block; they are not content.
+FIELD_RE = re.compile(r"\*\*[\w ]+:\*\*")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+# (suffix, replacement), tried in order after plurals and -ed/-ing.
+SUFFIXES = (
+    ("ational", "ate"),
+    ("ization", "ize"),
+    ("fulness", "ful"),
+    ("iveness", "ive"),
+    ("ousness", "ous"),
+    ("ation", "ate"),
+    ("ness", ""),
+    ("ment", ""),
+    ("ity", ""),
+)
+VOWELS = frozenset("aeiouy")
+# observation_status() values, stored by position.
+STATUSES = (None, "open", "resolved")
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """Strip common English suffixes; a small subset of Porter's rules."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ingly", "edly", "ing", "ed", "ly"):
+        base = word[: -len(suffix)]
+        if word.endswith(suffix) and len(base) >= 3 and VOWELS & set(base):
+            word = base
+            if word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)] + replacement
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def analyze(text):
+    """Index terms of `text`: lower-cased, stop words dropped, stemmed."""
+    return [
+        stem(w) for w in WORD_RE.findall(text.lower()) if w not in STOP_WORDS
+    ]
+
+
+def observation_docs(path):
+    """(number, date, type, status, title, text) per observation in a file."""
+    rows, docs = {}, []
+    with ObservationsReader.open(path) as reader:
+        for item in reader:
+            if isinstance(item, IndexRow):
+                rows[item.number] = item
+                continue
+            row = rows.pop(item.number, None)
+            if row is None:
+                continue
+            status = observation_status(row, item)
+            text = f"{row.summary}\n{FIELD_RE.sub(' ', item.text)}"
+            docs.append((row.number, row.date, row.type, status, row.summary, text))
+    # Index rows without a Details block are still searchable by Summary.
+    for row in rows.values():
+        status = observation_status(row)
+        docs.append((row.number, row.date, row.type, status, row.summary, row.summary))
+    return docs
+
+
+def dossier_docs(path):
+    """(0, "", "dossier", None, section, text) per searchable dossier section."""
+    docs, section, lines = [], None, []
+    for line in read_file(path).split("\n") + ["## "]:
+        if line.startswith("## "):
+            if section in DOSSIER_SECTIONS and any(s.strip() for s in lines):
+                docs.append((0, "", "dossier", None, section, "\n".join(lines)))
+            section, lines = line[3:].strip(), []
+        else:
+            lines.append(line)
+    return docs
+
+
+class SearchIndex:
+    """BM25 postings over every document of the memory tree.
+
+    `postings` maps a term to (doc ids, term frequencies capped at 255), two
+    parallel arrays in doc-id order. Per-document data is kept in columns indexed by
+    doc id (arrays where possible, so the index loads quickly): its source
+    file, number, date as YYYYMMDD, type, status, length and title. `files`
+    maps a file name to its mtime, size, doc-id range [lo, hi) and terms;
+    ids outside every range belong to re-indexed files and are unused.
+    """
+
+    def __init__(self, memory_path):
+        self.memory_path = memory_path
+        self.projects_dir = os.path.join(memory_path, "projects")
+        self.path = os.path.join(memory_path, INDEX_FILE)
+        self.files = {}
+        self.postings = {}
+        # (file name, project) per source id, and the known type names
+        self.sources = []
+        self.types = []
+        self.source = array("I")
+        self.number = array("I")
+        self.date = array("I")
+        self.type = array("B")
+        self.status = array("B")
+        self.length = array("I")
+        self.title = []
+        self.live = 0
+        self.total_length = 0
+
+    @classmethod
+    def open(cls, memory_path, rebuild=False):
+        index = cls(memory_path)
+        data = None if rebuild else load_index(index.path, INDEX_VERSION)
+        if data is not None:
+            del data["version"]
+            index.__dict__.update(data)
+        return index
+
+    def save(self):
+        data = {
+            key: value
+            for key, value in vars(self).items()
+            if key not in ("memory_path", "projects_dir", "path")
+        }
+        data["version"] = INDEX_VERSION
+        save_index(self.path, data)
+
+    def refresh(self):
+        """Re-index changed files; return (reindexed, removed) names."""
+        wanted = {}
+        for name in list_observations(self.projects_dir):
+            wanted[name] = (observations_project(name), observation_docs)
+        for name in list_dossiers(self.projects_dir):
+            wanted[name] = (name[: -len(".md")], dossier_docs)
+
+        reindexed = []
+        for name, (project, parse) in sorted(wanted.items()):
+            path = os.path.join(self.projects_dir, name)
+            st = os.stat(path)
+            entry = self.files.get(name)
+            fresh = entry and entry["mtime_ns"] == st.st_mtime_ns
+            if fresh and entry["size"] == st.st_size:
+                continue
+            self._remove(name)
+            self._add(name, project, st, parse(path))
+            reindexed.append(name)
+        removed = sorted(set(self.files) - set(wanted))
+        for name in removed:
+            self._remove(name)
+        if len(self.title) > 2 * self.live + 1000:
+            self._compact()
+        if reindexed or removed:
+            self.save()
+        return reindexed, removed
+
+    def _type_id(self, obs_type):
+        if obs_type not in self.types:
+            self.types.append(obs_type)
+        return self.types.index(obs_type)
+
+    def _add(self, name, project, st, docs):
+        lo = len(self.title)
+        source = len(self.sources)
+        self.sources.append((name, project))
+        terms = {}
+        for doc_id, (number, date, obs_type, status, title, text) in enumerate(
+            docs, lo
+        ):
+            tokens = analyze(text)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                terms.setdefault(term, []).append((doc_id, min(tf, 255)))
+            digits = date.replace("-", "") if date else ""
+            self.source.append(source)
+            self.number.append(number)
+            self.date.append(int(digits) if digits.isdigit() else 0)
+            self.type.append(self._type_id(obs_type or ""))
+            self.status.append(STATUSES.index(status))
+            self.length.append(len(tokens))
+            self.title.append(title)
+            self.total_length += len(tokens)
+        for term, pairs in terms.items():
+            if term not in self.postings:
+                self.postings[term] = (array("I"), array("B"))
+            ids, tfs = self.postings[term]
+            ids.extend(d for d, _ in pairs)
+            tfs.extend(tf for _, tf in pairs)
+        self.live += len(docs)
+        self.files[name] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "lo": lo,
+            "hi": len(self.title),
+            "terms": sorted(terms),
+        }
+
+    def _remove(self, name):
+        entry = self.files.pop(name, None)
+        if entry is None:
+            return
+        lo, hi = entry["lo"], entry["hi"]
+        for term in entry["terms"]:
+            ids, tfs = self.postings[term]
+            i, j = bisect_left(ids, lo), bisect_left(ids, hi)
+            del ids[i:j]
+            del tfs[i:j]
+            if not ids:
+                del self.postings[term]
+        for doc_id in range(lo, hi):
+            self.total_length -= self.length[doc_id]
+            self.length[doc_id] = 0
+            self.title[doc_id] = None
+        self.live -= hi - lo
+
+    def _compact(self):
+        """Renumber documents to drop the ids re-indexing left unused.
+
+        Files keep their relative order, so every posting list stays sorted.
+        """
+        shift = array("I", bytes(4 * len(self.title)))
+        columns = ("number", "date", "type", "status", "length", "title")
+        kept = {key: getattr(self, key)[:0] for key in columns}
+        kept["source"], sources = array("I"), []
+        size = 0
+        for entry in sorted(self.files.values(), key=lambda e: e["lo"]):
+            lo, hi = entry["lo"], entry["hi"]
+            for doc_id in range(lo, hi):
+                shift[doc_id] = size + doc_id - lo
+            for key in columns:
+                kept[key] += getattr(self, key)[lo:hi]
+            if hi > lo:
+                kept["source"] += array("I", [len(sources)]) * (hi - lo)
+                sources.append(self.sources[self.source[lo]])
+            entry["lo"], entry["hi"] = size, size + hi - lo
+            size += hi - lo
+        for term, (ids, tfs) in self.postings.items():
+            self.postings[term] = (array("I", (shift[d] for d in ids)), tfs)
+        self.sources = sources
+        for key, column in kept.items():
+            setattr(self, key, column)
+
+    def _spans(self, project):
+        """Doc-id ranges of one project's files, in order."""
+        return sorted(
+            (entry["lo"], entry["hi"])
+            for name, entry in self.files.items()
+            if entry["hi"] > entry["lo"]
+            and self.sources[self.source[entry["lo"]]][1] == project
+        )
+
+    def _keep(self, query):
+        """Predicate on doc ids for type/status/date filters, or None."""
+        if not (query.type or query.status or query.date):
+            return None
+        type_id = status_id = None
+        low, high = 0, 1 << 32
+        if query.type:
+            type_id = self.types.index(query.type) if query.type in self.types else -1
+        if query.status:
+            status_id = STATUSES.index(query.status) if query.status in STATUSES else -1
+        if query.date:
+            # `2026-02` covers 20260200..20260299
+            digits = query.date.replace("-", "")
+            if digits.isdigit() and len(digits) <= 8:
+                low = int(digits.ljust(8, "0"))
+                high = low + 10 ** (8 - len(digits))
+            else:
+                low = high = 0
+        types, statuses, dates = self.type, self.status, self.date
+
+        def keep(d):
+            return (
+                (type_id is None or types[d] == type_id)
+                and (status_id is None or statuses[d] == status_id)
+                and low <= dates[d] < high
+            )
+
+        return keep
+
+    def search(self, query, top=DEFAULT_TOP):
+        """Return (documents scored, top results as dicts, best first).
+
+        Exact BM25 over the documents scored. Two shortcuts skip documents
+        that cannot enter the top k, or are unlikely to:
+
+        - Terms are scored rarest first. Once the k-th best score is above
+          what the remaining terms could add, they only rescore documents
+          already found (max-score pruning; exact).
+        - Terms found in more than COMMON_DF of all documents only rescore
+          documents matched by rarer terms, like Elasticsearch's common-terms
+          query. They are scored in full when every term is common, or when
+          the rarer terms match no document that passes the filters.
+        """
+        if isinstance(query, str):
+            query = Query(query)
+        terms = set(analyze(" ".join(query.terms)))
+        if not terms or not self.live:
+            return 0, []
+        n_docs, avgdl = self.live, self.total_length / self.live
+        spans = self._spans(query.project) if query.project else None
+        keep = self._keep(query)
+
+        weighted = []
+        for term in terms:
+            if term in self.postings:
+                df = len(self.postings[term][0])
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                weighted.append((idf, df, term))
+        weighted.sort(reverse=True)
+        rare = sum(1 for _, df, _ in weighted if df <= COMMON_DF * n_docs)
+        # bound[i]: the most terms i.. can add to any one document
+        bound = [0.0] * (len(weighted) + 1)
+        for i in range(len(weighted) - 1, -1, -1):
+            bound[i] = bound[i + 1] + weighted[i][0] * (K1 + 1)
+
+        length = self.length
+        norm_base, norm_len = K1 * (1 - B), K1 * B / avgdl
+        scores = {}
+        for i, (idf, df, term) in enumerate(weighted):
+            if i == rare and not scores:
+                rare = 0
+            ids, tfs = self.postings[term]
+            weight = idf * (K1 + 1)
+            pruned = rare and i >= rare
+            if not pruned and len(scores) >= top:
+                pruned = heapq.nlargest(top, scores.values())[-1] > bound[i]
+            if pruned and len(scores) * 16 < df:
+                for d in scores:
+                    j = bisect_left(ids, d)
+                    if j < df and ids[j] == d:
+                        tf = tfs[j]
+                        norm = norm_base + norm_len * length[d]
+                        scores[d] += weight * tf / (tf + norm)
+                continue
+            if spans is None:
+                pairs = zip(ids, tfs)
+            else:
+                pairs = chain.from_iterable(
+                    zip(ids[a:b], tfs[a:b])
+                    for a, b in (
+                        (bisect_left(ids, lo), bisect_left(ids, hi))
+                        for lo, hi in spans
+                    )
+                )
+            get = scores.get
+            for d, tf in pairs:
+                score = get(d)
+                if score is None:
+                    if pruned or (keep is not None and not keep(d)):
+                        continue
+                    score = 0.0
+                norm = norm_base + norm_len * length[d]
+                scores[d] = score + weight * tf / (tf + norm)
+
+        best = heapq.nlargest(top, scores.items(), key=lambda item: item[1])
+        results = []
+        for d, score in best:
+            name, project = self.sources[self.source[d]]
+            date = str(self.date[d]) if self.date[d] else ""
+            results.append(
+                {
+                    "project": project,
+                    "file": name,
+                    "number": self.number[d] or None,
+                    "date": f"{date[:4]}-{date[4:6]}-{date[6:]}" if date else "",
+                    "type": self.types[self.type[d]],
+                    "status": STATUSES[self.status[d]],
+                    "title": self.title[d],
+                    "score": round(score, 3),
+                }
+            )
+        return len(scores), results
+
+
+def format_results(query_text, total, results):
+    """Render ranked results as a markdown table."""
+    out = [
+        f'## Ranked results: "{query_text}"',
+        f"Top {len(results)} of {total} scored documents",
+        "",
+        "| Score | Project | # | Date | Type | Summary |",
+        "|-------|---------|---|------|------|---------|",
+    ]
+    for r in results:
+        number = r["number"] if r["number"] is not None else "-"
+        out.append(
+            f"| {r['score']:.2f} | {r['project']} | {number} | {r['date'] or '-'} "
+            f"| {r['type']} | {r['title']} |"
+        )
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranked memory search (BM25)")
+    parser.add_argument("--memory-path", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build or refresh the index")
+    build.add_argument("--rebuild", action="store_true", help="ignore the cache")
+    query = sub.add_parser("query", help="rank documents for a query")
+    query.add_argument("query", nargs="+")
+    query.add_argument("--top", type=int, default=DEFAULT_TOP)
+    query.add_argument("--json", action="store_true", help="print JSON instead")
+    args = parser.parse_args(argv)
+
+    memory_path = args.memory_path or load_config().memory_path
+    start = time.perf_counter()
+    index = SearchIndex.open(memory_path, rebuild=getattr(args, "rebuild", False))
+    reindexed, removed = index.refresh()
+
+    if args.command == "build":
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"Indexed {index.live} documents, {len(index.postings)} terms "
+            f"({len(reindexed)} files re-indexed, {len(removed)} removed) "
+            f"in {elapsed:.1f}ms"
+        )
+        return 0
+
+    query_text = " ".join(args.query)
+    total, results = index.search(query_text, args.top)
+    if args.json:
+        print(json.dumps({"total": total, "results": results}, indent=2))
+    else:
+        print(format_results(query_text, total, results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
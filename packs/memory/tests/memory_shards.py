@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Sharded observations: rollover and the per-project shard manifest.
+
+When `observations_shard_rows` is set in memory-config.json, the writer rolls
+the live `{project}.observations.md` over into a shard named after the
+quarter of its first row (`{project}.observations.2026Q3.md`) once it holds
+that many rows, and starts a fresh live file. Numbering continues across
+shards, so together they read as one logical file.
+
+`{project}.observations.manifest.json` records each shard's number range,
+row count and date range, oldest first. Tools use it to find the shard that
+holds a given number, or to skip shards older than a date, without opening
+them. `rebuild_manifest()` regenerates it from the shard files.
+"""
+
+import datetime
+import json
+import os
+import re
+import shutil
+from bisect import bisect_right
+from itertools import takewhile
+
+from memory_model import (
+    ARCHIVE_LABEL,
+    OBSERVATIONS_RE,
+    OBSERVATIONS_TEMPLATE,
+    IndexRow,
+    ObservationsReader,
+    is_shard,
+)
+
+MANIFEST_SUFFIX = ".observations.manifest.json"
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def live_name(project):
+    return f"{project}.observations.md"
+
+
+def archive_name(project):
+    return f"{project}.observations.{ARCHIVE_LABEL}.md"
+
+
+def quarter(date):
+    """`2026-08-03` -> `2026Q3`; today's quarter when `date` is not ISO."""
+    if not date or not DATE_RE.match(date):
+        date = datetime.date.today().isoformat()
+    return f"{date[:4]}Q{(int(date[5:7]) - 1) // 3 + 1}"
+
+
+def row_facts(rows):
+    """Number range, row count and date range of a sequence of IndexRows.
+
+    `runs` lists the [first, last] ranges of consecutive numbers, so holes
+    left by compaction can be checked across files without every number.
+    """
+    first = last = date_from = date_to = None
+    count = 0
+    runs = []
+    for row in rows:
+        count += 1
+        if runs and row.number == runs[-1][1] + 1:
+            runs[-1][1] = row.number
+        else:
+            runs.append([row.number, row.number])
+        first = row.number if first is None else min(first, row.number)
+        last = row.number if last is None else max(last, row.number)
+        if row.date and DATE_RE.match(row.date):
+            date_from = min(date_from or row.date, row.date)
+            date_to = max(date_to or row.date, row.date)
+    return {
+        "first": first,
+        "last": last,
+        "rows": count,
+        "date_from": date_from,
+        "date_to": date_to,
+        "runs": runs,
+    }
+
+
+def summarize(path):
+    """row_facts() of one file's Index table, read without the Details."""
+    with ObservationsReader.open(path, keep_text=False) as reader:
+        return row_facts(takewhile(lambda item: isinstance(item, IndexRow), reader))
+
+
+class Manifest:
+    """Shard list for one project, oldest first, plus its archive summary.
+
+    `archive` is None or {"file", "rows", "last"} for the compaction archive.
+    """
+
+    def __init__(self, projects_dir, project, shards=None, archive=None):
+        self.project = project
+        self.path = os.path.join(projects_dir, f"{project}{MANIFEST_SUFFIX}")
+        self.shards = shards or []
+        self.archive = archive
+
+    @classmethod
+    def load(cls, projects_dir, project):
+        manifest = cls(projects_dir, project)
+        try:
+            with open(manifest.path) as f:
+                data = json.load(f)
+            manifest.shards = data["shards"]
+            manifest.archive = data.get("archive")
+        except (OSError, ValueError, KeyError):
+            pass
+        return manifest
+
+    def save(self):
+        data = {"project": self.project, "shards": self.shards}
+        if self.archive:
+            data["archive"] = self.archive
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+    @property
+    def last_number(self):
+        """Highest number held outside the live file."""
+        last = self.shards[-1]["last"] if self.shards else 0
+        if self.archive:
+            last = max(last, self.archive["last"] or 0)
+        return last
+
+    @property
+    def names(self):
+        return [s["file"] for s in self.shards]
+
+    def shard_for(self, number):
+        """Name of the shard holding `number`, or None (live file or absent)."""
+        firsts = [s["first"] for s in self.shards]
+        i = bisect_right(firsts, number) - 1
+        if i >= 0 and number <= self.shards[i]["last"]:
+            return self.shards[i]["file"]
+        return None
+
+    def shards_since(self, date):
+        """Shards that may hold rows dated `date` or later."""
+        return [s["file"] for s in self.shards if (s["date_to"] or "") >= date]
+
+
+def list_shards(projects_dir, project):
+    """Shard file names of one project, in name order."""
+    if not os.path.exists(projects_dir):
+        return []
+    names = []
+    for f in os.listdir(projects_dir):
+        m = OBSERVATIONS_RE.match(f)
+        if m and m.group(1) == project and is_shard(f):
+            names.append(f)
+    return sorted(names)
+
+
+def logical_files(projects_dir, project):
+    """Every file of a project's logical observations file, oldest first."""
+    names = Manifest.load(projects_dir, project).names
+    names += [n for n in list_shards(projects_dir, project) if n not in names]
+    if os.path.exists(os.path.join(projects_dir, live_name(project))):
+        names.append(live_name(project))
+    return names
+
+
+def _shard_name(projects_dir, project, label):
+    name, n = f"{project}.observations.{label}.md", 1
+    while os.path.exists(os.path.join(projects_dir, name)):
+        n += 1
+        name = f"{project}.observations.{label}-{n}.md"
+    return name
+
+
+def rollover(projects_dir, project):
+    """Move the live file into a new shard; return the shard name or None.
+
+    The caller holds the project lock. The live file is hard-linked to its
+    shard name and then replaced by a fresh template, so readers always see
+    either the full old file or the empty new one. Returns None when the live
+    file has no rows.
+    """
+    live = os.path.join(projects_dir, live_name(project))
+    info = summarize(live)
+    if not info["rows"]:
+        return None
+    name = _shard_name(projects_dir, project, quarter(info["date_from"]))
+    shard = os.path.join(projects_dir, name)
+    try:
+        os.link(live, shard)
+    except OSError:
+        shutil.copy2(live, shard)
+
+    tmp = f"{live}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(OBSERVATIONS_TEMPLATE.format(project=project))
+    shutil.copymode(live, tmp)
+    os.replace(tmp, live)
+
+    manifest = Manifest.load(projects_dir, project)
+    manifest.shards.append(shard_entry(name, info))
+    manifest.save()
+    return name
+
+
+def shard_entry(name, info):
+    """Manifest entry for a shard from its row_facts()."""
+    return {"file": name, **{k: v for k, v in info.items() if k != "runs"}}
+
+
+def rebuild_manifest(projects_dir, project):
+    """Regenerate a project's manifest from its shard and archive files."""
+    shards = []
+    for name in list_shards(projects_dir, project):
+        info = summarize(os.path.join(projects_dir, name))
+        if info["rows"]:
+            shards.append(shard_entry(name, info))
+    shards.sort(key=lambda s: s["first"])
+    archive = None
+    path = os.path.join(projects_dir, archive_name(project))
+    if os.path.exists(path):
+        info = summarize(path)
+        archive = {
+            "file": archive_name(project),
+            "rows": info["rows"],
+            "last": info["last"],
+        }
+    manifest = Manifest(projects_dir, project, shards, archive)
+    manifest.save()
+    return manifest
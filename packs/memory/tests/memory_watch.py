@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+File-change watchers for the integrity checker's `--watch` mode.
+
+`open_watcher()` returns an inotify watcher (Linux, through ctypes, no
+dependencies) on the memory base, `projects/` and `.index/`, or a polling
+watcher that compares file mtimes and sizes when inotify is unavailable.
+Both block in the kernel (`select` or `sleep`) between changes, so an idle
+watch costs next to no CPU.
+
+`changes()` turns raw events into batches: after the first event it keeps
+collecting until the tree has been quiet for `debounce` seconds, so an
+editor's save or a writer's temp-file-and-rename yields one batch. Each
+batch is a set of paths relative to the memory base, or None when events
+were lost and everything should be re-checked.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from memory_problems import PROBLEMS_FILE
+
+# Directories watched, relative to the memory base.
+WATCHED_DIRS = ("", "projects", ".index")
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def relevant(path):
+    """Whether a change to `path` (relative) can affect any check.
+
+    Temp files written before an atomic rename (`x.md.tmp.123`), caches
+    and lock files are ignored, so the checker's own cache writes do not
+    wake it up.
+    """
+    if path in ("MEMORY.md", PROBLEMS_FILE):
+        return True
+    return os.path.dirname(path) == "projects" and path.endswith((".md", ".json"))
+
+
+class InotifyWatcher:
+    """inotify(7) on the watched directories, read through ctypes."""
+
+    def __init__(self, base):
+        self.base = base
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory relative to base
+        self.dirs = {}
+        for rel in WATCHED_DIRS:
+            self.watch(rel)
+
+    def watch(self, rel):
+        path = os.path.join(self.base, rel)
+        if not os.path.isdir(path):
+            return
+        wd = self._add(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {path}")
+        self.dirs[wd] = rel
+
+    def read(self, timeout):
+        """Paths changed within `timeout` seconds (None: wait for one).
+
+        Returns None when the kernel queue overflowed or a watched directory
+        appeared, i.e. when changes may have been missed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        buf = os.read(self.fd, 64 * 1024)
+        changed, pos = set(), 0
+        while pos < len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, pos)
+            pos += EVENT_HEADER.size
+            name = buf[pos : pos + length].rstrip(b"\0").decode(errors="replace")
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            rel = os.path.join(self.dirs.get(wd, ""), name)
+            if mask & IN_ISDIR:
+                # projects/ or .index/ created after the watch started
+                if rel in WATCHED_DIRS and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch(rel)
+                    return None
+                continue
+            if relevant(rel):
+                changed.add(rel)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback: stat the watched directories every `interval` seconds."""
+
+    def __init__(self, base, interval=1.0):
+        self.base = base
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        state = {}
+        for rel in WATCHED_DIRS:
+            try:
+                entries = os.scandir(os.path.join(self.base, rel))
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    path = os.path.join(rel, entry.name)
+                    if not relevant(path) or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def read(self, timeout):
+        """Changed paths after sleeping `timeout` (None = one interval)."""
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        state = self.scan()
+        changed = {
+            path
+            for path in set(state) | set(self.snapshot)
+            if state.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = state
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(base, poll=False, interval=1.0):
+    """inotify when available (and not `poll`), polling otherwise."""
+    if not poll:
+        try:
+            return InotifyWatcher(base)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(base, interval)
+
+
+def changes(watcher, debounce=0.02):
+    """Yield debounced batches of changed paths (None: re-check everything)."""
+    while True:
+        batch = watcher.read(None)
+        if batch is not None and not batch:
+            continue
+        while batch is not None:
+            more = watcher.read(debounce)
+            if more is None:
+                batch = None
+            elif not more:
+                break
+            else:
+                batch |= more
+        yield batch
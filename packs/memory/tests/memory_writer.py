@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Append-only observation writer for the auto-observe rule.
+
+Adds one Index row and one Details block to `{project}.observations.md`:
+
+- The next number, the live file's row count and the byte offset where the
+  Index table ends come from a cached tail (`{memory}/.index/tails.json`),
+  validated by the file's mtime and size. Only on a cache miss is the Index
+  section scanned, and the scan stops at `## Details`.
+- The new file is streamed to a temp file (head, new row, rest, new block)
+  and renamed over the old one, so readers never see a half-written file.
+- An exclusive advisory lock per project serializes concurrent writers, so
+  two sessions can never take the same number or drop each other's rows.
+
+Run:
+  python3 ~/.claude/memory/tests/memory_writer.py add my-app --type decision \\
+      --summary "Chose JWT over sessions" --files "auth.ts" \\
+      --field Before="Server sessions" --field After="JWT, 15min expiry" \\
+      --field Why="Stateless API"
+  python3 ~/.claude/memory/tests/memory_writer.py resolve my-app 7 \\
+      --note "Added index on created_at"
+  python3 ~/.claude/memory/tests/memory_writer.py rollover my-app
+  python3 ~/.claude/memory/tests/memory_writer.py manifest my-app
+
+Both `add` and `resolve` keep the open-problems index (memory_problems.py)
+and the `## Open Problems` list in MEMORY.md in step with the files: `add`
+appends `- {project} #{number}: {summary}` for a new open problem, and
+`resolve` removes that line.
+"""
+
+import argparse
+import datetime
+import fcntl
+import json
+import os
+import re
+import shutil
+import sys
+from contextlib import contextmanager
+
+from memory_config import (
+    DEFAULT_OBSERVATION_TYPES,
+    DEFAULT_SHARD_ROWS,
+    load_config,
+)
+from memory_model import (
+    CONTEXT_KEYWORDS,
+    DETAILS_RE,
+    INDEX_HEADER,
+    OBSERVATIONS_TEMPLATE,
+    RESOLVED_MARKER,
+    RESOLVED_RE,
+    ROW_RE,
+    DetailsBlock,
+    IndexRow,
+    mapped,
+    observation_status,
+)
+from memory_export import discard_export
+from memory_problems import discard, locked, record
+from memory_shards import Manifest, live_name, rebuild_manifest, rollover
+
+TAILS_FILE = os.path.join(".index", "tails.json")
+LOCKS_DIR = os.path.join(".index", "locks")
+RESOLVABLE_TYPES = ("problem", "bugfix")
+# `| N | date | type | ` and the rest of the row, Summary first.
+# The empty Open Problems list in MEMORY.md: `(none)` or `(none yet)`.
+PLACEHOLDER_RE = re.compile(r"^\(none[^)]*\)\s*$")
+ROW_CELLS_RE = re.compile(r"^(\| (\d+) \| [^|]*\| *(\w*) *\| )(.*)$")
+
+
+class WriterError(ValueError):
+    """The observation cannot be written as given."""
+
+
+@contextmanager
+def project_lock(memory_path, project):
+    """Hold an exclusive advisory lock for one project's observations file."""
+    locks = os.path.join(memory_path, LOCKS_DIR)
+    os.makedirs(locks, exist_ok=True)
+    with open(os.path.join(locks, f"{project}.lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def scan_tail(path):
+    """Scan the Index section; return (last_number, index_end_offset, rows).
+
+    `index_end_offset` is the byte offset just past the last Index row (or
+    past the header separator when the table is empty): where a new row goes.
+    `rows` counts the Index rows in this file.
+    """
+    last_number, index_end, header_seen, rows = 0, None, False, 0
+    with mapped(path) as buf:
+        pos, size = 0, len(buf)
+        while pos < size:
+            end = buf.find(b"\n", pos)
+            end = size if end < 0 else end + 1
+            line = buf[pos:end].decode("utf-8", errors="replace")
+            pos = end
+            if line.startswith("## Details") or DETAILS_RE.match(line):
+                break
+            if INDEX_HEADER in line:
+                header_seen = True
+            elif header_seen and index_end is None and line.startswith("|---"):
+                index_end = end
+            m = ROW_RE.match(line)
+            if m:
+                last_number = max(last_number, int(m.group(1)))
+                index_end = end
+                rows += 1
+    if index_end is None:
+        raise WriterError(f"{path} has no Index table header")
+    return last_number, min(index_end, size), rows
+
+
+class TailCache:
+    """Per-project (mtime, size, last_number, index_end, rows) cache."""
+
+    def __init__(self, memory_path):
+        self.path = os.path.join(memory_path, TAILS_FILE)
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, project, st):
+        entry = self.entries.get(project)
+        if (
+            entry
+            and "rows" in entry
+            and (entry["mtime_ns"], entry["size"]) == (st.st_mtime_ns, st.st_size)
+        ):
+            return entry["last_number"], entry["index_end"], entry["rows"]
+        return None
+
+    def put(self, project, st, last_number, index_end, rows):
+        self.entries[project] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "last_number": last_number,
+            "index_end": index_end,
+            "rows": rows,
+        }
+        self.save()
+
+    def drop(self, project):
+        if self.entries.pop(project, None) is not None:
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+
+def format_row(number, date, obs_type, summary, files):
+    return f"| {number} | {date} | {obs_type} | {summary} | {files or '-'} |\n"
+
+
+def format_details(number, date, obs_type, summary, fields):
+    lines = [f"### [{number}] {date} | {obs_type} | {summary}"]
+    lines += [f"**{name}:** {text}" for name, text in fields]
+    return "\n".join(lines) + "\n"
+
+
+def _copy_range(src, dst, start, end):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(remaining, 1 << 20))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def add_observation(
+    memory_path,
+    project,
+    obs_type,
+    summary,
+    files="",
+    fields=(),
+    date=None,
+    types=DEFAULT_OBSERVATION_TYPES,
+    shard_rows=DEFAULT_SHARD_ROWS,
+):
+    """Append one observation; return its number.
+
+    `types` and `shard_rows` come from the tree's config
+    (`observation_types`, `observations_shard_rows`). With `shard_rows` set,
+    a live file that holds that many rows is rolled over into a shard right
+    after the write. Rows already moved to a shard or the archive do not
+    count.
+    """
+    if obs_type not in types:
+        raise WriterError(
+            f"invalid type {obs_type!r}; expected one of {', '.join(types)}"
+        )
+    for label, text in [("summary", summary), ("files", files)]:
+        if "|" in text or "\n" in text:
+            raise WriterError(f"{label} must not contain '|' or newlines")
+    fields = list(fields)
+    names = {name for name, _ in fields}
+    if obs_type in ("decision", "bugfix") and not {"Before", "After"} <= names:
+        raise WriterError(f"{obs_type} needs Before and After fields")
+    context = [k.strip("*:") for k in CONTEXT_KEYWORDS]
+    if not names & set(context):
+        raise WriterError(f"Details need a context field: {', '.join(context)}")
+    date = date or datetime.date.today().isoformat()
+    if files and "Files" not in names:
+        fields.append(("Files", files))
+
+    projects_dir = os.path.join(memory_path, "projects")
+    path = os.path.join(projects_dir, live_name(project))
+    with project_lock(memory_path, project):
+        if not os.path.exists(path):
+            os.makedirs(projects_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.write(OBSERVATIONS_TEMPLATE.format(project=project))
+
+        tails = TailCache(memory_path)
+        st = os.stat(path)
+        tail = tails.get(project, st)
+        if tail is None:
+            last_number, index_end, rows = scan_tail(path)
+            # A freshly rolled-over live file continues the shards' numbering.
+            manifest = Manifest.load(projects_dir, project)
+            tail = max(last_number, manifest.last_number), index_end, rows
+        last_number, index_end, rows = tail
+        number = last_number + 1
+
+        row = format_row(number, date, obs_type, summary, files).encode()
+        block = format_details(number, date, obs_type, summary, fields).encode()
+        tmp = f"{path}.tmp.{os.getpid()}"
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            _copy_range(src, dst, 0, index_end)
+            src.seek(max(index_end - 1, 0))
+            if index_end and src.read(1) != b"\n":
+                row = b"\n" + row
+            dst.write(row)
+            _copy_range(src, dst, index_end, st.st_size)
+            src.seek(max(st.st_size - 2, 0))
+            ending = src.read(2)
+            if not ending.endswith(b"\n"):
+                dst.write(b"\n\n")
+            elif not ending.endswith(b"\n\n"):
+                dst.write(b"\n")
+            dst.write(block)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+        rows += 1
+        tails.put(project, os.stat(path), number, index_end + len(row), rows)
+
+        resolved = RESOLVED_RE.search(block.decode()) is not None
+        details = DetailsBlock(number, None, None, True, resolved)
+        index_row = IndexRow(number, date, obs_type, summary, files)
+        is_open = observation_status(index_row, details) == "open"
+        if is_open:
+            record(memory_path, project, number, date, summary)
+
+        if shard_rows and rows >= shard_rows:
+            rollover(projects_dir, project)
+            tails.drop(project)
+    if is_open:
+        _update_memory_md_problems(memory_path, project, number, summary)
+    return number
+
+
+def resolve_observation(memory_path, project, number, note, date=None):
+    """Mark a problem (or recurring bugfix) resolved; return its file name.
+
+    Adds the `[R]` marker to its Summary, sets `**Status:** Resolved` if the
+    block has a Status line, and appends `**Resolved:** {date} - {note}`.
+    The entry may live in the live file or any shard. The open-problems
+    index and MEMORY.md's Open Problems list are updated to match.
+    """
+    if "\n" in note:
+        raise WriterError("note must be a single line")
+    date = date or datetime.date.today().isoformat()
+    projects_dir = os.path.join(memory_path, "projects")
+    with project_lock(memory_path, project):
+        name = Manifest.load(projects_dir, project).shard_for(number)
+        name = name or live_name(project)
+        path = os.path.join(projects_dir, name)
+        if not os.path.exists(path):
+            raise WriterError(f"{name} does not exist")
+        out, found, block = [], None, None
+        section = None
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        for line in lines:
+            if line.startswith("## "):
+                section = line[3:].strip().lower()
+            m = ROW_CELLS_RE.match(line) if section == "index" else None
+            if m and int(m.group(2)) == number:
+                found = m.group(3)
+                if found not in RESOLVABLE_TYPES:
+                    raise WriterError(f"#{number} is a {found}, not resolvable")
+                if m.group(4).startswith(RESOLVED_MARKER):
+                    raise WriterError(f"#{number} is already resolved")
+                line = f"{m.group(1)}{RESOLVED_MARKER} {m.group(4)}"
+            d = DETAILS_RE.match(line) if section == "details" else None
+            if d or line.startswith("## "):
+                if block is not None:
+                    out += _resolve_block(block, date, note)
+                block = [] if d and int(d.group(1)) == number else None
+            if block is not None:
+                block.append(line)
+            else:
+                out.append(line)
+        if block is not None:
+            out += _resolve_block(block, date, note)
+        if found is None:
+            raise WriterError(f"#{number} not found in {name}")
+
+        tmp = f"{path}.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(out))
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+        TailCache(memory_path).drop(project)
+        discard(memory_path, project, number)
+        discard_export(memory_path)
+    _update_memory_md_problems(memory_path, project, number)
+    return name
+
+
+def _resolve_block(lines, date, note):
+    """Details block lines with Status set and a Resolved line appended."""
+    end = len(lines)
+    while end > 1 and not lines[end - 1].strip():
+        end -= 1
+    body = [
+        "**Status:** Resolved" if line.startswith("**Status:**") else line
+        for line in lines[:end]
+    ]
+    return body + [f"**Resolved:** {date} - {note}"] + lines[end:]
+
+
+def _update_memory_md_problems(memory_path, project, number, summary=None):
+    """Add (given `summary`) or remove `- {project} #{number}: ...` in MEMORY.md.
+
+    Only the `## Open Problems` list is edited; a missing file or section is
+    left alone. A `(none)` placeholder gives way to the first entry and comes
+    back when the last one is removed.
+    """
+    path = os.path.join(memory_path, "MEMORY.md")
+    with locked(memory_path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return
+        lines = content.split("\n")
+        start = next(
+            (i for i, line in enumerate(lines) if line.startswith("## Open Problems")),
+            None,
+        )
+        if start is None:
+            return
+        end = next(
+            (i for i in range(start + 1, len(lines)) if lines[i].startswith("## ")),
+            len(lines),
+        )
+        items = lines[start + 1 : end]
+        while items and not items[-1].strip():
+            items.pop()
+        blank = lines[start + 1 + len(items) : end]
+        prefix = f"- {project} #{number}:"
+        items = [
+            line
+            for line in items
+            if not line.startswith(prefix) and not PLACEHOLDER_RE.match(line)
+        ]
+        if summary is not None:
+            items.append(f"{prefix} {summary}")
+        lines[start + 1 : end] = (items or ["(none)"]) + blank
+        updated = "\n".join(lines)
+        if updated != content:
+            tmp = f"{path}.tmp.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(updated)
+            os.replace(tmp, path)
+
+
+def roll_over(memory_path, project):
+    """Force a rollover of the live file; return the new shard name or None."""
+    projects_dir = os.path.join(memory_path, "projects")
+    with project_lock(memory_path, project):
+        name = rollover(projects_dir, project)
+        TailCache(memory_path).drop(project)
+    return name
+
+
+def _parse_field(text):
+    name, sep, value = text.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError("fields look like Name=text")
+    return name.strip(), value.strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append an observation")
+    parser.add_argument("--memory-path", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="record one observation")
+    add.add_argument("project")
+    add.add_argument("--type", required=True, dest="obs_type")
+    add.add_argument("--summary", required=True)
+    add.add_argument("--files", default="")
+    add.add_argument("--date", help="YYYY-MM-DD (default: today)")
+    add.add_argument(
+        "--field",
+        action="append",
+        type=_parse_field,
+        default=[],
+        help="Details field as Name=text, e.g. Before=..., repeatable",
+    )
+    res = sub.add_parser("resolve", help="mark a problem resolved")
+    res.add_argument("project")
+    res.add_argument("number", type=int)
+    res.add_argument("--note", required=True, help="what was done")
+    res.add_argument("--date", help="YYYY-MM-DD (default: today)")
+    roll = sub.add_parser("rollover", help="move the live file into a shard now")
+    roll.add_argument("project")
+    manifest = sub.add_parser("manifest", help="rebuild a shard manifest")
+    manifest.add_argument("project")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    memory_path = args.memory_path or config.memory_path
+    if args.memory_path:
+        # Another tree is validated against its own config, not ~/.claude's.
+        config = load_config(os.path.join(memory_path, "memory-config.json"))
+    if args.command == "resolve":
+        try:
+            name = resolve_observation(
+                memory_path, args.project, args.number, args.note, args.date
+            )
+        except WriterError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        print(f"Resolved [{args.number}] in {name}")
+        return 0
+    if args.command == "rollover":
+        name = roll_over(memory_path, args.project)
+        print(f"Rolled over into {name}" if name else "Nothing to roll over")
+        return 0
+    if args.command == "manifest":
+        projects_dir = os.path.join(memory_path, "projects")
+        with project_lock(memory_path, args.project):
+            shards = rebuild_manifest(projects_dir, args.project).shards
+        print(f"Manifest lists {len(shards)} shards for {args.project}")
+        return 0
+
+    try:
+        number = add_observation(
+            memory_path,
+            args.project,
+            args.obs_type,
+            args.summary,
+            args.files,
+            args.field,
+            args.date,
+            config.observation_types,
+            config.shard_rows,
+        )
+    except WriterError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Recorded [{number}] in {args.project}.observations.md")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Compiled project router for memory-config.json.
+
+The config's keyword map (every project keyword, name and GitHub repo) is
+compiled into one Aho-Corasick automaton, and all `path` fields into a path
+trie. Input that is exactly one keyword is a dict lookup; otherwise a route
+is a single pass over the input text and a single walk down the cwd,
+independent of how many projects or keywords the config holds.
+
+Run:
+  python3 ~/.claude/memory/tests/project_router.py "fix the dashboard charts"
+  python3 ~/.claude/memory/tests/project_router.py --cwd "$PWD"
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque, namedtuple
+
+from memory_config import CONFIG_PATH, load_config
+
+# `via` is "keyword", "path" or "fallback"; `keyword` is the matched keyword
+# or the matched path prefix.
+Route = namedtuple("Route", "project keyword via")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords.
+
+    Matches are whole-word: a keyword must not be preceded or followed by a
+    letter or digit, so `api` does not fire inside `rapid`.
+    """
+
+    def __init__(self, pairs):
+        # State 0 is the root. goto[s] maps a char to the next state; out[s]
+        # lists (keyword, project, rank) tuples ending at s.
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for rank, (keyword, project) in enumerate(pairs):
+            self._add(keyword.lower(), project, rank)
+        self._link()
+
+    def _add(self, keyword, project, rank):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((keyword, project, rank))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def matches(self, text):
+        """Yield (start, keyword, project, rank) for every whole-word match."""
+        text = text.lower()
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            if not self.out[state]:
+                continue
+            after_ok = i + 1 == n or not text[i + 1].isalnum()
+            if not after_ok:
+                continue
+            for keyword, project, rank in self.out[state]:
+                start = i - len(keyword) + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    yield start, keyword, project, rank
+
+
+class PathTrie:
+    """Trie over path components; finds the deepest project path above cwd."""
+
+    def __init__(self, pairs):
+        self.root = {}
+        for path, project in pairs:
+            node = self.root
+            for part in _components(path):
+                node = node.setdefault(part, {})
+            # First project to claim a path wins, matching config order.
+            node.setdefault(None, (project, path))
+
+    def lookup(self, cwd):
+        node, best = self.root, None
+        for part in _components(cwd):
+            node = node.get(part)
+            if node is None:
+                break
+            best = node.get(None, best)
+        return best
+
+
+def _components(path):
+    path = os.path.normpath(os.path.expanduser(path))
+    return [p for p in path.split(os.sep) if p]
+
+
+class ProjectRouter:
+    """Route free text or a working directory to a configured project."""
+
+    def __init__(self, config):
+        self.config = config
+        self.automaton = KeywordAutomaton(config.keyword_map.items())
+        self.paths = PathTrie(
+            (p.path, p.name) for p in config.projects.values() if p.path
+        )
+
+    def match_text(self, text):
+        """Best keyword match in `text`: longest keyword, then config order."""
+        keyword = text.strip().lower()
+        project = self.config.project_for_keyword(keyword)
+        if project is not None:
+            return Route(project, keyword, "keyword")
+        best = None
+        for start, keyword, project, rank in self.automaton.matches(text):
+            key = (-len(keyword), rank, start)
+            if best is None or key < best[0]:
+                best = (key, Route(project, keyword, "keyword"))
+        return best[1] if best else None
+
+    def match_cwd(self, cwd):
+        hit = self.paths.lookup(cwd)
+        return Route(hit[0], hit[1], "path") if hit else None
+
+    def route(self, text="", cwd=None):
+        """Keyword match first, then cwd, then `fallback_project`."""
+        found = self.match_text(text) if text else None
+        if found is None and cwd:
+            found = self.match_cwd(cwd)
+        if found is None:
+            found = Route(self.config.fallback_project, None, "fallback")
+        return found
+
+
+_routers = {}
+
+
+def get_router(path=CONFIG_PATH):
+    """Return the router for the config at `path`, rebuilt when it changes.
+
+    Cached on the file's (mtime, size), like load_config(); a missing config
+    routes everything to the default fallback project.
+    """
+    try:
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        key = None
+    cached = _routers.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    router = ProjectRouter(load_config(path))
+    _routers[path] = (key, router)
+    return router
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route input to a memory project")
+    parser.add_argument("text", nargs="*", help="user input to match keywords in")
+    parser.add_argument("--cwd", help="working directory to match project paths")
+    args = parser.parse_args(argv)
+    route = get_router().route(" ".join(args.text), args.cwd)
+    print(json.dumps(route._asdict()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
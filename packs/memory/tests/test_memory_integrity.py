@@ -3,78 +3,85 @@
 Integration tests for Miracle Infrastructure memory system integrity.
 Validates consistency across all memory files (MEMORY.md, dossiers, observations).
 
-Run: python3 ~/.claude/memory/tests/test_memory_integrity.py
+Run: python3 ~/.claude/memory/tests/test_memory_integrity.py [--full] [--jobs N]
+     python3 ~/.claude/memory/tests/test_memory_integrity.py --watch \
+         [--poll] [--interval S] [--debounce MS] [--log FILE]
+
+Per-file results are cached by content hash; only changed files are re-checked
+on the next run. Cross-file checks always run. --full re-checks everything.
+--jobs N fans per-file checks out over N worker processes.
+
+--watch keeps running: on every change under the memory path it re-checks the
+changed files only, re-runs the tests that depend on them and prints one line
+per batch (appended to --log as well). It uses inotify, or polls every
+--interval seconds when inotify is unavailable or --poll is given.
 """
 
+import argparse
 import json
 import os
 import re
+import sys
+import time
 import unittest
 
-# Config-driven paths
-CONFIG_PATH = os.path.expanduser("~/.claude/memory/memory-config.json")
+from memory_checks import DOSSIER_SECTIONS, build_report, refresh_report
+from memory_config import CONFIG_PATH, ConfigError, MemoryConfig, load_config
 
+# A malformed config is reported by TestConfigExists; the other checks run
+# against the defaults so one bad field does not hide every other problem.
+try:
+    CONFIG = load_config()
+    CONFIG_ERROR = None
+except ConfigError as e:
+    CONFIG = MemoryConfig()
+    CONFIG_ERROR = e
 
-def get_memory_path():
-    """Get memory base path from config or use default."""
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH) as f:
-            config = json.load(f)
-        path = config.get("memory_path", "~/.claude/memory")
-        return os.path.expanduser(path)
-    return os.path.expanduser("~/.claude/memory")
-
-
-def get_valid_types():
-    """Get valid observation types from config or use defaults."""
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH) as f:
-            config = json.load(f)
-        return set(
-            config.get(
-                "observation_types",
-                ["decision", "bugfix", "feature", "discovery", "problem"],
-            )
-        )
-    return {"decision", "bugfix", "feature", "discovery", "problem"}
-
-
-MEMORY_BASE = get_memory_path()
+MEMORY_BASE = CONFIG.memory_path
 MEMORY_MD = os.path.join(MEMORY_BASE, "MEMORY.md")
 PROJECTS_DIR = os.path.join(MEMORY_BASE, "projects")
-VALID_OBS_TYPES = get_valid_types()
+VALID_OBS_TYPES = set(CONFIG.observation_types)
+MAX_DOSSIER_LINES = CONFIG.max_dossier_lines
 
+# Set by --full: re-check every file instead of reusing cached results.
+FULL = False
+# Set by --jobs: number of worker processes for per-file checks.
+JOBS = 1
 
-def read_file(path):
-    with open(path, "r") as f:
-        return f.read()
+_report = None
 
 
-def list_dossiers():
-    """List all project dossier files (*.md, not *.observations.md)."""
-    if not os.path.exists(PROJECTS_DIR):
-        return []
-    return [
-        f
-        for f in os.listdir(PROJECTS_DIR)
-        if f.endswith(".md") and not f.endswith(".observations.md")
-    ]
+def get_report():
+    """Check the memory tree once per run; every test class shares it."""
+    global _report
+    if _report is None:
+        _report = build_report(
+            MEMORY_BASE, VALID_OBS_TYPES, MAX_DOSSIER_LINES, full=FULL, jobs=JOBS
+        )
+    return _report
+
 
+class MemoryTestCase(unittest.TestCase):
+    """Base class: exposes the shared integrity report as `self.report`."""
 
-def list_observations():
-    """List all observation files."""
-    if not os.path.exists(PROJECTS_DIR):
-        return []
-    return [f for f in os.listdir(PROJECTS_DIR) if f.endswith(".observations.md")]
+    @classmethod
+    def setUpClass(cls):
+        cls.report = get_report()
 
+    def assertFilesPass(self, files, check):
+        """Fail with every message the named per-file check produced."""
+        messages = [m for f in files.values() for m in f.results[check]]
+        if messages:
+            self.fail("\n".join(messages))
 
-class TestMemoryMdStructure(unittest.TestCase):
+
+class TestMemoryMdStructure(MemoryTestCase):
     """MEMORY.md has correct structure."""
 
     def setUp(self):
-        if not os.path.exists(MEMORY_MD):
+        if self.report.memory_md is None:
             self.skipTest("MEMORY.md not found")
-        self.content = read_file(MEMORY_MD)
+        self.content = self.report.memory_md
 
     def test_exists(self):
         self.assertTrue(os.path.exists(MEMORY_MD), "MEMORY.md should exist")
@@ -106,14 +113,14 @@ class TestMemoryMdStructure(unittest.TestCase):
             )
 
 
-class TestProjectTableConsistency(unittest.TestCase):
+class TestProjectTableConsistency(MemoryTestCase):
     """Project table in MEMORY.md matches actual files."""
 
     def setUp(self):
-        if not os.path.exists(MEMORY_MD):
+        if self.report.memory_md is None:
             self.skipTest("MEMORY.md not found")
-        self.content = read_file(MEMORY_MD)
-        self.dossiers = list_dossiers()
+        self.content = self.report.memory_md
+        self.dossiers = list(self.report.dossiers)
 
     def test_all_dossiers_in_table(self):
         """Every dossier file should be referenced in MEMORY.md table."""
@@ -138,33 +145,31 @@ class TestProjectTableConsistency(unittest.TestCase):
             )
 
 
-class TestObservationCounts(unittest.TestCase):
+class TestObservationCounts(MemoryTestCase):
     """Observation counts in MEMORY.md match actual files."""
 
     def setUp(self):
-        if not os.path.exists(MEMORY_MD):
+        if self.report.memory_md is None:
             self.skipTest("MEMORY.md not found")
-        self.content = read_file(MEMORY_MD)
+        self.content = self.report.memory_md
 
     def test_counts_match(self):
         """Observation counts in table should match actual Index rows."""
-        pattern = r"\((\d+)\s*entr(?:y|ies)\)"
-        # Also support the format: (N entries)
+        # Supports the format: (N entries)
         for match in re.finditer(
             r"`projects/([^`]+)\.md`[^|]*\|\s*[^|]*\((\d+)\s*entr", self.content
         ):
             project = match.group(1)
             claimed_count = int(match.group(2))
 
-            obs_path = os.path.join(PROJECTS_DIR, f"{project}.observations.md")
-            if not os.path.exists(obs_path):
+            # Shards and the live file count as one logical file.
+            actual_count = self.report.observation_rows(project)
+            if actual_count is None:
                 self.fail(
                     f"MEMORY.md claims {claimed_count} observations for {project} "
                     f"but file doesn't exist"
                 )
 
-            obs_content = read_file(obs_path)
-            actual_count = len(re.findall(r"^\| \d+", obs_content, re.MULTILINE))
             self.assertEqual(
                 claimed_count,
                 actual_count,
@@ -173,121 +178,55 @@ class TestObservationCounts(unittest.TestCase):
             )
 
 
-class TestDossierFormat(unittest.TestCase):
+class TestDossierFormat(MemoryTestCase):
     """Each dossier has required sections."""
 
-    REQUIRED_SECTIONS = [
-        "## Status",
-        "## Description",
-        "## Current State",
-        "## Session History",
-    ]
+    REQUIRED_SECTIONS = DOSSIER_SECTIONS
 
     def test_all_dossiers_have_sections(self):
-        for dossier in list_dossiers():
-            content = read_file(os.path.join(PROJECTS_DIR, dossier))
-            for section in self.REQUIRED_SECTIONS:
-                self.assertIn(
-                    section,
-                    content,
-                    f"{dossier} missing section: {section}",
-                )
+        self.assertFilesPass(self.report.dossiers, "sections")
 
     def test_under_200_lines(self):
-        for dossier in list_dossiers():
-            content = read_file(os.path.join(PROJECTS_DIR, dossier))
-            lines = content.strip().split("\n")
-            self.assertLessEqual(
-                len(lines),
-                200,
-                f"{dossier} is {len(lines)} lines, should be <=200",
-            )
+        self.assertFilesPass(self.report.dossiers, "line_count")
 
 
-class TestObservationsFormat(unittest.TestCase):
+class TestObservationsFormat(MemoryTestCase):
     """Observation files have correct format."""
 
     def test_has_index_table(self):
-        for obs_file in list_observations():
-            content = read_file(os.path.join(PROJECTS_DIR, obs_file))
-            self.assertIn("## Index", content, f"{obs_file} missing Index section")
-            self.assertIn(
-                "| # | Date | Type | Summary | Files |",
-                content,
-                f"{obs_file} missing Index header",
-            )
+        self.assertFilesPass(self.report.observations, "index_table")
 
     def test_has_details_section(self):
-        for obs_file in list_observations():
-            content = read_file(os.path.join(PROJECTS_DIR, obs_file))
-            self.assertIn("## Details", content, f"{obs_file} missing Details section")
+        self.assertFilesPass(self.report.observations, "details_section")
 
     def test_valid_types(self):
         """All observation types should be from the valid set."""
-        for obs_file in list_observations():
-            content = read_file(os.path.join(PROJECTS_DIR, obs_file))
-            types = re.findall(r"^\| \d+ \| [\d-]+ \| (\w+) \|", content, re.MULTILINE)
-            for obs_type in types:
-                self.assertIn(
-                    obs_type,
-                    VALID_OBS_TYPES,
-                    f"{obs_file} has invalid type: {obs_type}",
-                )
+        self.assertFilesPass(self.report.observations, "valid_types")
 
     def test_sequential_numbers(self):
         """Observation numbers should be sequential starting from 1."""
-        for obs_file in list_observations():
-            content = read_file(os.path.join(PROJECTS_DIR, obs_file))
-            numbers = [
-                int(m) for m in re.findall(r"^\| (\d+) \|", content, re.MULTILINE)
-            ]
-            if not numbers:
-                continue
-            expected = list(range(1, len(numbers) + 1))
-            self.assertEqual(
-                numbers,
-                expected,
-                f"{obs_file} numbers not sequential: {numbers}",
-            )
+        self.assertFilesPass(self.report.observations, "sequential")
+        self.assertFilesPass(self.report.projects, "sequence")
+
+    def test_shard_manifest_matches(self):
+        """Each project's shard manifest should describe its shard files."""
+        self.assertFilesPass(self.report.projects, "manifest")
+
+    def test_open_problems_indexed(self):
+        """The open-problems index should list exactly the open problems."""
+        self.assertFilesPass(self.report.projects, "open_problems")
+
+    def test_details_offsets(self):
+        """Up-to-date Details offsets sidecars should match their files."""
+        self.assertFilesPass(self.report.projects, "offsets")
 
     def test_index_details_match(self):
         """Every Index row should have a matching Details entry."""
-        for obs_file in list_observations():
-            content = read_file(os.path.join(PROJECTS_DIR, obs_file))
-            index_nums = re.findall(r"^\| (\d+) \|", content, re.MULTILINE)
-            for num in index_nums:
-                self.assertIn(
-                    f"### [{num}]",
-                    content,
-                    f"{obs_file}: Index entry #{num} has no matching Details",
-                )
+        self.assertFilesPass(self.report.observations, "index_details")
 
     def test_details_have_context(self):
         """Details entries should have Before/After or Context fields."""
-        for obs_file in list_observations():
-            content = read_file(os.path.join(PROJECTS_DIR, obs_file))
-            details_entries = re.findall(r"### \[(\d+)\][^\n]+", content)
-            for num in details_entries:
-                pattern = rf"### \[{num}\].*?(?=### \[|$)"
-                block = re.search(pattern, content, re.DOTALL)
-                if block:
-                    block_text = block.group()
-                    has_context = any(
-                        kw in block_text
-                        for kw in [
-                            "**Before:**",
-                            "**After:**",
-                            "**Context:**",
-                            "**Symptoms:**",
-                            "**What:**",
-                            "**Signal:**",
-                        ]
-                    )
-                    self.assertTrue(
-                        has_context,
-                        f"{obs_file} #{num}: Details entry lacks context "
-                        f"(Before/After/Context)",
-                    )
+        self.assertFilesPass(self.report.observations, "details_context")
 
 
 class TestConfigExists(unittest.TestCase):
@@ -307,6 +246,131 @@ class TestConfigExists(unittest.TestCase):
         self.assertIn("projects", config)
         self.assertIn("fallback_project", config)
 
+    def test_config_fields_valid(self):
+        if not os.path.exists(CONFIG_PATH):
+            self.skipTest("Config not found")
+        self.assertIsNone(CONFIG_ERROR, f"Invalid config: {CONFIG_ERROR}")
+
+
+# Tests to re-run in --watch mode for each kind of change refresh_report()
+# reports. Config tests are left out: a config change needs a restart.
+AFFECTED = {
+    "memory_md": (
+        TestMemoryMdStructure,
+        TestProjectTableConsistency,
+        TestObservationCounts,
+    ),
+    "dossier": (TestProjectTableConsistency, TestDossierFormat),
+    "observations": (TestObservationCounts, TestObservationsFormat),
+    "project": (TestObservationsFormat,),
+}
+
+
+class WatchResult(unittest.TestResult):
+    """Keeps one line per failed test instead of a traceback."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self.lines.append(f"FAIL {test.id().split('.', 1)[1]}: {err[1]}")
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self.lines.append(f"ERROR {test.id().split('.', 1)[1]}: {err[1]!r}")
+
+
+def run_classes(classes):
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite(loader.loadTestsFromTestCase(c) for c in classes)
+    result = WatchResult()
+    suite.run(result)
+    return result
+
+
+def watch(poll=False, interval=1.0, debounce=0.02, log=None):
+    """Re-check the memory tree on every change until interrupted."""
+    global _report
+    from memory_watch import InotifyWatcher, changes, open_watcher
+
+    every = list(dict.fromkeys(c for group in AFFECTED.values() for c in group))
+    watcher = open_watcher(MEMORY_BASE, poll, interval)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+
+    def emit(label, result, started):
+        ms = (time.perf_counter() - started) * 1000
+        status = f"{len(result.lines)} failed" if result.lines else "OK"
+        lines = [
+            f"[{time.strftime('%H:%M:%S')}] {label}: {status} "
+            f"({result.testsRun} tests, {ms:.1f} ms)"
+        ]
+        lines += [f"  {line}" for line in result.lines]
+        text = "\n".join(lines)
+        print(text, flush=True)
+        if log:
+            with open(log, "a") as f:
+                f.write(text + "\n")
+
+    started = time.perf_counter()
+    get_report()
+    emit(f"watching {MEMORY_BASE} ({mode})", run_classes(every), started)
+    try:
+        for batch in changes(watcher, debounce):
+            started = time.perf_counter()
+            if batch is None:
+                _report = None
+                get_report()
+                emit("rescan", run_classes(every), started)
+                continue
+            kinds = refresh_report(_report, batch, VALID_OBS_TYPES, MAX_DOSSIER_LINES)
+            classes = [c for c in every if any(c in AFFECTED[k] for k in kinds)]
+            if classes:
+                emit(", ".join(sorted(batch)), run_classes(classes), started)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def main():
+    global FULL, JOBS
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--full", action="store_true", help="ignore cached per-file results"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="worker processes for per-file checks (0 = one per CPU)",
+    )
+    parser.add_argument("--watch", action="store_true", help="re-check on change")
+    parser.add_argument("--poll", action="store_true", help="poll, not inotify")
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--debounce", type=float, default=20, help="ms of quiet ending a batch"
+    )
+    parser.add_argument("--log", help="append --watch results to this file")
+    args, rest = parser.parse_known_args()
+    FULL = args.full
+    JOBS = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    if args.watch:
+        watch(args.poll, args.interval, args.debounce / 1000, args.log)
+        return
+
+    report = get_report()
+    print(
+        f"Checked {len(report.checked)} files, "
+        f"{len(report.cached)} unchanged (cached)",
+        file=sys.stderr,
+    )
+    unittest.main(argv=[sys.argv[0]] + rest, verbosity=2)
+
 
 if __name__ == "__main__":
-    unittest.main(verbosity=2)
+    main()
@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+"""
+Behavioural tests for the memory tools.
+
+Most tests build a throwaway memory tree from the templates (MEMORY.md,
+memory-config.json and the example observations file) in a temporary
+directory, run a tool against it and check what it returns or leaves
+behind; config tests use a throwaway config file. Unlike the integrity
+tests, they never read or write the real ~/.claude/memory. The templates
+ship with the repository only, so tree tests run from a checkout and skip
+elsewhere.
+
+Run: python3 packs/memory/tests/test_memory_tools.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import memory_analytics
+import memory_offsets
+from memory_checks import build_report, refresh_report
+from memory_compact import STUB_PREFIX, append_archive, compact_project
+from memory_config import (
+    DEFAULT_OBSERVATION_TYPES,
+    ConfigError,
+    MemoryConfig,
+    load_config,
+)
+from memory_dupes import MAX_BUCKET, Signatures, candidate_pairs, find_clusters
+from memory_export import EXPORT_FILE, ColumnarReader, export
+from memory_index import MemoryIndex, Query
+from memory_model import ObservationsFile, read_file
+from memory_offsets import Offsets, fetch_details, verify
+from memory_problems import PROBLEMS_FILE, OpenProblems, rebuild
+from memory_search import SearchIndex, analyze
+from memory_shards import Manifest, archive_name, live_name
+from memory_watch import PollingWatcher, changes, relevant
+from memory_writer import (
+    WriterError,
+    add_observation,
+    resolve_observation,
+    roll_over,
+)
+from project_router import ProjectRouter, get_router
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES = os.path.join(os.path.dirname(TESTS_DIR), "templates")
+PROJECT = "example-project"
+TEMPLATE_ROWS = 5
+
+
+def add_decision(memory_path, summary, shard_rows=0):
+    """Record one decision; top-level so worker processes can run it."""
+    return add_observation(
+        memory_path,
+        PROJECT,
+        "decision",
+        summary,
+        "app.ts",
+        [("Before", "old"), ("After", "new")],
+        "2026-03-01",
+        shard_rows=shard_rows,
+    )
+
+
+@unittest.skipUnless(os.path.isdir(TEMPLATES), "templates not found")
+class MemoryTreeCase(unittest.TestCase):
+    """A fresh memory tree per test, seeded from the templates."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.memory = tmp.name
+        self.projects = os.path.join(self.memory, "projects")
+        os.makedirs(self.projects)
+        for name in ("MEMORY.md", "memory-config.json"):
+            shutil.copy(os.path.join(TEMPLATES, name), self.memory)
+        shutil.copy(
+            os.path.join(TEMPLATES, f"{PROJECT}.observations.md"), self.projects
+        )
+
+    def path(self, name):
+        return os.path.join(self.projects, name)
+
+    def parse(self, name=None):
+        return ObservationsFile.from_path(self.path(name or live_name(PROJECT)))
+
+    def text(self, name=None):
+        return read_file(self.path(name or live_name(PROJECT)))
+
+    def add_problem(self, summary):
+        return add_observation(
+            self.memory,
+            PROJECT,
+            "problem",
+            summary,
+            fields=[("Symptoms", "slow"), ("Status", "Open")],
+            date="2026-03-02",
+        )
+
+    def memory_md(self):
+        return read_file(os.path.join(self.memory, "MEMORY.md"))
+
+
+class TestConfig(unittest.TestCase):
+    """MemoryConfig validates fields; load_config() caches per file."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config_path = os.path.join(tmp.name, "memory-config.json")
+
+    def write(self, data):
+        with open(self.config_path, "w") as f:
+            json.dump(data, f)
+
+    def test_rejects_bad_fields(self):
+        bad = [
+            [],
+            {"memory_path": 3},
+            {"max_dossier_lines": 0},
+            {"max_dossier_lines": True},
+            {"observation_types": []},
+            {"observation_types": ["decision", ""]},
+            {"observations_shard_rows": -1},
+            {"archive_types": [1]},
+            {"archive_after_days": -5},
+            {"projects": []},
+            {"projects": {"app": "x"}},
+            {"projects": {"app": {"keywords": "app"}}},
+            {"projects": {"app": {"path": 7}}},
+        ]
+        for data in bad:
+            with self.subTest(data=data), self.assertRaises(ConfigError):
+                MemoryConfig.from_dict(data)
+
+    def test_keyword_map(self):
+        config = MemoryConfig.from_dict(
+            {
+                "projects": {
+                    "web": {"keywords": ["Dashboard", "ui"], "github": "me/web-app"},
+                    "api": {"keywords": ["dashboard", "server"]},
+                }
+            }
+        )
+        self.assertEqual(config.project_for_keyword("DASHBOARD"), "web")
+        self.assertEqual(config.project_for_keyword("web-app"), "web")
+        self.assertEqual(config.project_for_keyword("api"), "api")
+        self.assertIsNone(config.project_for_keyword("mobile"))
+
+    def test_cached_until_file_changes(self):
+        self.assertEqual(load_config(self.config_path).fallback_project, "general")
+        self.write({"fallback_project": "misc"})
+        config = load_config(self.config_path)
+        self.assertIs(load_config(self.config_path), config)
+        self.assertIs(get_router(self.config_path), get_router(self.config_path))
+        self.assertEqual(get_router(self.config_path).route("hi").project, "misc")
+
+        self.write({"fallback_project": "other", "projects": {"app": {}}})
+        self.assertEqual(load_config(self.config_path).fallback_project, "other")
+        self.assertEqual(get_router(self.config_path).route("app").project, "app")
+        with open(self.config_path, "w") as f:
+            f.write("{")
+        with self.assertRaises(ConfigError):
+            load_config(self.config_path)
+
+
+class TestRouter(unittest.TestCase):
+    """ProjectRouter matches whole keywords, then the deepest project path."""
+
+    def setUp(self):
+        self.router = ProjectRouter(
+            MemoryConfig.from_dict(
+                {
+                    "fallback_project": "general",
+                    "projects": {
+                        "web": {
+                            "keywords": ["api", "dashboard"],
+                            "path": "/work/web",
+                        },
+                        "web-admin": {
+                            "keywords": ["admin dashboard"],
+                            "github": "me/backoffice",
+                            "path": "/work/web/admin",
+                        },
+                        "rapid": {"keywords": ["api"]},
+                    },
+                }
+            )
+        )
+
+    def route(self, text="", cwd=None):
+        return tuple(self.router.route(text, cwd))
+
+    def test_keyword_boundaries(self):
+        self.assertEqual(self.route("fix the API"), ("web", "api", "keyword"))
+        self.assertEqual(self.route("api-gateway"), ("web", "api", "keyword"))
+        for text in ("rapidly", "apis", "the_api2", "dashboards"):
+            with self.subTest(text=text):
+                self.assertEqual(self.route(text), ("general", None, "fallback"))
+
+    def test_longest_keyword_then_config_order(self):
+        route = self.route("the admin dashboard is slow")
+        self.assertEqual(route, ("web-admin", "admin dashboard", "keyword"))
+        self.assertEqual(self.route("rapid"), ("rapid", "rapid", "keyword"))
+        route = self.route(" Backoffice ")
+        self.assertEqual(route, ("web-admin", "backoffice", "keyword"))
+
+    def test_cwd_path_trie(self):
+        cases = [
+            ("/work/web", ("web", "/work/web", "path")),
+            ("/work/web/src/app", ("web", "/work/web", "path")),
+            ("/work/web/admin/", ("web-admin", "/work/web/admin", "path")),
+            ("/work/web/admin/src", ("web-admin", "/work/web/admin", "path")),
+            ("/work/website", ("general", None, "fallback")),
+            ("/work", ("general", None, "fallback")),
+        ]
+        for cwd, expected in cases:
+            with self.subTest(cwd=cwd):
+                self.assertEqual(self.route(cwd=cwd), expected)
+        # A keyword in the text wins over the cwd.
+        self.assertEqual(self.route("api", "/work/web/admin")[0], "web")
+
+
+class TestWriter(MemoryTreeCase):
+    """add_observation() appends one row and one block."""
+
+    def test_add_continues_numbering(self):
+        number = add_decision(self.memory, "Switched to Vite")
+        self.assertEqual(number, TEMPLATE_ROWS + 1)
+        obs = self.parse()
+        self.assertEqual(obs.numbers, list(range(1, number + 1)))
+        self.assertEqual(obs.details[-1].number, number)
+        row = "| 6 | 2026-03-01 | decision | Switched to Vite | app.ts |"
+        self.assertIn(row, self.text())
+
+    def test_concurrent_adds_take_distinct_numbers(self):
+        count = 24
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            numbers = list(
+                pool.map(
+                    add_decision,
+                    [self.memory] * count,
+                    [f"decision {i}" for i in range(count)],
+                )
+            )
+        expected = list(range(TEMPLATE_ROWS + 1, TEMPLATE_ROWS + count + 1))
+        self.assertEqual(sorted(numbers), expected)
+        obs = self.parse()
+        self.assertEqual(sorted(obs.numbers), list(range(1, expected[-1] + 1)))
+        self.assertEqual(obs.details_numbers, set(range(1, expected[-1] + 1)))
+
+    def test_rejects_invalid_input(self):
+        with self.assertRaises(WriterError):
+            add_observation(
+                self.memory, PROJECT, "decision", "a", fields=[("Before", "x")]
+            )
+        with self.assertRaises(WriterError):
+            add_observation(
+                self.memory,
+                PROJECT,
+                "idea",
+                "a",
+                fields=[("Context", "x")],
+                types=("decision",),
+            )
+        with self.assertRaises(WriterError):
+            add_decision(self.memory, "pipe | in summary")
+        self.assertEqual(self.parse().numbers, list(range(1, TEMPLATE_ROWS + 1)))
+
+    def test_open_problem_listed_in_memory_md(self):
+        number = self.add_problem("Cache misses")
+        self.assertIn(f"- {PROJECT} #{number}: Cache misses", self.memory_md())
+        self.assertNotIn("(none yet)", self.memory_md())
+
+
+class TestRollover(MemoryTreeCase):
+    """A live file reaching `shard_rows` rows becomes a shard."""
+
+    def test_rollover_and_numbering(self):
+        number = add_decision(self.memory, "Sixth", shard_rows=3)
+        manifest = Manifest.load(self.projects, PROJECT)
+        self.assertEqual(len(manifest.shards), 1)
+        shard = manifest.shards[0]
+        self.assertEqual((shard["first"], shard["last"]), (1, number))
+        self.assertEqual(shard["file"], f"{PROJECT}.observations.2026Q1.md")
+        self.assertEqual(self.parse(shard["file"]).numbers, list(range(1, 7)))
+        self.assertEqual(self.parse().numbers, [])
+
+        self.assertEqual(add_decision(self.memory, "Seventh", shard_rows=3), 7)
+        self.assertEqual(self.parse().numbers, [7])
+        self.assertEqual(manifest.shard_for(3), shard["file"])
+        self.assertIsNone(Manifest.load(self.projects, PROJECT).shard_for(7))
+
+    def test_rollover_counts_live_rows_after_compaction(self):
+        resolve_observation(self.memory, PROJECT, 5, "Added index")
+        compact_project(self.memory, PROJECT, ["problem"], 90)
+        self.assertEqual(add_decision(self.memory, "Sixth", shard_rows=6), 6)
+        self.assertEqual(Manifest.load(self.projects, PROJECT).shards, [])
+        self.assertEqual(add_decision(self.memory, "Seventh", shard_rows=6), 7)
+        (shard,) = Manifest.load(self.projects, PROJECT).shards
+        self.assertEqual(self.parse(shard["file"]).numbers, [1, 2, 3, 4, 6, 7])
+        self.assertEqual(self.parse().numbers, [])
+        self.assertEqual(add_decision(self.memory, "Eighth", shard_rows=6), 8)
+
+    def test_forced_rollover(self):
+        name = roll_over(self.memory, PROJECT)
+        self.assertEqual(name, f"{PROJECT}.observations.2026Q1.md")
+        self.assertIsNone(roll_over(self.memory, PROJECT))
+        self.assertEqual(add_decision(self.memory, "After rollover"), 6)
+
+
+class TestResolve(MemoryTreeCase):
+    """resolve_observation() closes a problem everywhere it is tracked."""
+
+    def test_resolve_updates_file_index_and_memory_md(self):
+        rebuild(self.memory)
+        number = self.add_problem("Cache misses")
+        self.assertIn(number, OpenProblems.load(self.memory).projects[PROJECT])
+
+        name = resolve_observation(
+            self.memory, PROJECT, number, "Warmed the cache", "2026-03-05"
+        )
+        self.assertEqual(name, live_name(PROJECT))
+        text = self.text()
+        self.assertIn(f"| {number} | 2026-03-02 | problem | [R] Cache misses |", text)
+        self.assertIn("**Status:** Resolved", text)
+        self.assertIn("**Resolved:** 2026-03-05 - Warmed the cache", text)
+        self.assertNotIn(number, OpenProblems.load(self.memory).projects[PROJECT])
+        self.assertNotIn(f"#{number}:", self.memory_md())
+
+    def test_resolve_rejects_non_problems_and_repeats(self):
+        with self.assertRaises(WriterError):
+            resolve_observation(self.memory, PROJECT, 1, "n/a")
+        resolve_observation(self.memory, PROJECT, 5, "Added index")
+        with self.assertRaises(WriterError):
+            resolve_observation(self.memory, PROJECT, 5, "again")
+        with self.assertRaises(WriterError):
+            resolve_observation(self.memory, PROJECT, 99, "missing")
+
+    def test_resolve_in_shard(self):
+        shard = roll_over(self.memory, PROJECT)
+        self.assertEqual(resolve_observation(self.memory, PROJECT, 5, "Fixed"), shard)
+        self.assertIn("| 5 | 2026-02-20 | problem | [R] ", self.text(shard))
+
+
+class TestCompact(MemoryTreeCase):
+    """compact_project() moves closed entries to the archive."""
+
+    def test_open_problems_stay(self):
+        self.assertEqual(compact_project(self.memory, PROJECT, ["problem"], 90), 0)
+        self.assertFalse(os.path.exists(self.path(archive_name(PROJECT))))
+
+    def test_resolved_problem_archived_with_stub(self):
+        resolve_observation(self.memory, PROJECT, 5, "Added index")
+        self.assertEqual(compact_project(self.memory, PROJECT, ["problem"], 90), 1)
+
+        live = self.parse()
+        self.assertEqual(live.numbers, [1, 2, 3, 4])
+        self.assertNotIn(5, live.details_numbers)
+        stubs = [ln for ln in self.text().split("\n") if ln.startswith(STUB_PREFIX)]
+        self.assertEqual(len(stubs), 1)
+        self.assertIn(archive_name(PROJECT), stubs[0])
+
+        self.assertIn("**Resolved:**", fetch_details(self.memory, PROJECT, [5])[5])
+        self.assertEqual(Manifest.load(self.projects, PROJECT).archive["last"], 5)
+        # Archived numbers are never reused.
+        self.assertEqual(add_decision(self.memory, "After compaction"), 6)
+
+    def test_second_run_appends_to_archive(self):
+        resolve_observation(self.memory, PROJECT, 5, "Added index")
+        compact_project(self.memory, PROJECT, ["problem"], 90)
+        number = self.add_problem("Cache misses")
+        resolve_observation(self.memory, PROJECT, number, "Warmed the cache")
+        archive = self.text(archive_name(PROJECT))
+        self.assertEqual(compact_project(self.memory, PROJECT, ["problem"], 90), 1)
+
+        after = self.text(archive_name(PROJECT))
+        self.assertTrue(after.startswith(archive))
+        self.assertEqual(self.parse(archive_name(PROJECT)).numbers, [5, number])
+        self.assertEqual(len([ln for ln in after.split("\n") if ln == "## Index"]), 2)
+        stubs = [ln for ln in self.text().split("\n") if ln.startswith(STUB_PREFIX)]
+        self.assertEqual(len(stubs), 1)
+        archived = Manifest.load(self.projects, PROJECT).archive
+        self.assertEqual((archived["rows"], archived["last"]), (2, number))
+
+        # The sidecar was extended in place, not rebuilt, and is correct.
+        offsets = Offsets.read(self.memory, archive_name(PROJECT))
+        self.assertTrue(offsets.is_fresh())
+        found = fetch_details(self.memory, PROJECT, [5, number])
+        self.assertIn("Added index", found[5])
+        self.assertTrue(found[number].endswith("Warmed the cache"))
+        report = build_report(self.memory, DEFAULT_OBSERVATION_TYPES)
+        for name, r in list(report.observations.items()) + list(
+            report.projects.items()
+        ):
+            for check, failures in r.results.items():
+                self.assertEqual(failures, [], f"{name} {check}")
+
+    def test_interrupted_run_is_not_archived_twice(self):
+        rows = {5: "| 5 | 2026-02-20 | problem | [R] Slow | - |"}
+        blocks = {5: "### [5] 2026-02-20 | problem | Slow\n**Context:** x"}
+        self.assertEqual(append_archive(self.memory, PROJECT, rows, blocks), [5])
+        self.assertEqual(append_archive(self.memory, PROJECT, rows, blocks), [])
+        self.assertEqual(self.parse(archive_name(PROJECT)).numbers, [5])
+
+    def test_dry_run_changes_nothing(self):
+        resolve_observation(self.memory, PROJECT, 5, "Added index")
+        before = self.text()
+        self.assertEqual(
+            compact_project(self.memory, PROJECT, ["problem"], 90, dry_run=True), 1
+        )
+        self.assertEqual(self.text(), before)
+
+
+class TestExport(MemoryTreeCase):
+    """export() writes every Index row; --append adds only new ones."""
+
+    def setUp(self):
+        super().setUp()
+        self.output = os.path.join(self.memory, EXPORT_FILE)
+
+    def test_append_adds_new_rows_only(self):
+        self.assertEqual(export(self.memory, self.output), TEMPLATE_ROWS)
+        self.assertEqual(export(self.memory, self.output, append=True), 0)
+        add_decision(self.memory, "Sixth")
+        self.assertEqual(export(self.memory, self.output, append=True), 1)
+
+        reader = ColumnarReader(self.output)
+        self.assertEqual(len(reader.segments), 2)
+        self.assertEqual(len(reader), TEMPLATE_ROWS + 1)
+        numbers = [r.number for r in reader.select(project=PROJECT)]
+        self.assertEqual(numbers, list(range(1, TEMPLATE_ROWS + 2)))
+        decisions = reader.select(types=["decision"], date_from="2026-03-01")
+        self.assertEqual([r.summary for r in decisions], ["Sixth"])
+
+    def test_append_after_resolve_rewrites_export(self):
+        export(self.memory, self.output)
+        resolve_observation(self.memory, PROJECT, 5, "Added index")
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(export(self.memory, self.output, append=True), TEMPLATE_ROWS)
+        (row,) = ColumnarReader(self.output).select(types=["problem"])
+        self.assertTrue(row.summary.startswith("[R] "))
+
+
+class TestAnalytics(MemoryTreeCase):
+    """resolve_times() counts problems by status and dates by Resolved line."""
+
+    def resolve_report(self, use_numpy):
+        corpus = memory_analytics.Corpus.load(self.memory)
+        report = memory_analytics.build_report(corpus, ["resolve"], use_numpy=use_numpy)
+        return report["resolve"]
+
+    def test_resolve_times(self):
+        resolve_observation(self.memory, PROJECT, 5, "Added index", "2026-03-02")
+        add_observation(
+            self.memory,
+            PROJECT,
+            "problem",
+            "Flaky login",
+            fields=[("Symptoms", "401s"), ("Status", "Resolved")],
+            date="2026-03-01",
+        )
+        self.add_problem("Cache misses")
+        modes = [False] + ([True] if memory_analytics.np is not None else [])
+        for use_numpy in modes:
+            with self.subTest(use_numpy=use_numpy):
+                report = self.resolve_report(use_numpy)
+                self.assertEqual((report["resolved"], report["open"]), (2, 1))
+                # Only #5 has a Resolved date: 2026-02-20 -> 2026-03-02.
+                self.assertEqual(report["max_days"], 10)
+                self.assertEqual(report["median_days"], 10.0)
+
+
+class TestOffsets(MemoryTreeCase):
+    """Details sidecars: built on use, verified, and read by `show`."""
+
+    def corrupt(self, offsets):
+        with open(offsets.sidecar) as f:
+            data = json.load(f)
+        data["blocks"]["5"][0] += 1
+        with open(offsets.sidecar, "w") as f:
+            json.dump(data, f)
+
+    def test_build_and_fetch(self):
+        offsets = Offsets.load(self.memory, live_name(PROJECT))
+        self.assertTrue(os.path.exists(offsets.sidecar))
+        self.assertEqual(sorted(offsets.blocks), list(range(1, TEMPLATE_ROWS + 1)))
+        text = offsets.fetch([5, 99])[5]
+        self.assertTrue(text.startswith("### [5] 2026-02-20 | problem |"))
+        self.assertTrue(text.endswith("Prisma generates a sequential scan."))
+
+        # A changed file makes the sidecar stale; the next load rebuilds it.
+        add_decision(self.memory, "Sixth")
+        self.assertFalse(Offsets.read(self.memory, live_name(PROJECT)).is_fresh())
+        self.assertIn(6, fetch_details(self.memory, PROJECT, [6]))
+        self.assertTrue(Offsets.read(self.memory, live_name(PROJECT)).is_fresh())
+
+    def test_verify(self):
+        name = live_name(PROJECT)
+        self.assertEqual(verify(self.memory, name), [])
+        offsets = Offsets.load(self.memory, name)
+        self.assertEqual(verify(self.memory, name), [])
+        self.corrupt(offsets)
+        (problem,) = verify(self.memory, name)
+        self.assertIn("offsets for #5", problem)
+
+    def test_integrity_check_is_cached_per_sidecar(self):
+        offsets = Offsets.load(self.memory, live_name(PROJECT))
+
+        def offsets_problems():
+            report = build_report(self.memory, DEFAULT_OBSERVATION_TYPES)
+            return report.projects[PROJECT].results["offsets"]
+
+        self.assertEqual(offsets_problems(), [])
+        self.corrupt(offsets)
+        self.assertEqual(len(offsets_problems()), 1)
+        offsets.rebuild()
+        self.assertEqual(offsets_problems(), [])
+
+    def test_show(self):
+        argv = ["--memory-path", self.memory, "show", PROJECT, "5", "99"]
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            self.assertEqual(memory_offsets.main(argv), 1)
+        self.assertTrue(stdout.getvalue().startswith("### [5] "))
+        self.assertIn("#99 not found", stderr.getvalue())
+
+
+class TestDupes(MemoryTreeCase):
+    """MinHash/LSH clusters near-duplicates and skips oversized buckets."""
+
+    def add_copy(self, project, summary):
+        """Record a copy of template entry #2 under `summary`."""
+        block = fetch_details(self.memory, PROJECT, [2])[2].split("\n")[1:]
+        fields = [line[2:].split(":** ", 1) for line in block]
+        add_observation(
+            self.memory, project, "decision", summary, fields=fields, date="2026-03-01"
+        )
+
+    def clusters(self, **kwargs):
+        index = Signatures.load(self.memory)
+        return find_clusters(index.entries(), **kwargs)[0]
+
+    def test_clusters_near_duplicates(self):
+        self.add_copy(PROJECT, "Migrated REST to tRPC")
+        self.add_copy("other-app", "Migrated REST API to tRPC")
+        (cluster,) = self.clusters()
+        members = {(m["project"], m["number"]) for m in cluster["members"]}
+        self.assertEqual(
+            members, {(PROJECT, 2), (PROJECT, TEMPLATE_ROWS + 1), ("other-app", 1)}
+        )
+        self.assertGreaterEqual(cluster["similarity"], 0.6)
+        self.assertEqual(self.clusters(threshold=1.01), [])
+
+    def test_cross_project_only(self):
+        self.add_copy(PROJECT, "Migrated REST to tRPC")
+        self.assertEqual(len(self.clusters()), 1)
+        self.assertEqual(self.clusters(cross_project=True), [])
+
+    def test_signatures_cached(self):
+        self.assertEqual(Signatures.load(self.memory).hashed, TEMPLATE_ROWS)
+        self.assertEqual(Signatures.load(self.memory).hashed, 0)
+        # Only the new text is hashed; an identical one reuses its signature.
+        self.add_copy(PROJECT, "Moved REST to tRPC")
+        self.assertEqual(Signatures.load(self.memory).hashed, 1)
+        self.add_copy("other-app", "Moved REST to tRPC")
+        self.assertEqual(Signatures.load(self.memory).hashed, 0)
+
+    def test_oversized_buckets_skipped(self):
+        sig = bytes(range(256))
+        pairs, skipped = candidate_pairs([sig] * (MAX_BUCKET + 1))
+        self.assertEqual((pairs, skipped), (set(), 32))
+        pairs, skipped = candidate_pairs([sig] * 3)
+        self.assertEqual((pairs, skipped), ({(0, 1), (0, 2), (1, 2)}, 0))
+
+
+class TestIndexQuery(MemoryTreeCase):
+    """MemoryIndex.search() answers /search-memory queries."""
+
+    def search(self, text):
+        index = MemoryIndex.open(self.memory)
+        index.refresh()
+        return [(r["project"], r["number"]) for r in index.search(text)]
+
+    def numbers(self, text):
+        return sorted(number for _, number in self.search(text))
+
+    def test_parse(self):
+        query = Query('what do we know about "cache layer" type:Decision')
+        self.assertEqual(query.terms, ["cache", "layer"])
+        self.assertEqual(query.type, "decision")
+        query = Query("project:MyApp file:lib/Auth.ts date:2026-02 bogus:x")
+        self.assertEqual((query.project, query.file), ("MyApp", "lib/Auth.ts"))
+        self.assertEqual(query.date, "2026-02")
+        self.assertEqual(query.terms, ["bogus", "x"])
+
+    def test_natural_language_question(self):
+        self.assertEqual(self.numbers("what do we know about tRPC"), [2, 3])
+        self.assertEqual(self.numbers("what do we know about websockets"), [])
+
+    def test_prefix_and_or_ranking(self):
+        self.assertEqual(self.numbers("migrat"), [1, 2, 3])
+        results = self.search("prisma dashboard")
+        self.assertEqual(results[0], (PROJECT, 5))
+        self.assertEqual(sorted(n for _, n in results), [1, 4, 5])
+
+    def test_filters_narrow_terms(self):
+        self.assertEqual(self.numbers("type:decision trpc"), [2])
+        self.assertEqual(self.numbers("status:open prisma"), [5])
+        self.assertEqual(self.numbers("date:2026-02-18 file:package.json"), [3])
+
+    def test_project_filter_keeps_case(self):
+        shutil.copy(self.path(live_name(PROJECT)), self.path(live_name("MyApp")))
+        self.assertEqual(
+            self.search("project:MyApp trpc"), [("MyApp", 3), ("MyApp", 2)]
+        )
+        self.assertEqual(self.search("project:myapp trpc"), [])
+
+
+class TestSearch(MemoryTreeCase):
+    """SearchIndex ranks by BM25; pruning never hides a filtered match."""
+
+    def setUp(self):
+        super().setUp()
+        # Twenty features make "cache" a common term.
+        for i in range(20):
+            add_observation(
+                self.memory,
+                PROJECT,
+                "feature",
+                f"Cache layer {i}",
+                fields=[("Context", "caching")],
+                date="2026-03-01",
+            )
+        self.index = SearchIndex.open(self.memory)
+        self.index.refresh()
+
+    def search(self, text, top=3):
+        total, results = self.index.search(text, top)
+        return total, [r["number"] for r in results]
+
+    def test_analyze(self):
+        self.assertEqual(analyze("The caching of cached caches"), ["cach"] * 3)
+
+    def test_ranks_by_terms_matched(self):
+        self.assertEqual(self.search("trpc bundle"), (2, [3, 2]))
+        self.assertEqual(self.search("websockets"), (0, []))
+
+    def test_common_terms_only_rescore_rare_matches(self):
+        self.assertEqual(self.search("prisma cache"), (2, [1, 5]))
+        total, numbers = self.search("cache", top=25)
+        self.assertEqual(total, 20)
+        self.assertEqual(sorted(numbers), list(range(6, 26)))
+
+    def test_filters_fall_back_to_common_terms(self):
+        total, numbers = self.search("prisma cache type:feature")
+        self.assertEqual(total, 20)
+        self.assertEqual(len(numbers), 3)
+        self.assertEqual(self.search("prisma cache status:open"), (1, [5]))
+
+    def test_refresh_reindexes_changed_file_only(self):
+        add_decision(self.memory, "Adopted websockets")
+        reindexed, removed = self.index.refresh()
+        self.assertEqual((reindexed, removed), ([live_name(PROJECT)], []))
+        self.assertEqual(self.search("websockets"), (1, [TEMPLATE_ROWS + 21]))
+        reopened = SearchIndex.open(self.memory)
+        self.assertEqual(reopened.refresh(), ([], []))
+        self.assertEqual(reopened.search("websockets", 3)[0], 1)
+
+
+class ScriptedWatcher:
+    """A watcher whose read() returns the given batches in turn."""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def read(self, timeout):
+        return self.batches.pop(0)
+
+
+class TestWatch(MemoryTreeCase):
+    """--watch sees relevant changes and re-checks only what they touch."""
+
+    def test_relevant_paths(self):
+        for path in ("MEMORY.md", PROBLEMS_FILE, "projects/app.md", "projects/a.json"):
+            with self.subTest(path=path):
+                self.assertTrue(relevant(path))
+        for path in (
+            "projects/app.md.tmp.123",
+            ".index/integrity-cache.json",
+            "projects/sub/app.md",
+            "notes.md",
+        ):
+            with self.subTest(path=path):
+                self.assertFalse(relevant(path))
+
+    def test_changes_debounces_into_batches(self):
+        watcher = ScriptedWatcher(
+            [set(), {"MEMORY.md"}, {"projects/a.md"}, set(), None, {"x"}, None]
+        )
+        batches = changes(watcher)
+        self.assertEqual(next(batches), {"MEMORY.md", "projects/a.md"})
+        self.assertIsNone(next(batches))
+        # Lost events during debouncing turn the batch into a full rescan.
+        self.assertIsNone(next(batches))
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher(self.memory, interval=0)
+        self.assertEqual(watcher.read(0), set())
+        add_decision(self.memory, "Sixth")
+        with open(self.path("scratch.md.tmp.1"), "w") as f:
+            f.write("x")
+        changed = watcher.read(0)
+        self.assertIn(f"projects/{live_name(PROJECT)}", changed)
+        self.assertNotIn("projects/scratch.md.tmp.1", changed)
+        self.assertEqual(watcher.read(0), set())
+
+    def test_refresh_selects_kinds(self):
+        shutil.copy(os.path.join(TEMPLATES, f"{PROJECT}.md"), self.projects)
+        report = build_report(self.memory, DEFAULT_OBSERVATION_TYPES)
+
+        def refresh(*paths):
+            return refresh_report(report, set(paths), DEFAULT_OBSERVATION_TYPES)
+
+        live = f"projects/{live_name(PROJECT)}"
+        self.assertEqual(refresh("MEMORY.md"), {"memory_md"})
+        self.assertEqual(refresh(f"projects/{PROJECT}.md"), {"dossier"})
+        self.assertEqual(refresh(".index/search.idx"), set())
+        add_decision(self.memory, "Sixth")
+        self.assertEqual(refresh(live), {"observations", "project"})
+        self.assertEqual(report.observation_rows(PROJECT), TEMPLATE_ROWS + 1)
+        manifest = f"projects/{PROJECT}.observations.manifest.json"
+        self.assertEqual(refresh(manifest), {"project"})
+        os.remove(self.path(f"{PROJECT}.md"))
+        self.assertEqual(refresh(f"projects/{PROJECT}.md"), {"dossier"})
+        self.assertNotIn(f"{PROJECT}.md", report.dossiers)
+
+
+if __name__ == "__main__":
+    unittest.main()